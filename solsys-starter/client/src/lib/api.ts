@@ -195,6 +195,222 @@ export async function getEphem(ids: string[], start: string, stop: string, step
   return r.json()
 }
 
+// Binary columnar ephemeris: one shared time vector, flat xyz arrays per body (NaN where missing)
+export type EphemColumns = {
+  t: Float64Array
+  time: 'unix' | 'jd'
+  bodies: Array<{ id: string; center: string; r: Float32Array | Float64Array; v: Float32Array | Float64Array }>
+}
+
+export function decodeEphemColumns(buf: ArrayBuffer): EphemColumns {
+  const view = new DataView(buf)
+  const magic = String.fromCharCode(...new Uint8Array(buf, 0, 4))
+  if (magic !== 'EPHC') throw new Error('ephem: not a columnar payload')
+  const version = view.getUint32(4, true)
+  if (version !== 1) throw new Error(`ephem: unsupported format version ${version}`)
+  const headerLen = view.getUint32(8, true)
+  const header = JSON.parse(new TextDecoder().decode(new Uint8Array(buf, 12, headerLen)))
+  const n: number = header.n
+  const Arr = header.dtype === 'f64' ? Float64Array : Float32Array
+  let offset = 12 + headerLen
+  const t = new Float64Array(buf, offset, n)
+  offset += 8 * n
+  const bodies = header.bodies.map((b: { id: string; center: string }) => {
+    const r = new Arr(buf, offset, 3 * n)
+    offset += 3 * n * Arr.BYTES_PER_ELEMENT
+    const v = new Arr(buf, offset, 3 * n)
+    offset += 3 * n * Arr.BYTES_PER_ELEMENT
+    return { id: b.id, center: b.center, r, v }
+  })
+  return { t, time: header.time, bodies }
+}
+
+export async function getEphemColumns(ids: string[], start: string, stop: string, step = '6 h', center = '500@0', includeMoons = true, dtype: 'f32' | 'f64' = 'f32'): Promise<EphemColumns> {
+  const url = new URL('/api/ephem', API_BASE)
+  url.searchParams.set('horizons_ids', ids.join(','))
+  url.searchParams.set('start', start)
+  url.searchParams.set('stop', stop)
+  url.searchParams.set('step', step)
+  url.searchParams.set('center', center)
+  url.searchParams.set('include_moons', String(includeMoons))
+  url.searchParams.set('format', 'binary')
+  url.searchParams.set('dtype', dtype)
+  const r = await fetch(url.toString(), { headers: { Accept: 'application/x-solsys-ephem' } })
+  if (!r.ok) throw new Error(`ephem ${r.status}`)
+  return decodeEphemColumns(await r.arrayBuffer())
+}
+
+// Streamed ephemeris (NDJSON, no sample cap): onChunk gets each body's states window by window, in time order
+export async function streamEphem(
+  ids: string[], start: string, stop: string,
+  onChunk: (chunk: EphemSet) => void,
+  step = '6 h', center = '500@0', includeMoons = true, signal?: AbortSignal
+): Promise<void> {
+  const url = new URL('/api/ephem', API_BASE)
+  url.searchParams.set('horizons_ids', ids.join(','))
+  url.searchParams.set('start', start)
+  url.searchParams.set('stop', stop)
+  url.searchParams.set('step', step)
+  url.searchParams.set('center', center)
+  url.searchParams.set('include_moons', String(includeMoons))
+  url.searchParams.set('format', 'ndjson')
+  const r = await fetch(url.toString(), { signal })
+  if (!r.ok || !r.body) throw new Error(`ephem-stream ${r.status}`)
+  const reader = r.body.getReader()
+  const decoder = new TextDecoder()
+  let buffered = ''
+  for (;;) {
+    const { done, value } = await reader.read()
+    buffered += decoder.decode(value, { stream: !done })
+    const lines = buffered.split('\n')
+    buffered = lines.pop() ?? ''
+    for (const line of lines) {
+      if (!line) continue
+      const msg = JSON.parse(line)
+      if (msg.type !== 'header') onChunk(msg as EphemSet)
+    }
+    if (done) break
+  }
+}
+
+// States at arbitrary instants, Hermite-interpolated on the server from cached samples
+export async function getEphemAt(ids: string[], times: Date[], center = '500@0', includeMoons = false): Promise<EphemSet[]> {
+  const url = new URL('/api/ephem/at', API_BASE)
+  url.searchParams.set('horizons_ids', ids.join(','))
+  url.searchParams.set('times', times.map(d => d.toISOString()).join(','))
+  url.searchParams.set('center', center)
+  url.searchParams.set('include_moons', String(includeMoons))
+  const r = await fetch(url.toString())
+  if (!r.ok) throw new Error(`ephem-at ${r.status}`)
+  return r.json()
+}
+
+// Live states pushed by the server (/ws/live): keyframes carry every body, deltas the whole-km
+// position changes since the previous message. onFrame gets positions (km) with deltas applied.
+export type LiveFrame = { t: string; ids: string[]; r: ([number, number, number] | null)[]; v: ([number, number, number] | null)[] }
+
+export function subscribeLive(ids: string[], rate: number, onFrame: (frame: LiveFrame) => void, center = '500@0', start?: Date): () => void {
+  const url = new URL('/ws/live', API_BASE)
+  url.protocol = url.protocol === 'https:' ? 'wss:' : 'ws:'
+  url.searchParams.set('horizons_ids', ids.join(','))
+  url.searchParams.set('rate', String(rate))
+  url.searchParams.set('center', center)
+  if (start) url.searchParams.set('start', start.toISOString())
+  const ws = new WebSocket(url.toString())
+  let frame: LiveFrame | null = null
+  ws.onmessage = (ev) => {
+    const msg = JSON.parse(ev.data)
+    if (msg.type === 'key') {
+      frame = { t: msg.t, ids: msg.ids, r: msg.r, v: msg.v }
+    } else if (frame) {
+      const r = frame.r.slice()
+      for (const [i, d] of Object.entries(msg.d as Record<string, [number, number, number]>)) {
+        const p = r[Number(i)]
+        if (p) r[Number(i)] = [p[0] + d[0], p[1] + d[1], p[2] + d[2]]
+      }
+      frame = { ...frame, t: msg.t, r }
+    } else {
+      return
+    }
+    onFrame(frame)
+  }
+  return () => ws.close()
+}
+
+// Chebyshev segments: per axis coefficients on [t0, t1] (Unix seconds); evaluate with chebyshevStateAt in ephem.ts
+export type ChebyshevSegment = { t0: number; t1: number; x: number[]; y: number[]; z: number[]; max_error_km: number }
+export type ChebyshevBody = { id: string; center: string; segment_seconds: number; segments: ChebyshevSegment[] }
+export type ChebyshevEphem = { center: string; degree: number; tolerance_km: number; time: 'unix'; start: number; stop: number; bodies: ChebyshevBody[] }
+
+export async function getEphemChebyshev(ids: string[], start: string, stop: string, center = '500@0', includeMoons = true): Promise<ChebyshevEphem> {
+  const url = new URL('/api/ephem/chebyshev', API_BASE)
+  url.searchParams.set('horizons_ids', ids.join(','))
+  url.searchParams.set('start', start)
+  url.searchParams.set('stop', stop)
+  url.searchParams.set('center', center)
+  url.searchParams.set('include_moons', String(includeMoons))
+  const r = await fetch(url.toString())
+  if (!r.ok) throw new Error(`ephem-chebyshev ${r.status}`)
+  return r.json()
+}
+
+// Small-body positions propagated on the server from SBDB elements; positions[k] holds
+// x, y, z (km, heliocentric ecliptic) of every body at epochs[k], NaN for unbound orbits
+export type SmallBodyPositions = { epochs: Float64Array; ids: string[]; positions: Array<Float32Array | Float64Array> }
+
+export async function getSmallBodyPositions(
+  kind: 'neo' | 'comets' | 'asteroids',
+  epochs: Date[],
+  limit = 10000,
+  filters: Record<string, string | number | boolean> = {},
+  dtype: 'f32' | 'f64' = 'f32',
+): Promise<SmallBodyPositions> {
+  const url = new URL('/api/sbdb/positions', API_BASE)
+  url.searchParams.set('kind', kind)
+  url.searchParams.set('epochs', epochs.map(d => d.toISOString()).join(','))
+  url.searchParams.set('limit', String(limit))
+  url.searchParams.set('format', 'binary')
+  url.searchParams.set('dtype', dtype)
+  for (const [k, v] of Object.entries(filters)) url.searchParams.set(k, String(v))
+  const r = await fetch(url.toString())
+  if (!r.ok) throw new Error(`sbdb-positions ${r.status}`)
+  const buf = await r.arrayBuffer()
+  const view = new DataView(buf)
+  if (String.fromCharCode(...new Uint8Array(buf, 0, 4)) !== 'EPHP') throw new Error('sbdb-positions: not a positions payload')
+  const headerLen = view.getUint32(8, true)
+  const header = JSON.parse(new TextDecoder().decode(new Uint8Array(buf, 12, headerLen)))
+  const m: number = header.epochs
+  const n: number = header.bodies
+  const Arr = header.dtype === 'f64' ? Float64Array : Float32Array
+  let offset = 12 + headerLen
+  const t = new Float64Array(buf, offset, m)
+  offset += 8 * m
+  const positions = Array.from({ length: m }, (_, k) => new Arr(buf, offset + k * n * 3 * Arr.BYTES_PER_ELEMENT, n * 3))
+  return { epochs: t, ids: header.ids, positions }
+}
+
+// Spatial queries over small-body positions at one epoch (km, heliocentric ecliptic)
+export type SmallBodyHits = { kind: string; epoch: string; indexed: number; count: number; total: number; ids: string[]; positions: [number, number, number][]; distances_km?: number[] }
+
+// Bodies inside a view frustum, given as planes [a, b, c, d] with a*x + b*y + c*z + d >= 0 inside
+export async function getSmallBodiesInView(kind: 'neo' | 'comets' | 'asteroids', epoch: Date, planes: number[][], limit = 10000): Promise<SmallBodyHits> {
+  const url = new URL('/api/sbdb/spatial/box', API_BASE)
+  url.searchParams.set('kind', kind)
+  url.searchParams.set('epoch', epoch.toISOString())
+  url.searchParams.set('planes', planes.map(p => p.join(',')).join(';'))
+  url.searchParams.set('limit', String(limit))
+  const r = await fetch(url.toString())
+  if (!r.ok) throw new Error(`sbdb-spatial ${r.status}`)
+  return r.json()
+}
+
+// Bodies within radiusKm of a Horizons body (Earth by default), nearest first
+export async function getSmallBodiesNear(kind: 'neo' | 'comets' | 'asteroids', epoch: Date, radiusKm: number, body = '399'): Promise<SmallBodyHits> {
+  const url = new URL('/api/sbdb/spatial/within', API_BASE)
+  url.searchParams.set('kind', kind)
+  url.searchParams.set('epoch', epoch.toISOString())
+  url.searchParams.set('radius_km', String(radiusKm))
+  url.searchParams.set('body', body)
+  const r = await fetch(url.toString())
+  if (!r.ok) throw new Error(`sbdb-spatial ${r.status}`)
+  return r.json()
+}
+
+export type CloseApproach = { des: string; full_name: string | null; body: string; body_name: string; time: string; distance_km: number; distance_au: number; relative_speed_km_s: number }
+
+// NEO close approaches screened on the server from SBDB elements (Earth unless other planet ids are given)
+export async function getCloseApproaches(start: string, stop: string, bodies = ['399'], maxDistanceAu = 0.05, limit = 5000): Promise<{ count: number; screened: number; approaches: CloseApproach[] }> {
+  const url = new URL('/api/sbdb/close-approaches', API_BASE)
+  url.searchParams.set('start', start)
+  url.searchParams.set('stop', stop)
+  url.searchParams.set('bodies', bodies.join(','))
+  url.searchParams.set('max_distance_au', String(maxDistanceAu))
+  url.searchParams.set('limit', String(limit))
+  const r = await fetch(url.toString())
+  if (!r.ok) throw new Error(`close-approaches ${r.status}`)
+  return r.json()
+}
+
 // Enhanced Solar System Data Functions
 export async function getSolarSystemOverview(): Promise<SolarSystemOverview> {
   const url = new URL('/api/solar-system-overview', API_BASE)
@@ -260,9 +476,10 @@ export async function getAPOD(date?: string, count = 1): Promise<APODData | APOD
   return r.json()
 }
 
-export async function getExoplanets(limit = 100): Promise<ExoplanetData[]> {
+export async function getExoplanets(limit = 100, filters: Record<string, string | number> = {}): Promise<ExoplanetData[]> {
   const url = new URL('/api/nasa/exoplanets', API_BASE)
   url.searchParams.set('limit', String(limit))
+  for (const [k, v] of Object.entries(filters)) url.searchParams.set(k, String(v))
   const r = await fetch(url.toString())
   if (!r.ok) throw new Error(`exoplanets ${r.status}`)
   return r.json()
@@ -279,13 +496,15 @@ export async function getMarsRoverPhotos(rover = 'curiosity', sol?: number, eart
   return r.json()
 }
 
-export async function getSpaceWeather(): Promise<{
+export async function getSpaceWeather(start_date?: string, end_date?: string): Promise<{
   flr: SpaceWeatherEvent[]
   sep: any[]
   cme: any[]
   gst: any[]
 }> {
   const url = new URL('/api/nasa/space-weather', API_BASE)
+  if (start_date) url.searchParams.set('start_date', start_date)
+  if (end_date) url.searchParams.set('end_date', end_date)
   const r = await fetch(url.toString())
   if (!r.ok) throw new Error(`space-weather ${r.status}`)
   return r.json()
@@ -1,7 +1,7 @@
 // Simple linear interpolation between sampled Horizons vectors
 // Positions are in kilometers (ICRF/J2000). We'll scale in the renderer.
 
-import type { EphemState } from './api'
+import type { ChebyshevBody, EphemState } from './api'
 
 // Improved orbital mechanics constants
 const G = 6.67430e-11 // Gravitational constant (m³/kg/s²)
@@ -361,4 +361,40 @@ export function positionAt(states: EphemState[], frameIndex: number): [number, n
   }
   
   return null
-}
\ No newline at end of file
+}
+
+// Clenshaw evaluation of a Chebyshev series and its derivative (d/dx) at x in [-1, 1]
+function chebyshevSeries(c: number[], x: number): [number, number] {
+  let b1 = 0, b2 = 0, d1 = 0, d2 = 0
+  for (let k = c.length - 1; k >= 1; k--) {
+    const b0 = 2 * x * b1 - b2 + c[k]
+    const d0 = 2 * x * d1 - d2 + 2 * b1
+    b2 = b1; b1 = b0
+    d2 = d1; d1 = d0
+  }
+  return [x * b1 - b2 + (c[0] ?? 0), x * d1 - d2 + b1]
+}
+
+// Position (km) and velocity (km/s) of a body at any instant covered by its Chebyshev segments
+export function chebyshevStateAt(body: ChebyshevBody, targetDate: Date): { position: [number, number, number], velocity: [number, number, number] } | null {
+  const t = targetDate.getTime() / 1000
+  const segments = body.segments
+  if (!segments || segments.length === 0) return null
+
+  // Segments are sorted and mostly contiguous: binary search for the one containing t
+  let lo = 0, hi = segments.length - 1
+  while (lo < hi) {
+    const mid = (lo + hi + 1) >> 1
+    if (segments[mid].t0 <= t) lo = mid
+    else hi = mid - 1
+  }
+  const seg = segments[lo]
+  if (t < seg.t0 || t > seg.t1) return null
+
+  const half = (seg.t1 - seg.t0) / 2
+  const x = (t - seg.t0) / half - 1
+  const [px, dx] = chebyshevSeries(seg.x, x)
+  const [py, dy] = chebyshevSeries(seg.y, x)
+  const [pz, dz] = chebyshevSeries(seg.z, x)
+  return { position: [px, py, pz], velocity: [dx / half, dy / half, dz / half] }
+}
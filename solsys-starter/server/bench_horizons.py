@@ -0,0 +1,107 @@
+"""Benchmark the Horizons vectors parser on large synthetic responses.
+
+Builds responses shaped like the JSON API's (CSV table inside "result", with
+the calendar column and the LT/RG/RR columns Horizons adds by default) and
+times horizons.parse_vectors against the previous row-by-row parser.
+
+    python bench_horizons.py [rows ...]
+"""
+import json
+import re
+import sys
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+import horizons
+
+HEADER = """*******************************************************************************
+Ephemeris / API_USER Mon Jan  1 00:00:00 2025 Pasadena, USA      / Horizons
+*******************************************************************************
+Target body name: Earth (399)                     {source: DE441}
+Center body name: Sun (10)                        {source: DE441}
+Center-site name: BODY CENTER
+*******************************************************************************
+Output units    : KM-S
+Calendar mode   : Mixed Julian/Gregorian
+Output type     : GEOMETRIC cartesian states
+Output format   : 3 (position, velocity, LT, range, range-rate)
+*******************************************************************************
+            JDTDB,            Calendar Date (TDB),                      X,                      Y,                      Z,                     VX,                     VY,                     VZ,                     LT,                     RG,                     RR,
+**************************************************************************************************************************************************************************************************************************************************
+$$SOE
+"""
+FOOTER = """$$EOE
+**************************************************************************************************************************************************************************************************************************************************
+"""
+
+
+def synthetic_response(rows: int, step_hours: float = 1.0) -> dict:
+    """A Horizons-like JSON response with `rows` samples of a circular 1 AU orbit"""
+    jd0 = 2460676.5
+    start = datetime(2025, 1, 1)
+    lines = []
+    for i in range(rows):
+        days = i * step_hours / 24.0
+        angle = 2 * np.pi * days / 365.25
+        x, y, z = 1.496e8 * np.cos(angle), 1.496e8 * np.sin(angle), 0.0
+        vx, vy, vz = -29.78 * np.sin(angle), 29.78 * np.cos(angle), 0.0
+        stamp = (start + timedelta(days=days)).strftime("%Y-%b-%d %H:%M:%S.0000")
+        lines.append(
+            f"{jd0 + days:.9f}, A.D. {stamp}, {x: .15E}, {y: .15E}, {z: .15E}, "
+            f"{vx: .15E}, {vy: .15E}, {vz: .15E}, {499.0: .15E}, {1.496e8: .15E}, {0.0: .15E},"
+        )
+    return {"signature": {"source": "NASA/JPL Horizons API", "version": "1.2"}, "result": HEADER + "\n".join(lines) + "\n" + FOOTER}
+
+
+def legacy_parse(payload: dict) -> list:
+    """The former per-line parser (re.split, float() per field, a dict per row), with the column offset fixed"""
+    text = payload.get("result", "")
+    block = text.split("$$SOE", 1)[1].split("$$EOE", 1)[0]
+    states = []
+    for raw in block.strip().splitlines():
+        raw = raw.strip()
+        if not raw or raw.startswith("!"):
+            continue
+        parts = re.split(r"\s*,\s*", raw)
+        if len(parts) < 8:
+            continue
+        try:
+            xk, yk, zk = float(parts[2]), float(parts[3]), float(parts[4])
+            vx, vy, vz = float(parts[5]), float(parts[6]), float(parts[7])
+            states.append({"t": parts[0], "r": [xk, yk, zk], "v": [vx, vy, vz]})
+        except Exception:
+            continue
+    return states
+
+
+def best_of(fn, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(sizes):
+    print(f"{'rows':>8} {'bytes':>11} {'json.loads':>11} {'legacy':>10} {'parser':>10} {'data rows':>10} {'speedup':>8}")
+    for rows in sizes:
+        payload = synthetic_response(rows)
+        raw = json.dumps(payload)
+        data_payload = {"data": [[r[0], "", *r[1:]] for r in np.c_[np.arange(rows), np.random.rand(rows, 6)].tolist()]}
+
+        arrays = horizons.parse_vectors(payload)
+        assert arrays is not None and len(arrays["t"]) == rows, "parser lost rows"
+        assert np.allclose(arrays["r"][:, :2], [[s["r"][0], s["r"][1]] for s in legacy_parse(payload)])
+
+        t_json = best_of(lambda: json.loads(raw))
+        t_legacy = best_of(lambda: legacy_parse(payload))
+        t_new = best_of(lambda: horizons.parse_vectors(payload))
+        t_data = best_of(lambda: horizons.parse_vectors(data_payload))
+        print(f"{rows:>8} {len(raw):>11} {t_json * 1e3:>9.1f}ms {t_legacy * 1e3:>8.1f}ms {t_new * 1e3:>8.1f}ms {t_data * 1e3:>8.1f}ms {t_legacy / t_new:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main([int(n) for n in sys.argv[1:]] or [1000, 10000, 100000])
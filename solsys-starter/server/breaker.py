@@ -0,0 +1,105 @@
+"""Circuit breakers for the upstream APIs.
+
+A breaker watches the outcomes of recent calls to one upstream. It opens when,
+over the last WINDOW calls (at least MIN_CALLS of them), too many failed or
+were slower than the upstream's latency limit. While open, calls are refused
+at once so callers can go straight to their fallback. After a cooldown a
+single probe call is let through (half-open): success closes the breaker,
+failure opens it again with a doubled cooldown. Only the probe settles the
+half-open state; other calls that were in flight when the breaker opened
+are ignored, as are cancelled calls.
+"""
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+
+WINDOW = 20
+MIN_CALLS = 5
+# Share of failed or slow calls in the window that opens the breaker
+FAILURE_RATIO = 0.5
+COOLDOWN_S = 30.0
+MAX_COOLDOWN_S = 600.0
+
+
+class CircuitBreaker:
+    """Error-rate and latency breaker for one upstream"""
+
+    def __init__(self, name: str, slow_s: float):
+        self.name = name
+        self.slow_s = slow_s
+        self.state = "closed"
+        self.opened_at = 0.0
+        self.cooldown = COOLDOWN_S
+        self.trips = 0
+        self.rejected = 0
+        self._probing = False
+        self._probe_started = 0.0
+        # Number of the probe admitted last; calls report it back to record()
+        self.probe = 0
+        # (ok, seconds) per recent call
+        self._calls: Deque[Tuple[bool, float]] = deque(maxlen=WINDOW)
+
+    def allow(self) -> bool:
+        """Whether a call may go out now; claims the probe slot when half-open (see `probe`)"""
+        if self.state == "open" and time.monotonic() - self.opened_at >= self.cooldown:
+            self.state = "half_open"
+            self._probing = False
+        if self.state == "closed":
+            return True
+        # A probe that never reported back (e.g. cancelled) frees the slot after slow_s
+        if self.state == "half_open" and (not self._probing or time.monotonic() - self._probe_started > self.slow_s):
+            self._probing = True
+            self._probe_started = time.monotonic()
+            self.probe += 1
+            return True
+        self.rejected += 1
+        return False
+
+    def record(self, ok: bool, seconds: float, probe: int = 0, slow_s: Optional[float] = None) -> None:
+        """Outcome of a call that allow() let through (as probe number `probe`, or 0)
+
+        slow_s overrides the latency limit for this call.
+        """
+        good = ok and seconds <= (self.slow_s if slow_s is None else slow_s)
+        if self.state == "half_open":
+            # Calls admitted before the breaker opened, or probes whose slot was reclaimed, do not count
+            if probe != self.probe:
+                return
+            self._probing = False
+            if good:
+                self.state = "closed"
+                self.cooldown = COOLDOWN_S
+                self._calls.clear()
+            else:
+                self._open(min(self.cooldown * 2, MAX_COOLDOWN_S))
+            return
+        if self.state == "open" or probe:
+            return
+        self._calls.append((good, seconds))
+        bad = sum(1 for good, _ in self._calls if not good)
+        if self.state == "closed" and len(self._calls) >= MIN_CALLS and bad >= FAILURE_RATIO * len(self._calls):
+            self._open(self.cooldown)
+
+    def abandon(self, probe: int = 0) -> None:
+        """A call that allow() let through was cancelled; frees the probe slot if it held it"""
+        if self.state == "half_open" and probe and probe == self.probe:
+            self._probing = False
+
+    def _open(self, cooldown: float) -> None:
+        self.state = "open"
+        self.opened_at = time.monotonic()
+        self.cooldown = cooldown
+        self.trips += 1
+        self._calls.clear()
+        print(f"Circuit for {self.name} opened for {cooldown:.0f} s")
+
+    def stats(self) -> Dict[str, Any]:
+        latencies = sorted(seconds for _, seconds in self._calls)
+        return {
+            "state": self.state,
+            "trips": self.trips,
+            "rejected": self.rejected,
+            "recent_calls": len(self._calls),
+            "recent_failures": sum(1 for good, _ in self._calls if not good),
+            "median_latency_s": round(latencies[len(latencies) // 2], 3) if latencies else None,
+        }
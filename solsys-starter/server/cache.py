@@ -0,0 +1,281 @@
+"""Bounded in-memory response cache.
+
+Entries live under a namespace ("ephem", "sbdb", "donki", ...) that sets their
+TTL. The cache is capped by entry count and by approximate size in bytes and
+evicts least-recently-used entries first; expired entries are dropped when
+touched or when space is needed. Concurrent misses on the same key share a
+single fetch, stale entries are served while they refresh in the background,
+and a periodic refresher reloads hot entries before they expire.
+"""
+import asyncio
+import sys
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Set, Tuple
+
+import scheduler
+
+# Lists longer than this are sized from a sample of their items
+_SIZE_SAMPLE = 8
+
+
+def make_key(value: Any) -> Hashable:
+    """Normalize request parameters into a hashable key (lists -> tuples, dicts -> sorted items)"""
+    if isinstance(value, dict):
+        return tuple(sorted((str(k), make_key(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(make_key(v) for v in value)
+    if isinstance(value, set):
+        return tuple(sorted(make_key(v) for v in value))
+    return value
+
+
+def approx_size(value: Any) -> int:
+    """Rough memory footprint of a JSON-like value in bytes (arrays and indexes count their nbytes)"""
+    if hasattr(value, "nbytes"):
+        return value.nbytes
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(approx_size(k) + approx_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        n = len(value)
+        if n > 2 * _SIZE_SAMPLE:
+            sample = sum(approx_size(v) for v in value[:_SIZE_SAMPLE])
+            return sys.getsizeof(value) + sample * n // _SIZE_SAMPLE
+        return sys.getsizeof(value) + sum(approx_size(v) for v in value)
+    return sys.getsizeof(value)
+
+
+class SingleFlight:
+    """Coalesce concurrent calls for the same key into one shared task"""
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, "asyncio.Future[Any]"] = {}
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+
+            def forget(done: "asyncio.Future[Any]") -> None:
+                if self._inflight.get(key) is done:
+                    del self._inflight[key]
+                if not done.cancelled():
+                    done.exception()  # mark retrieved even if every caller went away
+
+            task.add_done_callback(forget)
+        else:
+            self.coalesced += 1
+        # A caller going away must not cancel the fetch the others are waiting on
+        return await asyncio.shield(task)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._inflight
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+
+class _Entry:
+    __slots__ = ("value", "expires", "stale_until", "size", "ttl", "fetch", "last_access")
+
+    def __init__(self, value: Any, ttl: float, grace: float, size: int, fetch: Optional[Callable[[], Awaitable[Any]]]):
+        now = time.time()
+        self.value = value
+        self.ttl = ttl
+        self.expires = now + ttl
+        self.stale_until = self.expires + grace
+        self.size = size
+        self.fetch = fetch
+        self.last_access = now
+
+
+class TTLCache:
+    """LRU cache with per-namespace TTLs and entry/byte budgets
+
+    Past its TTL an entry is stale: for a further grace period get_or_fetch
+    still serves it immediately and refreshes it in the background.
+    """
+
+    def __init__(
+        self,
+        ttls: Dict[str, float],
+        default_ttl: float,
+        max_entries: int = 2048,
+        max_bytes: int = 256 * 1024 * 1024,
+        graces: Optional[Dict[str, float]] = None,
+        default_grace: float = 0.0,
+    ):
+        self.ttls = dict(ttls)
+        self.default_ttl = default_ttl
+        self.graces = dict(graces or {})
+        self.default_grace = default_grace
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple[str, Hashable], _Entry]" = OrderedDict()
+        self._bytes = 0
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._flights = SingleFlight()
+        self._background: Set["asyncio.Future[Any]"] = set()
+
+    def _count(self, namespace: str, counter: str) -> None:
+        ns = self._stats.setdefault(namespace, {"hits": 0, "misses": 0, "stale_hits": 0, "refreshes": 0, "refresh_errors": 0, "evictions": 0, "expirations": 0})
+        ns[counter] += 1
+
+    def _drop(self, full_key: Tuple[str, Hashable], counter: str) -> None:
+        entry = self._entries.pop(full_key)
+        self._bytes -= entry.size
+        self._count(full_key[0], counter)
+
+    def ttl_for(self, namespace: str) -> float:
+        return self.ttls.get(namespace, self.default_ttl)
+
+    def grace_for(self, namespace: str) -> float:
+        return self.graces.get(namespace, self.default_grace)
+
+    def _lookup(self, full_key: Tuple[str, Hashable]) -> Optional[_Entry]:
+        """Live (fresh or stale) entry for the key; dead ones are dropped"""
+        entry = self._entries.get(full_key)
+        if entry is None:
+            return None
+        now = time.time()
+        if entry.stale_until <= now:
+            self._drop(full_key, "expirations")
+            return None
+        self._entries.move_to_end(full_key)
+        entry.last_access = now
+        return entry
+
+    def has(self, namespace: str, key: Any) -> bool:
+        """Whether a fresh or stale entry is held for the key"""
+        return self._lookup((namespace, make_key(key))) is not None
+
+    def get(self, namespace: str, key: Any) -> Optional[Any]:
+        """Cached value, or None if missing or expired"""
+        entry = self._lookup((namespace, make_key(key)))
+        if entry is None or entry.expires <= time.time():
+            self._count(namespace, "misses")
+            return None
+        self._count(namespace, "hits")
+        return entry.value
+
+    def set(self, namespace: str, key: Any, value: Any, ttl: Optional[float] = None, fetch: Optional[Callable[[], Awaitable[Any]]] = None) -> None:
+        """Store a value; `fetch` lets the refresher reload it before it expires"""
+        full_key = (namespace, make_key(key))
+        if full_key in self._entries:
+            self._bytes -= self._entries.pop(full_key).size
+        size = approx_size(value)
+        if size > self.max_bytes:
+            return
+        ttl = self.ttl_for(namespace) if ttl is None else ttl
+        self._entries[full_key] = _Entry(value, ttl, self.grace_for(namespace), size, fetch)
+        self._bytes += size
+        self._shrink()
+
+    def _load(self, full_key: Tuple[str, Hashable], fetch: Callable[[], Awaitable[Any]], ttl: Optional[float]) -> Callable[[], Awaitable[Any]]:
+        async def load() -> Any:
+            value = await fetch()
+            self.set(full_key[0], full_key[1], value, ttl, fetch)
+            return value
+
+        return load
+
+    def _refresh(self, full_key: Tuple[str, Hashable], fetch: Callable[[], Awaitable[Any]], ttl: Optional[float]) -> None:
+        """Reload an entry in the background; on failure the stale value stays"""
+        namespace = full_key[0]
+
+        async def run() -> None:
+            # Upstream calls made by a refresh yield to interactive requests
+            scheduler.background.set(True)
+            try:
+                await self._flights.do(full_key, self._load(full_key, fetch, ttl))
+                self._count(namespace, "refreshes")
+            except Exception as e:
+                self._count(namespace, "refresh_errors")
+                print(f"Background refresh failed for {namespace} {full_key[1]}: {e}")
+
+        task = asyncio.ensure_future(run())
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def get_or_fetch(self, namespace: str, key: Any, fetch: Callable[[], Awaitable[Any]], ttl: Optional[float] = None) -> Any:
+        """Cached value, or the result of one `fetch()` shared by every concurrent miss on the key
+
+        A stale value is returned at once while a background refresh runs.
+        Exceptions from `fetch()` reach every waiting caller and nothing is cached.
+        """
+        full_key = (namespace, make_key(key))
+        entry = self._lookup(full_key)
+        if entry is not None:
+            if entry.expires > time.time():
+                self._count(namespace, "hits")
+                return entry.value
+            self._count(namespace, "stale_hits")
+            if full_key not in self._flights:
+                self._refresh(full_key, fetch, ttl)
+            return entry.value
+
+        self._count(namespace, "misses")
+        return await self._flights.do(full_key, self._load(full_key, fetch, ttl))
+
+    def refresh_due(self, ahead: float, hot_window: float, limit: int = 8) -> int:
+        """Start background refreshes for recently used entries within `ahead` (fraction of TTL) of expiring
+
+        Returns how many refreshes were started; at most `limit` run at once.
+        """
+        now = time.time()
+        started = 0
+        for full_key, entry in list(self._entries.items()):
+            if len(self._flights) >= limit:
+                break
+            if entry.fetch is None or full_key in self._flights:
+                continue
+            if now - entry.last_access > hot_window or now >= entry.stale_until:
+                continue
+            if entry.expires - now <= entry.ttl * ahead:
+                self._refresh(full_key, entry.fetch, entry.ttl)
+                started += 1
+        return started
+
+    def purge_expired(self) -> int:
+        """Drop every entry past its grace period; returns how many were removed"""
+        now = time.time()
+        expired = [k for k, e in self._entries.items() if e.stale_until <= now]
+        for full_key in expired:
+            self._drop(full_key, "expirations")
+        return len(expired)
+
+    def _shrink(self) -> None:
+        if len(self._entries) <= self.max_entries and self._bytes <= self.max_bytes:
+            return
+        self.purge_expired()
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            self._drop(next(iter(self._entries)), "evictions")
+
+    def stats(self) -> Dict[str, Any]:
+        totals: Dict[str, int] = {}
+        for ns in self._stats.values():
+            for counter, n in ns.items():
+                totals[counter] = totals.get(counter, 0) + n
+        return {
+            "entries": len(self._entries),
+            "approx_bytes": self._bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            **totals,
+            "coalesced": self._flights.coalesced,
+            "in_flight": len(self._flights),
+            "namespaces": {name: dict(ns) for name, ns in self._stats.items()},
+        }
+
+
+async def run_refresher(cache: TTLCache, interval: float, ahead: float, hot_window: float) -> None:
+    """Keep hot entries warm: every `interval` seconds refresh those close to expiring"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            cache.refresh_due(ahead, hot_window)
+            cache.purge_expired()
+        except Exception as e:
+            print(f"Cache refresher error: {e}")
@@ -0,0 +1,252 @@
+"""Local columnar catalogs (SBDB small bodies, Exoplanet Archive planets) with query indexes.
+
+A catalog holds one bulk pull (an sbdb_query.api list of NEOs, comets or
+asteroids, or the default parameter sets of the Exoplanet Archive's ps table)
+as numpy columns: text fields as fixed-width unicode arrays and every other
+field as float64 (NaN for nulls). On top of the columns it keeps:
+- posting lists (sorted row ids) per value of the categorical fields,
+- a sort order per field (NaNs and blanks last), used for range filters on
+  H, moid_au, pl_rade, st_dist, ... and for sorting,
+- a key (designation or planet name) -> row map.
+
+Catalogs are saved as compressed .npz files so a restart does not need a new
+pull, and incremental pulls (objects whose orbit solution changed since the
+high-water mark) are merged by key.
+"""
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Fields kept as text; everything else is numeric
+TEXT_FIELDS = {"full_name", "des", "orbit_class", "pha", "soln_date", "pl_name", "hostname", "discoverymethod"}
+# Text fields with few distinct values, indexed by posting lists
+CATEGORICAL_FIELDS = ("orbit_class", "pha", "discoverymethod")
+# Orbit solution date: drives incremental refresh, not returned to clients
+SOLUTION_FIELD = "soln_date"
+
+
+def _column(field: str, values: Sequence[Any]) -> np.ndarray:
+    if field in TEXT_FIELDS:
+        return np.array(["" if v is None else str(v).strip() for v in values], dtype=str)
+    out = np.full(len(values), np.nan)
+    for i, v in enumerate(values):
+        try:
+            out[i] = float(v)
+        except (TypeError, ValueError):
+            pass
+    return out
+
+
+def columns_from_rows(fields: List[str], rows: List[List[Any]], wanted: List[str]) -> Dict[str, np.ndarray]:
+    """Columns for the wanted fields from an sbdb_query.api response body ("fields" plus list rows)
+
+    Wanted fields the response does not have come back blank (NaN or "").
+    """
+    by_field = dict(zip(fields, zip(*rows))) if rows else {}
+    return {field: _column(field, by_field.get(field, (None,) * len(rows))) for field in wanted}
+
+
+class Catalog:
+    """Columns plus indexes for one kind of small body (or planet), rows identified by the `key` field"""
+
+    def __init__(self, name: str, fields: List[str], key: str = "des"):
+        self.name = name
+        self.fields = fields
+        self.key = key
+        self.columns: Dict[str, np.ndarray] = {}
+        self.updated_at = 0.0
+        self.high_water = ""
+        self._lock = threading.Lock()
+        self._postings: Dict[str, Dict[str, np.ndarray]] = {}
+        self._orders: Dict[str, Tuple[np.ndarray, int]] = {}
+        self._sorted: Dict[str, np.ndarray] = {}
+        self._by_key: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.columns.get(self.key, ()))
+
+    @property
+    def loaded(self) -> bool:
+        return bool(self.updated_at)
+
+    # ---- building ----
+    def replace(self, columns: Dict[str, np.ndarray]) -> None:
+        """Swap in a full pull"""
+        self._install(columns)
+
+    def merge(self, columns: Dict[str, np.ndarray], existing_only: bool = False) -> int:
+        """Upsert rows from an incremental pull by key; returns how many rows changed
+
+        existing_only updates rows already in the catalog and drops new ones,
+        so a catalog capped at its first N rows stays at those rows.
+        """
+        if existing_only and self.columns and len(columns.get(self.key, ())):
+            known = np.isin(columns[self.key], self.columns[self.key])
+            columns = {field: column[known] for field, column in columns.items()}
+        if not len(columns.get(self.key, ())):
+            with self._lock:
+                self.updated_at = time.time()
+            return 0
+        if not self.columns:
+            self._install(columns)
+            return len(columns[self.key])
+        keep = ~np.isin(self.columns[self.key], columns[self.key])
+        merged = {field: np.concatenate([self.columns[field][keep], columns[field]]) for field in self.columns}
+        self._install(merged)
+        return len(columns[self.key])
+
+    def _install(self, columns: Dict[str, np.ndarray]) -> None:
+        postings: Dict[str, Dict[str, np.ndarray]] = {}
+        for field in CATEGORICAL_FIELDS:
+            if field not in columns:
+                continue
+            values, inverse = np.unique(columns[field], return_inverse=True)
+            order = np.argsort(inverse, kind="stable")
+            bounds = np.searchsorted(inverse[order], np.arange(len(values) + 1))
+            postings[field] = {str(v): order[bounds[i]:bounds[i + 1]] for i, v in enumerate(values)}
+        orders: Dict[str, Tuple[np.ndarray, int]] = {}
+        sorted_values: Dict[str, np.ndarray] = {}
+        for field, column in columns.items():
+            if field == SOLUTION_FIELD:
+                continue
+            # NaNs (and empty strings) sort last; `valid` counts the rest
+            if column.dtype.kind == "f":
+                order = np.argsort(column, kind="stable")
+                valid = int(np.count_nonzero(~np.isnan(column)))
+                sorted_values[field] = column[order[:valid]]
+            else:
+                order = np.argsort(np.where(column == "", "\uffff", column), kind="stable")
+                valid = int(np.count_nonzero(column != ""))
+            orders[field] = (order, valid)
+        by_key = {str(k): i for i, k in enumerate(columns.get(self.key, ()))}
+        high_water = max(columns[SOLUTION_FIELD]) if SOLUTION_FIELD in columns and len(columns[SOLUTION_FIELD]) else ""
+        with self._lock:
+            self.columns = columns
+            self._postings = postings
+            self._orders = orders
+            self._sorted = sorted_values
+            self._by_key = by_key
+            self.high_water = max(self.high_water, str(high_water))
+            self.updated_at = time.time()
+
+    # ---- persistence ----
+    def save(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        meta = json.dumps({"fields": self.fields, "updated_at": self.updated_at, "high_water": self.high_water})
+        tmp = f"{path}.tmp.npz"
+        np.savez_compressed(tmp, __meta__=np.array(meta), **self.columns)
+        os.replace(tmp, path)
+
+    def load(self, path: str) -> bool:
+        """Load a saved catalog; False if there is none or it was pulled with other fields"""
+        if not os.path.exists(path):
+            return False
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                meta = json.loads(str(data["__meta__"]))
+                columns = {field: data[field] for field in data.files if field != "__meta__"}
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Could not load {self.name} catalog: {e}")
+            return False
+        if meta["fields"] != self.fields:
+            return False
+        self._install(columns)
+        self.updated_at = meta["updated_at"]
+        self.high_water = meta["high_water"]
+        return True
+
+    # ---- queries ----
+    @staticmethod
+    def _range(order: np.ndarray, values: np.ndarray, low: Optional[float], high: Optional[float]) -> np.ndarray:
+        """Row ids with low <= value <= high, from the field's sort order and its sorted non-NaN values"""
+        i = 0 if low is None else int(np.searchsorted(values, low, side="left"))
+        j = len(values) if high is None else int(np.searchsorted(values, high, side="right"))
+        return order[i:j]
+
+    def select(
+        self,
+        equals: Optional[Dict[str, Sequence[str]]] = None,
+        ranges: Optional[Dict[str, Tuple[Optional[float], Optional[float]]]] = None,
+        sort: Optional[str] = None,
+        descending: bool = False,
+        offset: int = 0,
+        limit: int = 100,
+        sorted_only: bool = False,
+    ) -> Tuple[int, Dict[str, np.ndarray]]:
+        """(total matches, the page's columns) for exact-match and range filters
+
+        Rows blank in the sort field come last, or are dropped with sorted_only
+        (as SQL's `WHERE sort IS NOT NULL`).
+        """
+        with self._lock:
+            columns, postings, orders, by_key = self.columns, self._postings, self._orders, self._by_key
+            sorted_values = self._sorted
+        n = len(columns.get(self.key, ()))
+        mask: Optional[np.ndarray] = None
+
+        def narrow(rows: np.ndarray) -> None:
+            nonlocal mask
+            hit = np.zeros(n, dtype=bool)
+            hit[rows] = True
+            mask = hit if mask is None else mask & hit
+
+        for field, wanted in (equals or {}).items():
+            if field == self.key:
+                narrow(np.array([by_key[k] for k in wanted if k in by_key], dtype=np.int64))
+            elif field in postings:
+                empty = np.empty(0, dtype=np.int64)
+                narrow(np.concatenate([postings[field].get(w, empty) for w in wanted]))
+            else:
+                narrow(np.flatnonzero(np.isin(columns[field], list(wanted))))
+        for field, (low, high) in (ranges or {}).items():
+            if low is None and high is None:
+                continue
+            narrow(self._range(orders[field][0], sorted_values[field], low, high))
+
+        if sort:
+            order, valid = orders[sort]
+            if sorted_only:
+                order = order[:valid]
+            if descending:
+                order = np.concatenate([order[:valid][::-1], order[valid:]])
+            rows = order if mask is None else order[mask[order]]
+        else:
+            rows = np.arange(n) if mask is None else np.flatnonzero(mask)
+        page = rows[offset:offset + limit]
+        return len(rows), {field: column[page] for field, column in columns.items()}
+
+    def query(
+        self,
+        equals: Optional[Dict[str, Sequence[str]]] = None,
+        ranges: Optional[Dict[str, Tuple[Optional[float], Optional[float]]]] = None,
+        sort: Optional[str] = None,
+        descending: bool = False,
+        offset: int = 0,
+        limit: int = 100,
+        sorted_only: bool = False,
+    ) -> Tuple[int, List[List[Any]]]:
+        """(total matches, page of rows in `fields` order) for exact-match and range filters"""
+        total, columns = self.select(equals, ranges, sort, descending, offset, limit, sorted_only)
+        return total, self._rows(columns)
+
+    def _rows(self, columns: Dict[str, np.ndarray]) -> List[List[Any]]:
+        out_columns = []
+        for field in self.fields:
+            column = columns[field]
+            if column.dtype.kind == "f":
+                out_columns.append([None if v != v else v for v in column.tolist()])
+            else:
+                out_columns.append([v or None for v in column.tolist()])
+        return [list(row) for row in zip(*out_columns)]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "rows": len(self),
+            "updated_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(self.updated_at)) if self.updated_at else None,
+            "high_water": self.high_water or None,
+        }
+
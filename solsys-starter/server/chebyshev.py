@@ -0,0 +1,129 @@
+"""Chebyshev-segment compression of ephemerides (as in SPK type 2 kernels).
+
+Each body's trajectory is cut into fixed-length segments aligned to the Unix
+epoch, with a length (a power-of-two number of hours) picked from its orbital
+period. Every segment is sampled SEGMENT_SAMPLES times from Horizons or the
+Kepler fallback and fitted by least squares to one Chebyshev series per axis,
+using both positions and velocities at every other sample; the samples in
+between check the fit, and a segment whose fit misses the tolerance is cut in
+half and sampled again. Aligned segments mean a fit can be cached and reused by
+any request that covers it.
+"""
+import math
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from numpy.polynomial import chebyshev as C
+
+DEFAULT_DEGREE = 13
+MAX_DEGREE = 17
+# Coefficients are trimmed to stay within this position error
+DEFAULT_TOLERANCE_KM = 0.1
+# Coefficients are rounded to 0.1 m, so tighter fits cannot be promised
+COEFF_DECIMALS = 4
+MIN_TOLERANCE_KM = 0.001
+# Segment length: about 1/SEGMENTS_PER_ORBIT of the body's period
+SEGMENTS_PER_ORBIT = 4
+MIN_SEGMENT_HOURS = 4
+MAX_SEGMENT_HOURS = 512
+# Sample intervals per segment (both endpoints are sampled); every other sample is held out of the fit
+SEGMENT_SAMPLES = 16
+# Between the samples the error can run past its largest value at the held-out ones
+HOLDOUT_MARGIN = 0.5
+# A segment whose fit misses the tolerance is halved at most this many times
+MAX_SPLITS = 3
+
+
+def segment_hours(period_days: float) -> int:
+    """Segment length for a body with the given orbital period (negative for retrograde)"""
+    if not period_days:
+        return MAX_SEGMENT_HOURS
+    hours = abs(period_days) * 24.0 / SEGMENTS_PER_ORBIT
+    hours = 2 ** math.floor(math.log2(hours))
+    return int(max(MIN_SEGMENT_HOURS, min(MAX_SEGMENT_HOURS, hours)))
+
+
+def sample_step(hours: int) -> str:
+    """Horizons STEP_SIZE giving SEGMENT_SAMPLES intervals per segment (whole minutes for MIN_SEGMENT_HOURS and up)"""
+    return f"{hours * 60 // SEGMENT_SAMPLES} m"
+
+
+def _derivative_basis(x: np.ndarray, degree: int) -> np.ndarray:
+    """d/dx of T_0..T_degree at x, shape (len(x), degree + 1)"""
+    if degree == 0:
+        return np.zeros((len(x), 1))
+    return C.chebvander(x, degree - 1) @ C.chebder(np.eye(degree + 1), axis=0)
+
+
+def trim(c: np.ndarray, tolerance: float) -> np.ndarray:
+    """Drop trailing coefficients whose combined magnitude is within tolerance (|T_k| <= 1 on the segment)"""
+    tail = np.cumsum(np.abs(c[::-1]))[::-1]
+    keep = int(np.count_nonzero(tail > tolerance))
+    return c[:max(1, keep)]
+
+
+def fit_segment(
+    t: np.ndarray,
+    r: np.ndarray,
+    v: np.ndarray,
+    t0: float,
+    t1: float,
+    degree: int = DEFAULT_DEGREE,
+    tolerance: float = DEFAULT_TOLERANCE_KM,
+) -> Optional[Tuple[List[np.ndarray], float]]:
+    """Fit positions (and velocities) sampled evenly from t0 to t1; returns (x, y, z coefficients, max position error in km)
+
+    Only the even-numbered samples are fitted; the ones in between are held
+    out, so the error is measured where the fit was not pinned. The degree is
+    raised (up to MAX_DEGREE, and no further than the fitted samples determine)
+    until the error is within tolerance * HOLDOUT_MARGIN; a fit that gets no
+    closer should be redone on a shorter segment (see fits_within). Each axis
+    is trimmed to the coefficients needed to stay within its share of the
+    tolerance. Rows with NaNs are ignored; None if fewer than two fitted
+    samples remain.
+    """
+    x = (t - t0) / ((t1 - t0) / 2.0) - 1.0
+    keep = np.isfinite(r).all(axis=1) & np.isfinite(v).all(axis=1)
+    used = keep & (np.arange(len(t)) % 2 == 0)
+    if np.count_nonzero(used) < 2:
+        return None
+    highest = min(MAX_DEGREE, 2 * int(np.count_nonzero(used)) - 1)
+    degree = min(degree, highest)
+    # Velocities scaled by the half-interval are in km, so both blocks weigh alike
+    B = np.vstack([r[used], v[used] * (t1 - t0) / 2.0])
+    # Trimming may use half of what the held-out samples allow, split over the three axes
+    axis_tolerance = tolerance * HOLDOUT_MARGIN / (2 * math.sqrt(3))
+    while True:
+        A = np.vstack([C.chebvander(x[used], degree), _derivative_basis(x[used], degree)])
+        solution, *_ = np.linalg.lstsq(A, B, rcond=None)
+        coeffs = [trim(np.round(c, COEFF_DECIMALS), axis_tolerance) for c in solution.T]
+        fitted = np.stack([C.chebval(x[keep], c) for c in coeffs], axis=-1)
+        error = float(np.max(np.linalg.norm(fitted - r[keep], axis=1)))
+        if fits_within(error, tolerance) or degree >= highest:
+            return coeffs, error
+        degree += 1
+
+
+def fits_within(error: float, tolerance: float) -> bool:
+    """Whether a fit with this error at the held-out samples meets tolerance everywhere on its segment"""
+    return error <= tolerance * HOLDOUT_MARGIN
+
+
+def evaluate(coeffs: Sequence[np.ndarray], t0: float, t1: float, t: Any) -> Tuple[np.ndarray, np.ndarray]:
+    """Position (km) and velocity (km/s) of one segment at times t"""
+    half = (t1 - t0) / 2.0
+    x = (np.asarray(t, dtype=float) - t0) / half - 1.0
+    r = np.stack([C.chebval(x, c) for c in coeffs], axis=-1)
+    v = np.stack([C.chebval(x, C.chebder(c)) / half for c in coeffs], axis=-1)
+    return r, v
+
+
+def segment_to_dict(coeffs: Sequence[np.ndarray], t0: float, t1: float, error: float) -> Dict[str, Any]:
+    return {
+        "t0": t0,
+        "t1": t1,
+        "x": coeffs[0].tolist(),
+        "y": coeffs[1].tolist(),
+        "z": coeffs[2].tolist(),
+        "max_error_km": round(error, 6),
+    }
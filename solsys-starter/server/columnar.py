@@ -0,0 +1,92 @@
+"""Compact binary columnar encoding of /api/ephem responses.
+
+Layout (all little-endian):
+
+    b"EPHC"            magic
+    uint32             format version (1)
+    uint32             header length in bytes
+    header             UTF-8 JSON, space-padded so the arrays start 8-byte aligned:
+                       {"n": samples, "dtype": "f32" | "f64", "time": "unix" | "jd",
+                        "bodies": [{"id": ..., "center": ...}, ...]}
+    float64[n]         shared time vector (Unix seconds or Julian date)
+    per body, in header order:
+        dtype[n * 3]   positions (km), row-major x, y, z
+        dtype[n * 3]   velocities (km/s)
+
+Samples a body has no data for are NaN, so every body lines up with the shared
+time vector and the client can view each block as a typed array without copying.
+
+Small-body positions (/api/sbdb/positions) use the same prefix with magic
+b"EPHP" and one block for all bodies:
+
+    header             {"epochs": m, "bodies": n, "dtype": ..., "time": ..., "ids": [...]}
+    float64[m]         epochs
+    dtype[m * n * 3]   positions (km), epoch-major, NaN for bodies without a bound orbit
+"""
+import json
+import struct
+from typing import Any, Dict, List
+
+import numpy as np
+
+import horizons
+import kepler
+
+MAGIC = b"EPHC"
+VERSION = 1
+MEDIA_TYPE = "application/x-solsys-ephem"
+POSITIONS_MAGIC = b"EPHP"
+POSITIONS_MEDIA_TYPE = "application/x-solsys-positions"
+DTYPES = {"f32": "<f4", "f64": "<f8"}
+TIME_FORMATS = ("unix", "jd")
+
+
+def wants_binary(fmt: str, accept: str, media_type: str = MEDIA_TYPE) -> bool:
+    """True when the query parameter or the Accept header asks for the binary format"""
+    if fmt:
+        return fmt.lower() == "binary"
+    return media_type in (accept or "")
+
+
+def _check(dtype: str, time: str) -> None:
+    if dtype not in DTYPES:
+        raise ValueError(f"Unknown dtype: {dtype} (expected one of {', '.join(DTYPES)})")
+    if time not in TIME_FORMATS:
+        raise ValueError(f"Unknown time format: {time} (expected one of {', '.join(TIME_FORMATS)})")
+
+
+def _prefix(magic: bytes, header: Dict[str, Any], t: np.ndarray, time: str) -> List[bytes]:
+    """Magic, version, padded JSON header and the float64 time vector"""
+    data = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    # 12 bytes of prefix + header must end on an 8-byte boundary for Float64Array views
+    data += b" " * (-(12 + len(data)) % 8)
+    times = np.asarray(t, dtype=float)
+    if time == "jd":
+        times = times / kepler.SECONDS_PER_DAY + horizons.JD_UNIX_EPOCH
+    return [magic, struct.pack("<II", VERSION, len(data)), data, times.astype("<f8").tobytes()]
+
+
+def encode(t: np.ndarray, bodies: List[Dict[str, Any]], dtype: str = "f32", time: str = "unix") -> bytes:
+    """Pack a shared time vector and per-body (n, 3) position/velocity arrays"""
+    _check(dtype, time)
+    n = len(t)
+    header = {
+        "n": n,
+        "dtype": dtype,
+        "time": time,
+        "bodies": [{"id": b["id"], "center": b["center"]} for b in bodies],
+    }
+    parts = _prefix(MAGIC, header, t, time)
+    for b in bodies:
+        parts.append(np.ascontiguousarray(b["r"], dtype=DTYPES[dtype]).reshape(n, 3).tobytes())
+        parts.append(np.ascontiguousarray(b["v"], dtype=DTYPES[dtype]).reshape(n, 3).tobytes())
+    return b"".join(parts)
+
+
+def encode_positions(t: np.ndarray, ids: List[str], r: np.ndarray, dtype: str = "f32", time: str = "unix") -> bytes:
+    """Pack epochs and an (epochs, bodies, 3) position array"""
+    _check(dtype, time)
+    header = {"epochs": len(t), "bodies": len(ids), "dtype": dtype, "time": time, "ids": ids}
+    parts = _prefix(POSITIONS_MAGIC, header, t, time)
+    parts.append(np.ascontiguousarray(r, dtype=DTYPES[dtype]).tobytes())
+    return b"".join(parts)
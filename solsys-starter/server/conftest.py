@@ -0,0 +1,32 @@
+import pytest
+
+
+class Clock:
+    """Settable stand-in for time.time or time.monotonic"""
+
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock() -> Clock:
+    return Clock()
+
+
+@pytest.fixture
+def api(monkeypatch):
+    """TestClient of the app with Horizons out of reach (Kepler fallback) and an empty response cache"""
+    from fastapi.testclient import TestClient
+
+    import main
+    from cache import TTLCache
+
+    async def no_horizons(*args, **kwargs):
+        return None
+
+    monkeypatch.setattr(main, "query_horizons", no_horizons)
+    monkeypatch.setattr(main, "_cache", TTLCache(main.CACHE_TTLS, default_ttl=main.CACHE_TTL, graces=main.CACHE_GRACES))
+    return TestClient(main.app)
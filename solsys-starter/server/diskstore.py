@@ -0,0 +1,144 @@
+"""Persistent on-disk store of raw upstream JSON responses.
+
+Each response is saved gzip-compressed under the SHA-256 of its normalized
+request (upstream, URL and parameters without the API key). The first line of
+a record is its metadata (request, time stored, TTL) and the second the body,
+so the index can be rebuilt without decoding bodies. The store survives
+restarts, so a fresh process can answer from disk instead of going back to JPL
+and api.nasa.gov, and stale records are served when an upstream is down.
+
+Modes (UPSTREAM_STORE_MODE):
+- cache  (default) serve fresh records, otherwise fetch and save; stale records
+         are the fallback when the upstream fails
+- record always fetch, save every response
+- replay never touch the network; answer only from recorded responses
+- off    disabled
+"""
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+STORE_DIR = os.getenv("UPSTREAM_STORE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "upstream_store"))
+STORE_MODE = os.getenv("UPSTREAM_STORE_MODE", "cache").lower()
+# Records older than this are deleted when the store is warmed
+STORE_MAX_AGE = float(os.getenv("UPSTREAM_STORE_MAX_AGE_DAYS", "30")) * 86400
+
+# Request parameters that must never become part of a key
+SECRET_PARAMS = {"api_key"}
+
+
+class DiskStore:
+    """Content-addressed, gzip-compressed response records with TTL metadata"""
+
+    def __init__(self, root: str, mode: str = "cache", max_age: float = STORE_MAX_AGE):
+        self.root = root
+        self.mode = mode if mode in ("cache", "record", "replay", "off") else "cache"
+        self.max_age = max_age
+        # digest -> (stored_at, ttl); filled by warm() and kept current by put()
+        self._index: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "stale_hits": 0, "misses": 0, "writes": 0, "errors": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "off"
+
+    def request_key(self, upstream: str, url: str, params: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+        """Digest and normalized description of a request"""
+        request = {
+            "upstream": upstream,
+            "url": url,
+            "params": {str(k): str(v) for k, v in sorted(params.items()) if k not in SECRET_PARAMS},
+        }
+        canonical = json.dumps(request, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest(), request
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.root, digest[:2], digest + ".json.gz")
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            self._stats[counter] += 1
+
+    def is_fresh(self, digest: str) -> bool:
+        meta = self._index.get(digest)
+        return meta is not None and time.time() - meta[0] < meta[1]
+
+    def has(self, digest: str) -> bool:
+        return digest in self._index
+
+    def get(self, digest: str) -> Optional[Dict[str, Any]]:
+        """The stored record ({"request", "stored_at", "ttl", "body"}) or None"""
+        if digest not in self._index and not os.path.exists(self._path(digest)):
+            self._count("misses")
+            return None
+        try:
+            with gzip.open(self._path(digest), "rt", encoding="utf-8") as f:
+                record = json.loads(f.readline())
+                record["body"] = json.loads(f.readline())
+        except (OSError, ValueError) as e:
+            print(f"Upstream store read failed for {digest}: {e}")
+            with self._lock:
+                self._index.pop(digest, None)
+            self._count("errors")
+            return None
+        with self._lock:
+            self._index[digest] = (record["stored_at"], record["ttl"])
+        fresh = time.time() - record["stored_at"] < record["ttl"]
+        self._count("hits" if fresh else "stale_hits")
+        return record
+
+    def put(self, digest: str, request: Dict[str, Any], body: Any, ttl: float) -> None:
+        meta = {"request": request, "stored_at": time.time(), "ttl": ttl}
+        path = self._path(digest)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with gzip.open(tmp, "wt", encoding="utf-8") as f:
+                f.write(json.dumps(meta, separators=(",", ":")) + "\n")
+                f.write(json.dumps(body, separators=(",", ":")) + "\n")
+            os.replace(tmp, path)
+        except (OSError, TypeError, ValueError) as e:
+            print(f"Upstream store write failed for {digest}: {e}")
+            self._count("errors")
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            return
+        with self._lock:
+            self._index[digest] = (meta["stored_at"], ttl)
+        self._count("writes")
+
+    def warm(self) -> int:
+        """Index every record on disk (dropping ones older than max_age); returns how many are usable"""
+        if not self.enabled or not os.path.isdir(self.root):
+            return 0
+        now = time.time()
+        index: Dict[str, Tuple[float, float]] = {}
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                if not name.endswith(".json.gz"):
+                    continue
+                path = os.path.join(dirpath, name)
+                try:
+                    with gzip.open(path, "rt", encoding="utf-8") as f:
+                        record = json.loads(f.readline())
+                except (OSError, ValueError):
+                    continue
+                if now - record["stored_at"] > self.max_age and self.mode != "replay":
+                    os.remove(path)
+                    continue
+                index[name[: -len(".json.gz")]] = (record["stored_at"], record["ttl"])
+        with self._lock:
+            self._index.update(index)
+        return len(index)
+
+    def stats(self) -> Dict[str, Any]:
+        fresh = sum(1 for digest in list(self._index) if self.is_fresh(digest))
+        return {"mode": self.mode, "records": len(self._index), "fresh_records": fresh, **self._stats}
+
+
+store = DiskStore(STORE_DIR, STORE_MODE)
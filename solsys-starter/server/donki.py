@@ -0,0 +1,114 @@
+"""Local store of DONKI space-weather events, synced incrementally.
+
+One store per feed (FLR, SEP, CME, GST) keeps every event seen so far keyed by
+its activity ID, plus a high-water mark: the last day the feed has been pulled
+through. A sync only asks DONKI for the days since the mark (re-reading a few
+days before it, since recent events are still being revised) and upserts the
+answer by ID. Stores are saved as JSON so a restart does not need a new pull.
+"""
+import json
+import os
+import threading
+import time
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+# Activity ID and event time field of each feed
+FEEDS: Dict[str, Tuple[str, str]] = {
+    "flr": ("flrID", "beginTime"),
+    "sep": ("sepID", "eventTime"),
+    "cme": ("activityID", "startTime"),
+    "gst": ("gstID", "startTime"),
+}
+# Days before the high-water mark that every sync pulls again
+OVERLAP_DAYS = 7
+
+
+class EventStore:
+    """Events of one DONKI feed by activity ID"""
+
+    def __init__(self, feed: str, first_date: str):
+        self.feed = feed
+        self.id_field, self.time_field = FEEDS[feed]
+        self.first_date = first_date
+        self.events: Dict[str, Dict[str, Any]] = {}
+        self.high_water = ""
+        self.updated_at = 0.0
+        self.syncs = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.events)
+
+    @property
+    def loaded(self) -> bool:
+        return bool(self.updated_at)
+
+    def window(self, today: date) -> Tuple[str, str]:
+        """(startDate, endDate) of the next pull"""
+        if not self.high_water:
+            return self.first_date, today.isoformat()
+        start = date.fromisoformat(self.high_water) - timedelta(days=OVERLAP_DAYS)
+        return max(start.isoformat(), self.first_date), today.isoformat()
+
+    def merge(self, events: List[Dict[str, Any]], through: str) -> int:
+        """Upsert pulled events by ID and move the mark to `through`; returns how many were new or changed"""
+        changed = 0
+        with self._lock:
+            for event in events:
+                key = event.get(self.id_field) if isinstance(event, dict) else None
+                if not key:
+                    continue
+                if self.events.get(key) != event:
+                    self.events[key] = event
+                    changed += 1
+            self.high_water = max(self.high_water, through)
+            self.updated_at = time.time()
+            self.syncs += 1
+        return changed
+
+    def query(self, start: Optional[str] = None, end: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Events whose time falls on or between the start and end days (YYYY-MM-DD), oldest first"""
+        with self._lock:
+            events = list(self.events.values())
+
+        def stamp(event: Dict[str, Any]) -> str:
+            return str(event.get(self.time_field) or "")
+
+        return sorted(
+            (e for e in events if (start is None or stamp(e)[:10] >= start) and (end is None or stamp(e)[:10] <= end)),
+            key=stamp,
+        )
+
+    def save(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._lock:
+            body = {"high_water": self.high_water, "updated_at": self.updated_at, "events": list(self.events.values())}
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(body, f, separators=(",", ":"))
+        os.replace(tmp, path)
+
+    def load(self, path: str) -> bool:
+        """Load a saved store; False if there is none"""
+        if not os.path.exists(path):
+            return False
+        try:
+            with open(path, encoding="utf-8") as f:
+                body = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Could not load DONKI {self.feed} events: {e}")
+            return False
+        with self._lock:
+            self.events = {e[self.id_field]: e for e in body["events"] if e.get(self.id_field)}
+            self.high_water = body["high_water"]
+            self.updated_at = body["updated_at"]
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "events": len(self.events),
+            "high_water": self.high_water or None,
+            "age_s": round(time.time() - self.updated_at, 1) if self.updated_at else None,
+            "syncs": self.syncs,
+        }
@@ -0,0 +1,86 @@
+"""Parsing of Horizons VECTORS responses into columnar arrays.
+
+Two shapes are handled:
+- the JSON API's "result" text with a CSV table between $$SOE and $$EOE, one
+  row per sample: JDTDB, calendar date, X, Y, Z, VX, VY, VZ[, LT, RG, RR],
+- a "data" list of rows in the same column order.
+
+The CSV block is converted in one numpy pass that skips the calendar column, and
+only falls back to row-by-row parsing when the block is ragged or contains
+malformed values, in which case bad rows are skipped.
+"""
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+import kepler
+
+JD_UNIX_EPOCH = 2440587.5  # Julian date of 1970-01-01T00:00:00
+
+# JDTDB and X, Y, Z, VX, VY, VZ in a CSV row (column 1 is the calendar date)
+CSV_COLUMNS = (0, 2, 3, 4, 5, 6, 7)
+
+
+def jd_to_unix(jd: np.ndarray) -> np.ndarray:
+    return (np.asarray(jd, dtype=float) - JD_UNIX_EPOCH) * kepler.SECONDS_PER_DAY
+
+
+def soe_block(text: str) -> Optional[str]:
+    """The text between $$SOE and $$EOE, or None if there is no table"""
+    start = text.find("$$SOE")
+    if start < 0:
+        return None
+    stop = text.find("$$EOE", start)
+    return text[start + 5:stop if stop >= 0 else len(text)].strip()
+
+
+def _columns(table: np.ndarray) -> Optional[Dict[str, np.ndarray]]:
+    """Columnar arrays from numeric rows [JD, X, Y, Z, VX, VY, VZ, ...]"""
+    if table.ndim != 2 or table.shape[1] < 7 or not len(table):
+        return None
+    return {"t": jd_to_unix(table[:, 0]), "r": table[:, 1:4].copy(), "v": table[:, 4:7].copy()}
+
+
+def _parse_rows(rows: List[List[Any]]) -> Optional[Dict[str, np.ndarray]]:
+    """Slow path: convert [JD, X, Y, Z, VX, VY, VZ] rows one by one, skipping rows that do not parse"""
+    table = []
+    for row in rows:
+        try:
+            values = [float(value) for value in row]
+        except (TypeError, ValueError):
+            continue
+        if len(values) == 7:
+            table.append(values)
+    return _columns(np.array(table, dtype=float)) if table else None
+
+
+def parse_csv_block(block: str) -> Optional[Dict[str, np.ndarray]]:
+    """Arrays from a CSV vectors block (JDTDB, calendar, X..VZ[, LT, RG, RR])"""
+    lines = [line for line in block.splitlines() if line.strip()]
+    if not lines:
+        return None
+    try:
+        return _columns(np.loadtxt(lines, delimiter=",", usecols=CSV_COLUMNS, dtype=float, ndmin=2))
+    except ValueError:
+        split = (line.split(",") for line in lines)
+        return _parse_rows([[parts[0], *parts[2:8]] for parts in split])
+
+
+def parse_data_rows(data: List[Any]) -> Optional[Dict[str, np.ndarray]]:
+    """Arrays from a JSON "data" list of rows in table order (JD, calendar, X..VZ, ...)"""
+    try:
+        table = np.array([[row[0], *row[2:8]] for row in data], dtype=float)
+    except (IndexError, TypeError, ValueError):
+        return _parse_rows([[row[0], *row[2:8]] for row in data if isinstance(row, (list, tuple)) and row])
+    return _columns(table)
+
+
+def parse_vectors(payload: Any) -> Optional[Dict[str, np.ndarray]]:
+    """{"t" (Unix seconds), "r" (n, 3) km, "v" (n, 3) km/s} from a Horizons response, or None"""
+    if isinstance(payload, dict) and isinstance(payload.get("data"), list):
+        arrays = parse_data_rows(payload["data"])
+        if arrays is not None:
+            return arrays
+    text = payload.get("result", "") if isinstance(payload, dict) else payload if isinstance(payload, str) else ""
+    block = soe_block(text)
+    return parse_csv_block(block) if block else None
@@ -0,0 +1,231 @@
+"""Vectorized Kepler propagation used as the ephemeris fallback.
+
+The orbit model is the same simplified one the server has always used: each
+orbit lies in a plane tilted about the x-axis by its inclination, and the mean
+anomaly is measured from 2000-01-01. The difference is that a whole time grid
+and a whole set of bodies are solved together as array operations.
+"""
+import math
+import re
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+EPOCH = datetime(2000, 1, 1)
+EPOCH_UNIX = (EPOCH - datetime(1970, 1, 1)).total_seconds()
+SECONDS_PER_DAY = 86400.0
+MJD_UNIX_EPOCH = 40587.0  # Modified Julian date of 1970-01-01
+AU_KM = 149597870.7
+GM_SUN = 1.32712440018e11  # km^3/s^2
+
+# STEP_SIZE units in hours; months and years are their mean lengths
+STEP_UNITS = {"m": 1 / 60, "min": 1 / 60, "h": 1.0, "d": 24.0, "mo": 365.25 * 24 / 12, "y": 365.25 * 24}
+STEP_PATTERN = re.compile(r"^\s*(\d+(?:\.\d*)?|\.\d+)\s*(mo|min|m|h|d|y)\s*$", re.IGNORECASE)
+
+# Newton-Raphson stops once every |dE| is below this (radians)
+KEPLER_TOL = 1e-12
+KEPLER_MAX_ITER = 50
+
+
+def parse_step_hours(step: str) -> float:
+    """Parse a Horizons STEP_SIZE such as '6 h', '1 d', '15 m' or '1 mo' into hours"""
+    match = STEP_PATTERN.match(step)
+    if not match:
+        raise ValueError("expected a number followed by m, h, d, mo or y, e.g. '6 h'")
+    hours = float(match.group(1)) * STEP_UNITS[match.group(2).lower()]
+    if not 0 < hours < math.inf:
+        raise ValueError("must be positive and finite")
+    return hours
+
+
+def horizons_step(step: str) -> str:
+    """STEP_SIZE for Horizons, which steps months and years by the calendar: those go as fixed minutes"""
+    hours = parse_step_hours(step)
+    if STEP_PATTERN.match(step).group(2).lower() in ("mo", "y"):
+        return f"{round(hours * 60)} m"
+    return step.strip()
+
+
+def to_unix(value: str) -> float:
+    """Convert an ISO date/time string to Unix seconds (naive times are UTC)"""
+    dt = datetime.fromisoformat(value)
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return (dt - datetime(1970, 1, 1)).total_seconds()
+
+
+def to_iso(t: np.ndarray) -> List[str]:
+    """Format Unix seconds the way datetime.isoformat() does for whole seconds"""
+    stamps = np.round(np.asarray(t) * 1e6).astype("int64").astype("datetime64[us]")
+    return np.datetime_as_string(stamps, unit="s").tolist()
+
+
+def solve_kepler(M: np.ndarray, e: np.ndarray, tol: float = KEPLER_TOL, max_iter: int = KEPLER_MAX_ITER) -> np.ndarray:
+    """Solve M = E - e*sin(E) for E element-wise with Newton-Raphson"""
+    M = np.asarray(M, dtype=float)
+    e = np.broadcast_to(np.asarray(e, dtype=float), M.shape)
+    # Wrapping to [-pi, pi) plus Danby's starting guess converges for any e < 1
+    M = np.remainder(M + math.pi, 2 * math.pi) - math.pi
+    E = M + 0.85 * e * np.sign(np.sin(M))
+    if E.size == 0:
+        return E
+
+    for _ in range(max_iter):
+        dE = (E - e * np.sin(E) - M) / (1 - e * np.cos(E))
+        E = E - dE
+        if np.max(np.abs(dE)) < tol:
+            break
+    return E
+
+
+def orbital_states(
+    a: Sequence[float],
+    e: Sequence[float],
+    inclination_deg: Sequence[float],
+    period_days: Sequence[float],
+    t: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Positions (km) and velocities (km/s) for B bodies at N times, shaped (B, N, 3)
+
+    Bodies with a zero period (the Sun) stay at the origin.
+    """
+    a = np.asarray(a, dtype=float)[:, None]
+    e = np.asarray(e, dtype=float)[:, None]
+    inc = np.radians(np.asarray(inclination_deg, dtype=float))[:, None]
+    period = np.asarray(period_days, dtype=float)[:, None]
+    days = (np.asarray(t, dtype=float) - EPOCH_UNIX) / SECONDS_PER_DAY
+
+    moving = period != 0
+    period = np.where(moving, period, 1.0)
+    mean_motion = 2 * math.pi / period  # rad/day, negative for retrograde
+
+    E = solve_kepler(mean_motion * days[None, :], e)
+    cos_E = np.cos(E)
+    sin_E = np.sin(E)
+    b = a * np.sqrt(1 - e * e)
+
+    # Position and velocity in the orbital plane
+    x = a * (cos_E - e)
+    y = b * sin_E
+    E_dot = mean_motion / SECONDS_PER_DAY / (1 - e * cos_E)
+    vx = -a * sin_E * E_dot
+    vy = b * cos_E * E_dot
+
+    # Tilt the plane by the inclination
+    cos_i = np.cos(inc)
+    sin_i = np.sin(inc)
+    r = np.stack([x, y * cos_i, y * sin_i], axis=-1)
+    v = np.stack([vx, vy * cos_i, vy * sin_i], axis=-1)
+
+    still = ~moving[:, 0]
+    r[still] = 0.0
+    v[still] = 0.0
+    r[~np.isfinite(r)] = 0.0
+    v[~np.isfinite(v)] = 0.0
+    return r, v
+
+
+def element_positions(
+    a_au: np.ndarray,
+    e: np.ndarray,
+    inclination_deg: np.ndarray,
+    long_asc_node_deg: np.ndarray,
+    arg_perihelion_deg: np.ndarray,
+    mean_anomaly_deg: np.ndarray,
+    epoch_mjd: np.ndarray,
+    t: np.ndarray,
+) -> np.ndarray:
+    """Heliocentric ecliptic positions (km) of B bodies from osculating elements at N times, shaped (N, B, 3)
+
+    t is either (N,) times shared by every body or an (N, B) array of per-body times.
+
+    Unlike orbital_states this uses the full orientation (node and argument of
+    perihelion) and each body's own element epoch, with the two-body mean
+    motion from a. Bodies without a bound orbit (e >= 1, a <= 0) or with missing
+    elements come out as NaN.
+    """
+    a = np.asarray(a_au, dtype=float) * AU_KM
+    e = np.asarray(e, dtype=float)
+    inc = np.radians(np.asarray(inclination_deg, dtype=float))
+    node = np.radians(np.asarray(long_asc_node_deg, dtype=float))
+    peri = np.radians(np.asarray(arg_perihelion_deg, dtype=float))
+    M0 = np.radians(np.asarray(mean_anomaly_deg, dtype=float))
+    epoch = (np.asarray(epoch_mjd, dtype=float) - MJD_UNIX_EPOCH) * SECONDS_PER_DAY
+
+    bound = (a > 0) & (e >= 0) & (e < 1)
+    a = np.where(bound, a, np.nan)
+    e = np.where(bound, e, 0.0)
+    mean_motion = np.sqrt(GM_SUN / a ** 3)  # rad/s
+
+    # Perifocal unit vectors P (towards perihelion) and Q in the ecliptic frame
+    cos_O, sin_O = np.cos(node), np.sin(node)
+    cos_w, sin_w = np.cos(peri), np.sin(peri)
+    cos_i, sin_i = np.cos(inc), np.sin(inc)
+    P = np.stack([cos_w * cos_O - sin_w * sin_O * cos_i, cos_w * sin_O + sin_w * cos_O * cos_i, sin_w * sin_i], axis=-1)
+    Q = np.stack([-sin_w * cos_O - cos_w * sin_O * cos_i, -sin_w * sin_O + cos_w * cos_O * cos_i, cos_w * sin_i], axis=-1)
+
+    t = np.asarray(t, dtype=float)
+    M = M0[None, :] + mean_motion[None, :] * ((t[:, None] if t.ndim == 1 else t) - epoch[None, :])
+    finite = np.isfinite(M)
+    E = solve_kepler(np.where(finite, M, 0.0), e[None, :])
+    x = a * (np.cos(E) - e)
+    y = a * np.sqrt(1 - e * e) * np.sin(E)
+    r = x[..., None] * P[None, :, :] + y[..., None] * Q[None, :, :]
+    r[~finite] = np.nan
+    return r
+
+
+def states_to_list(t: np.ndarray, r: np.ndarray, v: np.ndarray) -> List[Dict[str, Any]]:
+    """Convert one body's (N,) times and (N, 3) arrays into the /api/ephem state dicts"""
+    return [
+        {"t": ts, "r": rr, "v": vv}
+        for ts, rr, vv in zip(to_iso(t), r.tolist(), v.tolist())
+    ]
+
+
+def propagate_system(
+    objects: Dict[str, Dict[str, Any]],
+    body_ids: Sequence[str],
+    t: np.ndarray,
+) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+    """Evaluate each body once on a shared time grid, keyed by id
+
+    Bodies with a "parent" are offset by the parent's arrays at the same grid
+    index; parents are pulled in even when not requested. Unknown ids, and
+    moons whose parent is unknown, are left out of the result.
+    """
+    order: List[str] = []
+
+    def want(body_id: str) -> None:
+        if body_id in order or body_id not in objects:
+            return
+        parent_id = objects[body_id].get("parent")
+        if parent_id:
+            want(parent_id)
+        order.append(body_id)
+
+    for body_id in body_ids:
+        want(body_id)
+    if not order:
+        return {}
+
+    elems = [objects[body_id] for body_id in order]
+    r, v = orbital_states(
+        [o["a"] for o in elems],
+        [o["e"] for o in elems],
+        [o["i"] for o in elems],
+        [o["period"] for o in elems],
+        t,
+    )
+
+    # Parents always precede their moons in `order`
+    out: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+    for k, body_id in enumerate(order):
+        parent_id = objects[body_id].get("parent")
+        if not parent_id:
+            out[body_id] = (r[k], v[k])
+        elif parent_id in out:
+            parent_r, parent_v = out[parent_id]
+            out[body_id] = (r[k] + parent_r, v[k] + parent_v)
+    return out
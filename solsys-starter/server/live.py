@@ -0,0 +1,171 @@
+"""Live simulation streams shared by every subscriber with the same parameters.
+
+A stream advances simulation time at a fixed rate (simulated seconds per wall
+second) and computes the states of its bodies once per tick. Every message is
+encoded once and the same text is queued for each subscriber, so server work
+grows with the number of distinct (rate, center, bodies, start) streams, not
+with the number of connected clients.
+
+Messages (JSON):
+- "key": full states {"type": "key", "seq", "t", "ids", "r": [[x, y, z]], "v": [[vx, vy, vz]]}
+  in km and km/s; sent on subscribe, every KEYFRAME_TICKS ticks and to
+  subscribers that fell behind,
+- "delta": {"type": "delta", "seq", "t", "d": {index: [dx, dy, dz]}} with the
+  whole-km change of each rounded position since the previous tick, for
+  bodies that moved at least a kilometre. Applying a delta to the rounded
+  positions of the previous message reproduces the rounded positions exactly.
+"""
+import asyncio
+import json
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+
+import kepler
+
+# States of the bodies at a simulation time: (ids, positions (B, 3) km, velocities (B, 3) km/s)
+Compute = Callable[[float], Awaitable[Tuple[List[str], np.ndarray, np.ndarray]]]
+
+KEYFRAME_TICKS = 20
+# Messages waiting per subscriber; a subscriber that falls further behind gets the next keyframe
+QUEUE_SIZE = 8
+
+
+class Subscription:
+    """One client's queue of encoded messages"""
+
+    def __init__(self) -> None:
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        self.needs_key = True
+
+    def offer(self, delta: str, key: Callable[[], str]) -> None:
+        if not self.needs_key:
+            try:
+                self.queue.put_nowait(delta)
+                return
+            except asyncio.QueueFull:
+                self.needs_key = True
+        # Behind (or new): drop what is queued and restart from full states
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(key())
+        self.needs_key = False
+
+
+class Stream:
+    """Simulation clock, per-tick computation and fan-out for one parameter set"""
+
+    def __init__(self, compute: Compute, rate: float, start: float, tick: float):
+        self.compute = compute
+        self.rate = rate
+        self.start = start
+        self.tick = tick
+        self.subscribers: List[Subscription] = []
+        self.ticks = 0
+        self.errors = 0
+        self._wall0 = time.monotonic()
+        self._task: Optional[asyncio.Task] = None
+
+    def sim_time(self) -> float:
+        return self.start + self.rate * (time.monotonic() - self._wall0)
+
+    def run(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _loop(self) -> None:
+        previous: Optional[np.ndarray] = None
+        seq = 0
+        while True:
+            started = time.monotonic()
+            t = self.sim_time()
+            try:
+                ids, r, v = await self.compute(t)
+            except Exception as e:
+                self.errors += 1
+                print(f"Live stream tick failed: {e}")
+                await asyncio.sleep(self.tick)
+                continue
+            rounded = np.round(r)
+            stamp = kepler.to_iso(np.array([t]))[0]
+            key_text: Optional[str] = None
+
+            def key() -> str:
+                nonlocal key_text
+                if key_text is None:
+                    key_text = encode_key(seq, stamp, ids, rounded, v)
+                return key_text
+
+            same_bodies = previous is not None and previous.shape == rounded.shape and np.array_equal(np.isnan(previous), np.isnan(rounded))
+            if not same_bodies or seq % KEYFRAME_TICKS == 0:
+                delta = key()
+            else:
+                delta = encode_delta(seq, stamp, rounded - previous)
+            for sub in self.subscribers:
+                sub.offer(delta, key)
+            previous = rounded
+            seq += 1
+            self.ticks += 1
+            await asyncio.sleep(max(0.0, self.tick - (time.monotonic() - started)))
+
+
+def _finite(rows: np.ndarray, decimals: int) -> List[Optional[List[float]]]:
+    return [None if row[0] != row[0] else row for row in np.round(rows, decimals).tolist()]
+
+
+def encode_key(seq: int, t: str, ids: List[str], r: np.ndarray, v: np.ndarray) -> str:
+    return json.dumps({"type": "key", "seq": seq, "t": t, "ids": ids, "r": _finite(r, 0), "v": _finite(v, 6)}, separators=(",", ":"))
+
+
+def encode_delta(seq: int, t: str, change: np.ndarray) -> str:
+    moved = np.flatnonzero(np.isfinite(change).all(axis=1) & (np.abs(change) >= 1).any(axis=1))
+    d = {str(i): [int(x) for x in change[i]] for i in moved}
+    return json.dumps({"type": "delta", "seq": seq, "t": t, "d": d}, separators=(",", ":"))
+
+
+class Hub:
+    """Streams keyed by their parameters, started with the first subscriber and stopped with the last"""
+
+    def __init__(self, tick: float):
+        self.tick = tick
+        self.streams: Dict[Hashable, Stream] = {}
+
+    def subscribe(self, key: Hashable, make: Callable[[], Tuple[Compute, float, float]]) -> Tuple[Stream, Subscription]:
+        """Join the stream for key, creating it from make() -> (compute, rate, start) if needed"""
+        stream = self.streams.get(key)
+        if stream is None:
+            compute, rate, start = make()
+            stream = self.streams[key] = Stream(compute, rate, start, self.tick)
+        sub = Subscription()
+        stream.subscribers.append(sub)
+        stream.run()
+        return stream, sub
+
+    def unsubscribe(self, key: Hashable, sub: Subscription) -> None:
+        stream = self.streams.get(key)
+        if stream is None:
+            return
+        if sub in stream.subscribers:
+            stream.subscribers.remove(sub)
+        if not stream.subscribers:
+            stream.stop()
+            del self.streams[key]
+
+    def close(self) -> None:
+        for stream in self.streams.values():
+            stream.stop()
+        self.streams.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "streams": len(self.streams),
+            "subscribers": sum(len(s.subscribers) for s in self.streams.values()),
+            "ticks": sum(s.ticks for s in self.streams.values()),
+            "errors": sum(s.errors for s in self.streams.values()),
+        }
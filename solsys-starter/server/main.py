@@ -1,15 +1,38 @@
-from fastapi import FastAPI, Query, HTTPException
+from fastapi import FastAPI, Depends, Query, HTTPException, Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-import httpx, re, time, math
-from typing import List, Dict, Any
-from datetime import datetime, timedelta
+import asyncio, json, time, math
+import numpy as np
+from typing import List, Dict, Any, Optional, Callable, Awaitable, AsyncIterator, Set, Tuple
+from datetime import date, datetime, timedelta
 import os
 from dotenv import load_dotenv
+from contextlib import asynccontextmanager
 
 # Load environment variables for API keys
 load_dotenv()
 
-app = FastAPI(title="Solar System Viewer API", version="0.2.0")
+import catalog, chebyshev, columnar, diskstore, donki, horizons, kepler, live, scheduler, screening, segments, spatial, static, upstream
+from cache import TTLCache, run_refresher
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Upstream connection pools and the cache refresher live as long as the app
+    await upstream.open_clients()
+    refresher = asyncio.create_task(run_refresher(_cache, CACHE_REFRESH_INTERVAL, CACHE_REFRESH_AHEAD, CACHE_HOT_WINDOW))
+    catalog_sync = asyncio.create_task(run_catalog_sync(SBDB_CATALOG_REFRESH)) if SBDB_CATALOG_ENABLED else None
+    exoplanet_sync = asyncio.create_task(run_exoplanet_sync(EXOPLANET_REFRESH)) if EXOPLANET_MIRROR_ENABLED else None
+    try:
+        yield
+    finally:
+        refresher.cancel()
+        for task in (catalog_sync, exoplanet_sync):
+            if task is not None:
+                task.cancel()
+        _live.close()
+        await upstream.close_clients()
+
+app = FastAPI(title="Solar System Viewer API", version="0.2.0", lifespan=lifespan)
 
 # Allow local dev clients
 app.add_middleware(
@@ -34,21 +57,140 @@ ASTEROID_WATCH_API = "https://api.nasa.gov/neo/rest/v1"
 NASA_API_KEY = os.getenv("NASA_API_KEY", "DEMO_KEY")  # Get from https://api.nasa.gov/
 EXOPLANET_API_KEY = os.getenv("EXOPLANET_API_KEY", "")
 
+# Max simultaneous Horizons requests per /api/ephem call
+HORIZONS_CONCURRENCY = int(os.getenv("HORIZONS_CONCURRENCY", "8"))
+
 CACHE_TTL = 6 * 3600  # 6 hours
-_cache: Dict[str, Dict[str, Any]] = {}
+# Per-namespace TTLs; anything not listed uses CACHE_TTL
+CACHE_TTLS = {
+    "ephem": 10 * 60,  # assembled responses; the data itself lives in ephem_segment
+    "ephem_segment": 24 * 3600,
+    "ephem_cheb": 24 * 3600,
+    "sbdb": 24 * 3600,
+    "apod": 6 * 3600,
+    "exoplanets": 24 * 3600,
+    "mars_rover": 24 * 3600,
+    "neows_day": 3600,  # today and later; past days are kept for NEOWS_PAST_DAY_TTL
+    "spatial": 3600,
+}
+# How long past its TTL an entry may still be served while it refreshes
+CACHE_GRACES = {
+    "ephem": 3600,
+    "ephem_segment": 0,
+    "ephem_cheb": 0,
+    "sbdb": 7 * 24 * 3600,
+    "apod": 24 * 3600,
+    "exoplanets": 7 * 24 * 3600,
+    "mars_rover": 7 * 24 * 3600,
+    "neows_day": 24 * 3600,
+    "spatial": 0,
+}
+_cache = TTLCache(
+    CACHE_TTLS,
+    default_ttl=CACHE_TTL,
+    max_entries=int(os.getenv("CACHE_MAX_ENTRIES", "2048")),
+    max_bytes=int(os.getenv("CACHE_MAX_MB", "256")) * 1024 * 1024,
+    graces=CACHE_GRACES,
+    default_grace=CACHE_TTL,
+)
+# NeoWs /feed: days per call (end_date at most 7 days after start_date), longest range per request,
+# and how long a past day is kept
+NEOWS_SHARD_DAYS = 8
+NEOWS_MAX_DAYS = int(os.getenv("NEOWS_MAX_DAYS", "93"))
+NEOWS_PAST_DAY_TTL = 30 * 24 * 3600
+NEOWS_CONCURRENCY = 4
+# Kepler fallback segments expire quickly so Horizons is retried
+FALLBACK_SEGMENT_TTL = 15 * 60
+# Seconds a request waits for Horizons before missing chunks fall back to Kepler;
+# the outstanding calls keep running and backfill the chunk cache
+EPHEM_DEADLINE = float(os.getenv("EPHEM_DEADLINE_SECONDS", "8"))
+_backfills: Set[asyncio.Task] = set()
+# Assembled responses with fallback bodies are rebuilt soon, picking up backfilled chunks
+FALLBACK_RESPONSE_TTL = 30
+# Samples per body one JSON or binary /api/ephem response may hold; longer series are streamed
+EPHEM_MAX_SAMPLES = int(os.getenv("EPHEM_MAX_SAMPLES", "20000"))
+# Streamed ephemerides: samples per request, and chunks computed (and held) at a time
+STREAM_MAX_SAMPLES = int(os.getenv("STREAM_MAX_SAMPLES", "2000000"))
+STREAM_WINDOW_CHUNKS = 4
+# Most instants one /api/ephem/at request may ask for
+AT_MAX_TIMES = 1000
+# Live streams: wall seconds between ticks, and the fastest simulation rate (simulated seconds per second)
+LIVE_TICK_SECONDS = float(os.getenv("LIVE_TICK_SECONDS", "0.5"))
+LIVE_MAX_RATE = 1e8
+_live = live.Hub(LIVE_TICK_SECONDS)
+# Default Hermite sample spacing: the power-of-two minutes keeping the error bound
+# within HERMITE_TOLERANCE_KM for the body and its parents, from 2 minutes to 1024
+HERMITE_TOLERANCE_KM = 0.005
+HERMITE_MIN_STEP_MINUTES = 2
+HERMITE_MAX_STEP_MINUTES = 1024
+# Most Chebyshev segments one body may span in a request
+CHEB_MAX_SEGMENTS = int(os.getenv("CHEB_MAX_SEGMENTS", "8192"))
+# Fits are cached per body in aligned blocks of segments, so a request takes at
+# most CHEB_MAX_SEGMENTS / CHEB_BLOCK_SEGMENTS entries per body, and at most
+# CHEB_MAX_BLOCKS in all (an eighth of the cache's entry budget)
+CHEB_BLOCK_SEGMENTS = 256
+CHEB_MAX_BLOCKS = max(1, _cache.max_entries // 8)
+# Background refresher: every interval, reload entries used within the hot
+# window once less than REFRESH_AHEAD of their TTL remains
+CACHE_REFRESH_INTERVAL = float(os.getenv("CACHE_REFRESH_INTERVAL", "30"))
+CACHE_REFRESH_AHEAD = 0.1
+CACHE_HOT_WINDOW = 30 * 60
 
-def _k(key: Any) -> str:
-    return str(key)
+# Local SBDB catalogs behind /api/sbdb/{neo,comets,asteroids}: pulled in bulk,
+# saved to disk and refreshed incrementally by orbit solution date
+SBDB_QUERIES = {"neo": "neo=Y", "comets": "comet=Y", "asteroids": "asteroid=Y"}
+SBDB_FIELDS = {
+    "neo": "full_name,des,orbit_class,albedo,diameter,H,moid_au,pha,period_yr,semimajor_au,eccentricity,inclination,arg_perihelion,long_asc_node,mean_anomaly,epoch_mjd",
+    "comets": "full_name,des,orbit_class,albedo,diameter,H,period_yr,semimajor_au,eccentricity,inclination,arg_perihelion,long_asc_node,mean_anomaly,epoch_mjd",
+    "asteroids": "full_name,des,orbit_class,albedo,diameter,H,period_yr,semimajor_au,eccentricity,inclination,arg_perihelion,long_asc_node,mean_anomaly,epoch_mjd",
+}
+# Rows per bulk pull (0 = everything); the full asteroid list is over a million rows
+SBDB_CATALOG_LIMITS = {"neo": 0, "comets": 0, "asteroids": int(os.getenv("SBDB_CATALOG_ASTEROIDS", "200000"))}
+# Bounds of the list endpoints' limit and offset
+SBDB_MAX_LIMIT = int(os.getenv("SBDB_MAX_LIMIT", "20000"))
+MAX_OFFSET = 10_000_000
+SBDB_CATALOG_ENABLED = os.getenv("SBDB_CATALOG", "1") == "1"
+SBDB_CATALOG_DIR = os.getenv("SBDB_CATALOG_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "catalog_store"))
+SBDB_CATALOG_REFRESH = float(os.getenv("SBDB_CATALOG_REFRESH_HOURS", "24")) * 3600
+# Retry-After (seconds) of requests that need a catalog that is still loading
+CATALOG_RETRY_AFTER_S = 30
+_catalogs = {kind: catalog.Catalog(kind, fields.split(",")) for kind, fields in SBDB_FIELDS.items()}
+# DONKI space-weather events, stored per feed (next to the catalogs) and pulled from the high-water mark on
+DONKI_START_DATE = os.getenv("DONKI_START_DATE", "2024-01-01")
+DONKI_REFRESH = float(os.getenv("DONKI_REFRESH_MINUTES", "30")) * 60
+_donki = {feed: donki.EventStore(feed, DONKI_START_DATE) for feed in donki.FEEDS}
+_donki_errors: Dict[str, str] = {}
+_donki_sync: Optional[asyncio.Task] = None
+# Exoplanet Archive mirror: the default parameter set (default_flag = 1) of every planet in ps
+EXOPLANET_FIELDS = [
+    "pl_name", "hostname", "discoverymethod", "disc_year", "pl_orbper", "pl_rade", "pl_masse", "pl_dens",
+    "pl_eqt", "pl_orbincl", "pl_orbeccen", "pl_orbsmax", "st_teff", "st_rad", "st_mass", "st_dist", "st_met", "st_age",
+]
+EXOPLANET_MIRROR_ENABLED = os.getenv("EXOPLANET_MIRROR", "1") == "1"
+EXOPLANET_REFRESH = float(os.getenv("EXOPLANET_REFRESH_HOURS", "24")) * 3600
+_exoplanets = catalog.Catalog("exoplanets", EXOPLANET_FIELDS, key="pl_name")
+# /api/sbdb/positions: element columns in kepler.element_positions order, and request bounds
+ELEMENT_FIELDS = ("semimajor_au", "eccentricity", "inclination", "long_asc_node", "arg_perihelion", "mean_anomaly", "epoch_mjd")
+PROPAGATE_MAX_EPOCHS = 100
+PROPAGATE_MAX_POSITIONS = int(os.getenv("PROPAGATE_MAX_POSITIONS", "5000000"))
+# Spatial queries: one k-d tree per (kind, epoch rounded to the minute) over up to
+# SPATIAL_MAX_BODIES catalog rows, and the most objects one response lists
+SPATIAL_MAX_BODIES = int(os.getenv("SPATIAL_MAX_BODIES", "200000"))
+SPATIAL_EPOCH_ROUNDING = 60
+SPATIAL_MAX_RESULTS = 10000
+# Close-approach screening: most NEOs and coarse samples per request
+SCREEN_MAX_BODIES = int(os.getenv("SCREEN_MAX_BODIES", "50000"))
+SCREEN_MAX_SAMPLES = 5000
 
-def _get_cached(key: Any):
-    skey = _k(key)
-    v = _cache.get(skey)
-    if v and time.time() - v["t"] < CACHE_TTL:
-        return v["data"]
-    return None
+async def gather_bounded(factories: List[Callable[[], Awaitable[Any]]], limit: int) -> List[Any]:
+    """Run coroutine factories concurrently, at most `limit` at a time, results in input order"""
+    semaphore = asyncio.Semaphore(max(1, limit))
+
+    async def run(factory):
+        async with semaphore:
+            return await factory()
 
-def _set_cached(key: Any, data: Any):
-    _cache[_k(key)] = {"t": time.time(), "data": data}
+    return await asyncio.gather(*(run(f) for f in factories))
 
 # Comprehensive celestial object database with accurate orbital and physical parameters
 CELESTIAL_OBJECTS = {
@@ -67,7 +209,7 @@ CELESTIAL_OBJECTS = {
         "atmosphere": False,
         "rings": False
     },
-    
+
     # Mercury
     "199": {
         "name": "Mercury",
@@ -84,7 +226,7 @@ CELESTIAL_OBJECTS = {
         "rings": False,
         "moons": []
     },
-    
+
     # Venus
     "299": {
         "name": "Venus",
@@ -101,7 +243,7 @@ CELESTIAL_OBJECTS = {
         "rings": False,
         "moons": []
     },
-    
+
     # Earth
     "399": {
         "name": "Earth",
@@ -118,7 +260,7 @@ CELESTIAL_OBJECTS = {
         "rings": False,
         "moons": ["301"]  # Moon
     },
-    
+
     # Moon
     "301": {
         "name": "Moon",
@@ -135,7 +277,7 @@ CELESTIAL_OBJECTS = {
         "atmosphere": False,
         "rings": False
     },
-    
+
     # Mars
     "499": {
         "name": "Mars",
@@ -152,7 +294,7 @@ CELESTIAL_OBJECTS = {
         "rings": False,
         "moons": ["401", "402"]  # Phobos, Deimos
     },
-    
+
     # Phobos
     "401": {
         "name": "Phobos",
@@ -169,7 +311,7 @@ CELESTIAL_OBJECTS = {
         "atmosphere": False,
         "rings": False
     },
-    
+
     # Deimos
     "402": {
         "name": "Deimos",
@@ -186,7 +328,7 @@ CELESTIAL_OBJECTS = {
         "atmosphere": False,
         "rings": False
     },
-    
+
     # Jupiter
     "599": {
         "name": "Jupiter",
@@ -203,7 +345,7 @@ CELESTIAL_OBJECTS = {
         "rings": False,
         "moons": ["501", "502", "503", "504"]  # Galilean moons
     },
-    
+
     # Io
     "501": {
         "name": "Io",
@@ -220,7 +362,7 @@ CELESTIAL_OBJECTS = {
         "atmosphere": False,
         "rings": False
     },
-    
+
     # Europa
     "502": {
         "name": "Europa",
@@ -237,7 +379,7 @@ CELESTIAL_OBJECTS = {
         "atmosphere": False,
         "rings": False
     },
-    
+
     # Ganymede
     "503": {
         "name": "Ganymede",
@@ -254,7 +396,7 @@ CELESTIAL_OBJECTS = {
         "atmosphere": False,
         "rings": False
     },
-    
+
     # Callisto
     "504": {
         "name": "Callisto",
@@ -271,7 +413,7 @@ CELESTIAL_OBJECTS = {
         "atmosphere": False,
         "rings": False
     },
-    
+
     # Saturn
     "699": {
         "name": "Saturn",
@@ -288,7 +430,7 @@ CELESTIAL_OBJECTS = {
         "rings": True,
         "moons": ["601", "602", "603", "604", "605", "606", "607", "608"]  # Major moons
     },
-    
+
     # Titan
     "601": {
         "name": "Titan",
@@ -305,7 +447,7 @@ CELESTIAL_OBJECTS = {
         "atmosphere": True,
         "rings": False
     },
-    
+
     # Enceladus
     "602": {
         "name": "Enceladus",
@@ -322,7 +464,7 @@ CELESTIAL_OBJECTS = {
         "atmosphere": False,
         "rings": False
     },
-    
+
     # Uranus
     "799": {
         "name": "Uranus",
@@ -339,7 +481,7 @@ CELESTIAL_OBJECTS = {
         "rings": True,
         "moons": ["701", "702", "703", "704", "705"]  # Major moons
     },
-    
+
     # Neptune
     "899": {
         "name": "Neptune",
@@ -356,7 +498,7 @@ CELESTIAL_OBJECTS = {
         "rings": True,
         "moons": ["801"]  # Triton
     },
-    
+
     # Triton
     "801": {
         "name": "Triton",
@@ -373,7 +515,7 @@ CELESTIAL_OBJECTS = {
         "atmosphere": False,
         "rings": False
     },
-    
+
     # Pluto (Dwarf Planet)
     "999": {
         "name": "Pluto",
@@ -390,7 +532,7 @@ CELESTIAL_OBJECTS = {
         "rings": False,
         "moons": ["901"]  # Charon
     },
-    
+
     # Charon
     "901": {
         "name": "Charon",
@@ -438,196 +580,9 @@ NASA_TEXTURES = {
     '901': 'https://images-assets.nasa.gov/image/PIA00342/PIA00342~orig.jpg'   # Charon
 }
 
-def generate_orbital_positions(body_id: str, start: str, stop: str, step: str):
-    """Generate orbital positions using Kepler's laws as fallback"""
-    if body_id not in CELESTIAL_OBJECTS:
-        print(f"No orbital elements for {body_id}, returning empty positions")
-        return []
-    
-    obj = CELESTIAL_OBJECTS[body_id]
-    
-    # Handle moons - they orbit around their parent planet
-    if obj['type'] == 'moon':
-        parent_id = obj['parent']
-        if parent_id not in CELESTIAL_OBJECTS:
-            print(f"Parent {parent_id} not found for moon {body_id}")
-            return []
-        
-        # Generate parent planet positions first
-        parent_positions = generate_orbital_positions(parent_id, start, stop, step)
-        if not parent_positions:
-            return []
-        
-        # Generate moon positions relative to parent
-        return generate_moon_positions(obj, parent_positions, start, stop, step)
-    
-    # Handle planets and other objects
-    if obj['type'] not in ['planet', 'dwarf_planet', 'star']:
-        print(f"Unsupported object type: {obj['type']}")
-        return []
-    
-    elem = obj
-    
-    try:
-        # Parse time parameters
-        start_date = datetime.fromisoformat(start)
-        stop_date = datetime.fromisoformat(stop)
-        
-        # Parse step (assume hours for simplicity)
-        if "h" in step:
-            step_hours = float(step.replace("h", "").strip())
-        elif "d" in step:
-            step_hours = float(step.replace("d", "").strip()) * 24
-        else:
-            step_hours = 6  # default
-        
-        positions = []
-        current_time = start_date
-        
-        # Ensure we don't create too many positions (performance limit)
-        max_positions = 1000
-        position_count = 0
-        
-        while current_time <= stop_date and position_count < max_positions:
-            # Calculate mean anomaly (simplified)
-            days_since_epoch = (current_time - datetime(2000, 1, 1)).total_seconds() / 86400
-            mean_anomaly = (days_since_epoch / elem["period"]) * 2 * math.pi
-            
-            # Enhanced Kepler's equation solution with iterative refinement
-            eccentric_anomaly = mean_anomaly
-            for _ in range(5):  # 5 iterations for convergence
-                eccentric_anomaly = mean_anomaly + elem["e"] * math.sin(eccentric_anomaly)
-            
-            # True anomaly calculation
-            true_anomaly = 2 * math.atan2(
-                math.sqrt(1 + elem["e"]) * math.sin(eccentric_anomaly/2),
-                math.sqrt(1 - elem["e"]) * math.cos(eccentric_anomaly/2)
-            )
-            
-            # Distance from focus (semi-major axis * (1 - e*cos(E)))
-            r = elem["a"] * (1 - elem["e"] * math.cos(eccentric_anomaly))
-            
-            # Position in orbital plane
-            x = r * math.cos(true_anomaly)
-            y = r * math.sin(true_anomaly)
-            z = 0
-            
-            # Apply inclination
-            inclination_rad = math.radians(elem["i"])
-            y_inclined = y * math.cos(inclination_rad) - z * math.sin(inclination_rad)
-            z_inclined = y * math.sin(inclination_rad) + z * math.cos(inclination_rad)
-            
-            # Calculate velocity components for more accurate simulation
-            mu = 1.32712440018e11  # Sun's gravitational parameter (km³/s²)
-            v_r = math.sqrt(mu / elem["a"]) * elem["e"] * math.sin(true_anomaly)
-            v_t = math.sqrt(mu / elem["a"]) * (1 + elem["e"] * math.cos(true_anomaly))
-            
-            # Ensure we have valid numbers
-            if not (math.isfinite(x) and math.isfinite(y_inclined) and math.isfinite(z_inclined)):
-                print(f"Invalid position calculated for {body_id} at {current_time}")
-                x, y_inclined, z_inclined = 0, 0, 0
-            
-            positions.append({
-                "t": current_time.isoformat(),
-                "r": [float(x), float(y_inclined), float(z_inclined)],
-                "v": [float(v_r), float(v_t), 0.0]  # Enhanced velocity
-            })
-            
-            current_time += timedelta(hours=step_hours)
-            position_count += 1
-        
-        print(f"Generated {len(positions)} positions for {elem['name']}")
-        return positions
-        
-    except Exception as e:
-        print(f"Error generating positions for {body_id}: {e}")
-        # Return a simple circular orbit as absolute fallback
-        return [{
-            "t": start,
-            "r": [elem["a"], 0.0, 0.0],
-            "v": [0.0, 0.0, 0.0]
-        }]
-
-def generate_moon_positions(moon_obj: dict, parent_positions: list, start: str, stop: str, step: str):
-    """Generate moon positions relative to their parent planet"""
-    try:
-        start_date = datetime.fromisoformat(start)
-        stop_date = datetime.fromisoformat(stop)
-        
-        # Parse step
-        if "h" in step:
-            step_hours = float(step.replace("h", "").strip())
-        elif "d" in step:
-            step_hours = float(step.replace("d", "").strip()) * 24
-        else:
-            step_hours = 6
-        
-        positions = []
-        current_time = start_date
-        max_positions = 1000
-        position_count = 0
-        
-        while current_time <= stop_date and position_count < max_positions:
-            # Calculate moon's orbital position relative to parent
-            days_since_epoch = (current_time - datetime(2000, 1, 1)).total_seconds() / 86400
-            mean_anomaly = (days_since_epoch / moon_obj["period"]) * 2 * math.pi
-            
-            # Enhanced Kepler's equation solution
-            eccentric_anomaly = mean_anomaly
-            for _ in range(5):
-                eccentric_anomaly = mean_anomaly + moon_obj["e"] * math.sin(eccentric_anomaly)
-            
-            # True anomaly
-            true_anomaly = 2 * math.atan2(
-                math.sqrt(1 + moon_obj["e"]) * math.sin(eccentric_anomaly/2),
-                math.sqrt(1 - moon_obj["e"]) * math.cos(eccentric_anomaly/2)
-            )
-            
-            # Moon's distance from parent
-            r_moon = moon_obj["a"] * (1 - moon_obj["e"] * math.cos(eccentric_anomaly))
-            
-            # Moon position in orbital plane
-            x_moon = r_moon * math.cos(true_anomaly)
-            y_moon = r_moon * math.sin(true_anomaly)
-            z_moon = 0
-            
-            # Apply inclination
-            inclination_rad = math.radians(moon_obj["i"])
-            y_moon_inclined = y_moon * math.cos(inclination_rad) - z_moon * math.sin(inclination_rad)
-            z_moon_inclined = y_moon * math.sin(inclination_rad) + z_moon * math.cos(inclination_rad)
-            
-            # Find corresponding parent position
-            parent_pos = None
-            for pos in parent_positions:
-                if pos["t"] == current_time.isoformat():
-                    parent_pos = pos
-                    break
-            
-            if parent_pos:
-                # Add moon position to parent position
-                final_x = parent_pos["r"][0] + x_moon
-                final_y = parent_pos["r"][1] + y_moon_inclined
-                final_z = parent_pos["r"][2] + z_moon_inclined
-                
-                positions.append({
-                    "t": current_time.isoformat(),
-                    "r": [float(final_x), float(final_y), float(final_z)],
-                    "v": [0.0, 0.0, 0.0]  # Simplified for moons
-                })
-            
-            current_time += timedelta(hours=step_hours)
-            position_count += 1
-        
-        print(f"Generated {len(positions)} moon positions for {moon_obj['name']}")
-        return positions
-        
-    except Exception as e:
-        print(f"Error generating moon positions for {moon_obj['name']}: {e}")
-        return []
+async def query_horizons(command: str, start: str, stop: str, step: str, center: str = "500@0") -> Optional[Dict[str, np.ndarray]]:
+    """Fetch state vectors from NASA Horizons as columnar arrays, or None if it has no usable answer"""
 
-async def fetch_horizons_vectors(command: str, start: str, stop: str, step: str, center: str = "500@0") -> Dict[str, Any]:
-    """Try NASA API first, fallback to generated positions"""
-    
     # Try NASA Horizons API with corrected parameters
     params = {
         "format": "json",
@@ -638,63 +593,21 @@ async def fetch_horizons_vectors(command: str, start: str, stop: str, step: str,
         "CENTER": center,
         "START_TIME": start,
         "STOP_TIME": stop,
-        "STEP_SIZE": step,
+        "STEP_SIZE": kepler.horizons_step(step),
         "CSV_FORMAT": "YES",
         "OUT_UNITS": "KM-S",
     }
-    
+
     try:
-        async with httpx.AsyncClient(timeout=30) as client:
-            # Try the NASA API
-            response = await client.get(HORIZONS, params=params)
-            
-            if response.status_code == 200:
-                j = response.json()
-                
-                # Try to parse JSON response
-                if isinstance(j, dict) and "data" in j:
-                    states = []
-                    data_rows = j["data"]
-                    for row in data_rows:
-                        try:
-                            t = row[0]
-                            xk, yk, zk = float(row[2]), float(row[3]), float(row[4])
-                            vx, vy, vz = float(row[5]), float(row[6]), float(row[7])
-                            states.append({"t": t, "r": [xk, yk, zk], "v": [vx, vy, vz]})
-                        except Exception:
-                            continue
-                    if states:
-                        return {"id": command, "center": center, "states": states}
-                
-                # Try to parse text response
-                text = j.get("result", "") if isinstance(j, dict) else ""
-                if "$$SOE" in text:
-                    block = text.split("$$SOE", 1)[1].split("$$EOE", 1)[0]
-                    states = []
-                    for raw in block.strip().splitlines():
-                        raw = raw.strip()
-                        if not raw or raw.startswith("!"):
-                            continue
-                        parts = re.split(r"\s*,\s*", raw)
-                        if len(parts) < 7:
-                            continue
-                        try:
-                            t = parts[0]
-                            xk, yk, zk = float(parts[1]), float(parts[2]), float(parts[3])
-                            vx, vy, vz = float(parts[4]), float(parts[5]), float(parts[6])
-                            states.append({"t": t, "r": [xk, yk, zk], "v": [vx, vy, vz]})
-                        except Exception:
-                            continue
-                    if states:
-                        return {"id": command, "center": center, "states": states}
-            
+        # Try the NASA API (or its recorded response on disk)
+        payload = await upstream.get_json("jpl", HORIZONS, params, timeout=30)
+        arrays = horizons.parse_vectors(payload)
+        if arrays is not None:
+            return arrays
     except Exception as e:
         print(f"NASA API failed for {command}: {e}")
-    
-    # Fallback to generated positions
-    print(f"Using fallback orbital data for {command}")
-    states = generate_orbital_positions(command, start, stop, step)
-    return {"id": command, "center": center, "states": states}
+
+    return None
 
 # ---- Health Check ----
 @app.get("/health")
@@ -705,138 +618,900 @@ async def health_check():
 # ---- Core Ephemeris Endpoint ----
 @app.get("/api/ephem")
 async def ephem(
+    request: Request,
+    response: Response,
     horizons_ids: str = Query(..., description="Comma-separated Horizons COMMAND ids, e.g., '399,499'"),
     start: str = Query(..., description="START_TIME, e.g., '2025-08-20'"),
     stop: str = Query(..., description="STOP_TIME, e.g., '2025-08-27'"),
     step: str = Query("6 h", description="STEP_SIZE, e.g., '6 h'"),
     center: str = Query("500@0", description="CENTER, default Sun barycenter (500@0)"),
     include_moons: bool = Query(True, description="Include moons for planets"),
+    fmt: str = Query("", alias="format", description="'json' (default), 'binary' (also chosen by Accept: application/x-solsys-ephem) or 'ndjson' (streamed, no sample cap)"),
+    dtype: str = Query("f32", description="Binary format only: 'f32' or 'f64' position/velocity arrays"),
+    time_format: str = Query("unix", description="Binary format only: shared time vector in 'unix' seconds or 'jd'"),
 ):
-    key = ("ephem", horizons_ids, start, stop, step, center, include_moons)
-    if (c := _get_cached(key)) is not None:
-        return c
+    ids = parse_body_ids(horizons_ids)
+    if fmt.lower() == "ndjson":
+        grid = request_grid(start, stop, step, STREAM_MAX_SAMPLES)
+        bodies = expand_moons(ids) if include_moons else ids
+        return StreamingResponse(stream_ephem(grid, bodies, step, center), media_type="application/x-ndjson")
+    grid = request_grid(start, stop, step, EPHEM_MAX_SAMPLES, hint="; use format=ndjson to stream longer series")
+
+    binary = columnar.wants_binary(fmt, request.headers.get("accept", ""))
+    if binary and (dtype not in columnar.DTYPES or time_format not in columnar.TIME_FORMATS):
+        raise HTTPException(status_code=400, detail="dtype must be f32 or f64 and time_format unix or jd")
 
+    # Requests that differ only in formatting share one cache entry and one computation
+    key = (tuple(ids), start.strip(), stop.strip(), step.strip(), center.strip(), include_moons)
+    columns = await _cache.get_or_fetch("ephem", key, lambda: build_ephem(grid, ids, step, center, include_moons))
+    # Marked once so repeated hits do not keep extending the short TTL; the cached dict is
+    # shared with concurrent readers, so the marked one is a copy
+    if any(body["fallback"] for body in columns["bodies"]) and not columns.get("provisional"):
+        columns = {**columns, "provisional": True}
+        _cache.set("ephem", key, columns, ttl=FALLBACK_RESPONSE_TTL, fetch=lambda: build_ephem(grid, ids, step, center, include_moons))
+    # The body depends on Accept, so shared caches must key on it
+    if binary:
+        return Response(content=columnar.encode(columns["t"], columns["bodies"], dtype, time_format), media_type=columnar.MEDIA_TYPE, headers={"Vary": "Accept"})
+    response.headers["Vary"] = "Accept"
+    return ephem_states(columns)
+
+def parse_body_ids(horizons_ids: str) -> List[str]:
+    """Requested ids, de-duplicated, with the Sun (10) always included and first for center reference"""
     ids = [s.strip() for s in horizons_ids.split(",") if s.strip()]
-    # Ensure the Sun (10) is always included and first for center reference
     if "10" not in ids:
         ids = ["10", *ids]
-    
-    # Expand to include moons if requested
+    return list(dict.fromkeys(ids))
+
+def expand_moons(ids: List[str]) -> List[str]:
+    """The ids followed by the moons of every planet among them"""
     expanded_ids = ids.copy()
-    if include_moons:
-        for obj_id in ids:
-            if obj_id in CELESTIAL_OBJECTS and CELESTIAL_OBJECTS[obj_id]['type'] == 'planet':
-                moons = CELESTIAL_OBJECTS[obj_id].get('moons', [])
-                expanded_ids.extend(moons)
-    
+    for obj_id in ids:
+        if obj_id in CELESTIAL_OBJECTS and CELESTIAL_OBJECTS[obj_id]['type'] == 'planet':
+            expanded_ids.extend(CELESTIAL_OBJECTS[obj_id].get('moons', []))
+    return expanded_ids
+
+def check_step(step: str) -> None:
+    try:
+        kepler.parse_step_hours(step)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid step size '{step}': {e}")
+
+def request_grid(start: str, stop: str, step: str, max_samples: int, hint: str = "") -> segments.EphemGrid:
+    """The request's sample grid; 400 if it is invalid or longer than max_samples per body"""
+    check_step(step)
+    try:
+        grid = segments.EphemGrid.from_request(start, stop, step)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid time range: {e}")
+    if len(grid) > max_samples:
+        raise HTTPException(status_code=400, detail=f"Too many samples: {len(grid)} per body, at most {max_samples}{hint}")
+    return grid
+
+def ephem_states(columns: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Classic JSON form: per body, a list of {t, r, v} for the samples it has"""
     out = []
+    for body in columns["bodies"]:
+        have = ~np.isnan(body["r"][:, 0])
+        states = kepler.states_to_list(columns["t"][have], body["r"][have], body["v"][have])
+        out.append({"id": body["id"], "center": body["center"], "states": states})
+    return out
+
+async def build_ephem(grid: segments.EphemGrid, ids: List[str], step: str, center: str, include_moons: bool) -> Dict[str, Any]:
+    """Assemble every body from cached chunk segments, fetching only the missing chunks
+
+    Returns the shared grid times and, per body, (n, 3) arrays aligned to them (NaN where missing).
+    """
+    # Expand to include moons if requested
+    expanded_ids = expand_moons(ids) if include_moons else ids.copy()
+    return await grid_columns(grid, expanded_ids, step, center)
+
+async def grid_columns(grid: segments.EphemGrid, expanded_ids: List[str], step: str, center: str, deadline: Optional[float] = None, store: bool = True) -> Dict[str, Any]:
+    """Columnar states of the bodies on every sample of the grid
+
+    Horizons gets `deadline` seconds (EPHEM_DEADLINE_SECONDS by default); chunks
+    still missing then are filled from the Kepler fallback, and the late Horizons
+    answers are written to the chunk cache when they land. With store=False
+    cached chunks are read but fetched ones are not written back.
+    """
+    chunk_ids = grid.chunks()
+    found: Dict[Any, Dict[str, Any]] = {}
+    missing: Dict[str, List[int]] = {}
     for hid in expanded_ids:
+        for c in chunk_ids:
+            seg = _cache.get("ephem_segment", grid.key(hid, center, c))
+            if seg is None:
+                missing.setdefault(hid, []).append(c)
+            else:
+                found[(hid, c)] = seg
+
+    async def fetch_run(hid: str, first: int, last: int):
+        run_start = grid.time(grid.chunk_bounds(first)[0])
+        run_stop = grid.time(grid.chunk_bounds(last)[1])
         try:
-            res = await fetch_horizons_vectors(hid, start, stop, step, center=center)
-            out.append(res)
+            arrays = await query_horizons(hid, segments.horizons_time(run_start), segments.horizons_time(run_stop), step, center=center)
         except Exception as e:
-            # Even if there's an error, provide fallback data
             print(f"Error for {hid}: {e}")
-            states = generate_orbital_positions(hid, start, stop, step)
-            out.append({"id": hid, "center": center, "states": states})
-    
-    _set_cached(key, out)
+            return
+        if arrays is None:
+            return
+        for c, seg in grid.split(arrays, first, last, "horizons").items():
+            found[(hid, c)] = seg
+            # Partial chunks are used for this response but not kept
+            if store and segments.is_complete(seg):
+                _cache.set("ephem_segment", grid.key(hid, center, c), seg)
+
+    # Each run of consecutive missing chunks is one Horizons call; bodies are fetched concurrently
+    runs = [(hid, first, last) for hid, cs in missing.items() for first, last in segments.split_runs(cs)]
+    if runs:
+        fetch = asyncio.ensure_future(gather_bounded([lambda run=run: fetch_run(*run) for run in runs], HORIZONS_CONCURRENCY))
+        done, _ = await asyncio.wait({fetch}, timeout=EPHEM_DEADLINE if deadline is None else deadline)
+        if not done:
+            print(f"Horizons missed the {EPHEM_DEADLINE if deadline is None else deadline:g} s deadline; backfilling in the background")
+            _backfills.add(fetch)
+            fetch.add_done_callback(_backfills.discard)
+
+    # Even if Horizons fails, provide fallback data - all bodies missing a chunk share its time grid
+    gaps: Dict[int, List[str]] = {}
+    for hid, cs in missing.items():
+        for c in cs:
+            if (hid, c) not in found:
+                gaps.setdefault(c, []).append(hid)
+    if gaps:
+        print(f"Using fallback orbital data for {', '.join(sorted({hid for hids in gaps.values() for hid in hids}))}")
+    for c, hids in gaps.items():
+        arrays = kepler.propagate_system(CELESTIAL_OBJECTS, hids, grid.chunk_times(c))
+        for hid in hids:
+            if hid in arrays:
+                r, v = arrays[hid]
+                seg = {"t": grid.chunk_times(c), "r": r, "v": v, "source": "kepler"}
+            else:
+                seg = segments.empty_segment("kepler")
+            found[(hid, c)] = seg
+            # Short TTL so Horizons is retried soon
+            if store:
+                _cache.set("ephem_segment", grid.key(hid, center, c), seg, ttl=FALLBACK_SEGMENT_TTL)
+
+    times = grid.times(grid.k0, grid.k1)
+    bodies = []
+    for hid in expanded_ids:
+        body_segments = [found[(hid, c)] for c in chunk_ids]
+        t, r, v = grid.assemble(body_segments)
+        rows = grid.index(t) - grid.k0
+        r_full = np.full((len(times), 3), np.nan)
+        v_full = np.full((len(times), 3), np.nan)
+        r_full[rows] = r
+        v_full[rows] = v
+        fallback = any(seg["source"] == "kepler" for seg in body_segments)
+        bodies.append({"id": hid, "center": center, "r": r_full, "v": v_full, "fallback": fallback})
+    return {"t": times, "bodies": bodies}
+
+async def stream_ephem(grid: segments.EphemGrid, body_ids: List[str], step: str, center: str) -> AsyncIterator[bytes]:
+    """NDJSON: a header line, then one {"id", "center", "states"} line per body and window of chunks
+
+    Windows are computed one ahead of the one being sent, so only two are ever held in memory.
+    Cached chunks are used, but a stream's own chunks are not cached: a long series would
+    evict everything else from the shared cache.
+    """
+    header = {"type": "header", "center": center, "bodies": body_ids, "samples": len(grid), "step_seconds": grid.step_s}
+    yield (json.dumps(header) + "\n").encode("utf-8")
+
+    chunk_ids = grid.chunks()
+    windows = [chunk_ids[i:i + STREAM_WINDOW_CHUNKS] for i in range(0, len(chunk_ids), STREAM_WINDOW_CHUNKS)]
+
+    def compute(window: List[int]) -> "asyncio.Future[Dict[str, Any]]":
+        first = max(grid.k0, grid.chunk_bounds(window[0])[0])
+        last = min(grid.k1, grid.chunk_bounds(window[-1])[1])
+        return asyncio.ensure_future(grid_columns(segments.EphemGrid(grid.step_s, grid.phase, first, last), body_ids, step, center, store=False))
+
+    pending = compute(windows[0]) if windows else None
+    try:
+        for i in range(len(windows)):
+            columns = await pending
+            pending = compute(windows[i + 1]) if i + 1 < len(windows) else None
+            for body in columns["bodies"]:
+                have = ~np.isnan(body["r"][:, 0])
+                states = kepler.states_to_list(columns["t"][have], body["r"][have], body["v"][have])
+                yield (json.dumps({"id": body["id"], "center": center, "states": states}) + "\n").encode("utf-8")
+    finally:
+        # Client went away: stop working on the next window
+        if pending is not None:
+            pending.cancel()
+
+@app.get("/api/ephem/at")
+async def ephem_at(
+    horizons_ids: str = Query(..., description="Comma-separated Horizons COMMAND ids, e.g., '399,499'"),
+    times: str = Query(..., description="Comma-separated ISO instants, e.g., '2025-08-20T12:34:56'"),
+    step: str = Query("", description="Spacing of the cached samples interpolated between; default depends on each body's period"),
+    center: str = Query("500@0", description="CENTER, default Sun barycenter (500@0)"),
+    include_moons: bool = Query(False, description="Include moons for planets"),
+):
+    """State of each body at arbitrary instants, by cubic Hermite interpolation of cached state vectors"""
+    ids = parse_body_ids(horizons_ids)
+    if include_moons:
+        ids = expand_moons(ids)
+    try:
+        instants = [kepler.to_unix(t.strip()) for t in times.split(",") if t.strip()]
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid time: {e}")
+    if not instants or len(instants) > AT_MAX_TIMES:
+        raise HTTPException(status_code=400, detail=f"Give between 1 and {AT_MAX_TIMES} times")
+    if step:
+        check_step(step)
+
+    by_id = await states_at(ids, instants, center, step)
+    return [{"id": hid, "center": center, "states": by_id[hid]} for hid in ids]
+
+async def states_at(ids: List[str], instants: List[float], center: str, step: str = "") -> Dict[str, List[Dict[str, Any]]]:
+    """Hermite states per body at the instants; bodies are grouped by sample step (their own unless step is given)"""
+    groups: Dict[str, List[str]] = {}
+    for hid in ids:
+        groups.setdefault(step or hermite_step(hid), []).append(hid)
+    results = await asyncio.gather(*(interpolate_group(group, instants, group_step, center) for group_step, group in groups.items()))
+    return {hid: states for result in results for hid, states in result.items()}
+
+# ---- Live state streams ----
+def live_stream(horizons_ids: str, center: str, rate: float, start: str, include_moons: bool) -> Tuple[Any, Callable[[], Tuple[live.Compute, float, float]]]:
+    """Stream key and factory for a subscription; streams without a start time begin at the current time"""
+    ids = parse_body_ids(horizons_ids)
+    if include_moons:
+        ids = expand_moons(ids)
+    if not math.isfinite(rate) or abs(rate) > LIVE_MAX_RATE:
+        raise ValueError(f"rate must be at most {LIVE_MAX_RATE:g} simulated seconds per second")
+    start_s = kepler.to_unix(start.strip()) if start.strip() else None
+
+    async def compute(t: float) -> Tuple[List[str], np.ndarray, np.ndarray]:
+        by_id = await states_at(ids, [t], center)
+        r = np.full((len(ids), 3), np.nan)
+        v = np.full((len(ids), 3), np.nan)
+        for i, hid in enumerate(ids):
+            if by_id[hid]:
+                r[i], v[i] = by_id[hid][0]["r"], by_id[hid][0]["v"]
+        return ids, r, v
+
+    key = (tuple(ids), center.strip(), rate, start_s)
+    return key, lambda: (compute, rate, time.time() if start_s is None else start_s)
+
+@app.websocket("/ws/live")
+async def live_ws(
+    websocket: WebSocket,
+    horizons_ids: str = Query("399", description="Comma-separated Horizons COMMAND ids"),
+    center: str = Query("500@0", description="CENTER, default Sun barycenter (500@0)"),
+    rate: float = Query(3600.0, description="Simulated seconds per wall-clock second"),
+    start: str = Query("", description="Simulation start (ISO); default now"),
+    include_moons: bool = Query(False, description="Include moons for planets"),
+):
+    """Body states pushed every tick from a simulation clock shared by all clients with the same parameters"""
+    await websocket.accept()
+    try:
+        key, make = live_stream(horizons_ids, center, rate, start, include_moons)
+    except ValueError as e:
+        await websocket.close(code=1008, reason=str(e))
+        return
+    _, sub = _live.subscribe(key, make)
+
+    async def send() -> None:
+        while True:
+            await websocket.send_text(await sub.queue.get())
+
+    async def receive() -> None:
+        # Clients send nothing; reading is what notices a disconnect while no message is queued
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+
+    tasks = {asyncio.ensure_future(send()), asyncio.ensure_future(receive())}
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            try:
+                task.result()
+            except (WebSocketDisconnect, RuntimeError):
+                pass
+    finally:
+        for task in tasks:
+            task.cancel()
+        _live.unsubscribe(key, sub)
+
+@app.get("/api/live")
+async def live_sse(
+    horizons_ids: str = Query("399", description="Comma-separated Horizons COMMAND ids"),
+    center: str = Query("500@0", description="CENTER, default Sun barycenter (500@0)"),
+    rate: float = Query(3600.0, description="Simulated seconds per wall-clock second"),
+    start: str = Query("", description="Simulation start (ISO); default now"),
+    include_moons: bool = Query(False, description="Include moons for planets"),
+):
+    """The /ws/live messages as Server-Sent Events, for clients that cannot use WebSockets"""
+    try:
+        key, make = live_stream(horizons_ids, center, rate, start, include_moons)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    _, sub = _live.subscribe(key, make)
+
+    async def events() -> AsyncIterator[str]:
+        try:
+            while True:
+                yield f"data: {await sub.queue.get()}\n\n"
+        finally:
+            _live.unsubscribe(key, sub)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+def hermite_step(hid: str) -> str:
+    """Sample spacing that keeps cubic Hermite error within HERMITE_TOLERANCE_KM for the body's orbit
+
+    The error is at most h^4 / 384 times the largest fourth derivative of position,
+    which for a Kepler orbit peaks at perihelion near a n^4 (1 + e)^2 / (1 - e)^5.
+    """
+    minutes = float(HERMITE_MAX_STEP_MINUTES)
+    obj = CELESTIAL_OBJECTS.get(hid)
+    while obj:
+        if obj.get("period"):
+            n = 2 * math.pi / (abs(obj["period"]) * 86400.0)
+            e = obj.get("e", 0.0)
+            fourth = obj["a"] * n ** 4 * (1 + e) ** 2 / (1 - e) ** 5
+            minutes = min(minutes, (384 * HERMITE_TOLERANCE_KM / fourth) ** 0.25 / 60)
+        obj = CELESTIAL_OBJECTS.get(obj.get("parent", ""))
+    return f"{2 ** math.floor(math.log2(max(HERMITE_MIN_STEP_MINUTES, minutes)))} m"
+
+async def interpolate_group(ids: List[str], instants: List[float], step: str, center: str) -> Dict[str, List[Dict[str, Any]]]:
+    """Hermite states of bodies sharing a sample step; only chunks around uncached brackets are fetched"""
+    step_s = kepler.parse_step_hours(step) * 3600.0
+    # Samples on the absolute grid k * step; instant t lies between samples k and k + 1
+    brackets: Dict[int, Optional[tuple]] = {}
+    for t in instants:
+        k = int(t // step_s)
+        if k not in brackets:
+            brackets[k] = bracket_states(step_s, k, ids, center)
+
+    async def load(k: int) -> None:
+        columns = await grid_columns(segments.EphemGrid(step_s, 0.0, k, k + 1), ids, step, center)
+        brackets[k] = tuple(np.stack([body[part] for body in columns["bodies"]]) for part in ("r", "v"))
+
+    await gather_bounded([lambda k=k: load(k) for k, states in brackets.items() if states is None], HORIZONS_CONCURRENCY)
+
+    out: Dict[str, List[Dict[str, Any]]] = {hid: [] for hid in ids}
+    for t, iso in zip(instants, kepler.to_iso(np.array(instants))):
+        k = int(t // step_s)
+        r, v = brackets[k]
+        p, pv = segments.hermite(k * step_s, step_s, r[:, 0], v[:, 0], r[:, 1], v[:, 1], t)
+        for i, hid in enumerate(ids):
+            if np.isfinite(p[i]).all():
+                out[hid].append({"t": iso, "r": p[i].tolist(), "v": pv[i].tolist()})
     return out
 
-# ---- SBDB endpoints ----
-@app.get("/api/sbdb/neo")
-async def sbdb_neo(limit: int = 100):
-    """Get Near-Earth Objects with enhanced data"""
+def bracket_states(step_s: float, k: int, ids: List[str], center: str) -> Optional[tuple]:
+    """(r, v) of shape (bodies, 2, 3) at samples k and k + 1 straight from cached chunks, or None if any is missing"""
+    r = np.empty((len(ids), 2, 3))
+    v = np.empty((len(ids), 2, 3))
+    for j, kk in enumerate((k, k + 1)):
+        c, row = divmod(kk, segments.CHUNK_SAMPLES)
+        for i, hid in enumerate(ids):
+            seg = _cache.get("ephem_segment", segments.chunk_key(hid, center, step_s, 0.0, c))
+            if seg is None:
+                return None
+            if not segments.is_complete(seg):
+                # Only empty segments (bodies with no data at all) are cached incomplete
+                r[i, j] = v[i, j] = np.nan
+                continue
+            r[i, j] = seg["r"][row]
+            v[i, j] = seg["v"][row]
+    return r, v
+
+@app.get("/api/ephem/chebyshev")
+async def ephem_chebyshev(
+    horizons_ids: str = Query(..., description="Comma-separated Horizons COMMAND ids, e.g., '399,499'"),
+    start: str = Query(..., description="START_TIME, e.g., '2025-08-20'"),
+    stop: str = Query(..., description="STOP_TIME, e.g., '2025-08-27'"),
+    center: str = Query("500@0", description="CENTER, default Sun barycenter (500@0)"),
+    include_moons: bool = Query(True, description="Include moons for planets"),
+    degree: int = Query(chebyshev.DEFAULT_DEGREE, ge=1, le=chebyshev.MAX_DEGREE, description="Starting Chebyshev degree per segment; raised up to 17 where needed to meet tolerance_km"),
+    tolerance_km: float = Query(chebyshev.DEFAULT_TOLERANCE_KM, ge=chebyshev.MIN_TOLERANCE_KM, description="Largest position error (km) of each fit, checked at samples held out of the fit"),
+):
+    """Chebyshev coefficients per body and time segment, evaluable at any instant in the window"""
+    ids = parse_body_ids(horizons_ids)
+    if include_moons:
+        ids = expand_moons(ids)
     try:
-        params = {
-            "query": "neo=Y",
-            "limit": str(limit),
-            "fields": "full_name,des,orbit_class,albedo,diameter,H,moid_au,pha,period_yr,semimajor_au,eccentricity,inclination,arg_perihelion,long_asc_node,mean_anomaly,epoch_mjd"
-        }
-        async with httpx.AsyncClient(timeout=60) as x:
-            r = await x.get(SBDB_QUERY, params=params)
-            if r.status_code == 200:
-                return r.json()
+        start_s, stop_s = kepler.to_unix(start), kepler.to_unix(stop)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid time range: {e}")
+    if stop_s <= start_s:
+        raise HTTPException(status_code=400, detail="Invalid time range: stop must be after start")
+
+    # Segment s of a body spans [s * length, (s + 1) * length) in Unix seconds
+    plan: Dict[str, tuple] = {}
+    for hid in ids:
+        hours = chebyshev.segment_hours(CELESTIAL_OBJECTS.get(hid, {}).get("period", 0.0))
+        length = hours * 3600
+        seg_range = range(int(start_s // length), int(math.ceil(stop_s / length)))
+        if len(seg_range) > CHEB_MAX_SEGMENTS:
+            raise HTTPException(status_code=400, detail=f"Window too long for {hid}: at most {CHEB_MAX_SEGMENTS * hours} hours")
+        plan[hid] = (hours, seg_range)
+    block_ranges = {hid: range(seg_range[0] // CHEB_BLOCK_SEGMENTS, seg_range[-1] // CHEB_BLOCK_SEGMENTS + 1) for hid, (_, seg_range) in plan.items()}
+    if sum(len(blocks) for blocks in block_ranges.values()) > CHEB_MAX_BLOCKS:
+        raise HTTPException(status_code=400, detail=f"Too many bodies for this window: at most {CHEB_MAX_BLOCKS} blocks of {CHEB_BLOCK_SEGMENTS} segments")
+
+    # Block b of a body holds the fits of its segments [b * CHEB_BLOCK_SEGMENTS, (b + 1) * CHEB_BLOCK_SEGMENTS)
+    def block_key(hid: str, hours: int, b: int) -> tuple:
+        return (hid, center, hours, b, degree, tolerance_km)
+
+    blocks: Dict[Any, Dict[str, Any]] = {}
+    fits: Dict[Any, Optional[List[Dict[str, Any]]]] = {}
+    missing: Dict[int, List[tuple]] = {}
+    for hid in ids:
+        hours, seg_range = plan[hid]
+        for b in block_ranges[hid]:
+            cached = _cache.get("ephem_cheb", block_key(hid, hours, b))
+            blocks[(hid, b)] = {"fits": dict(cached["fits"]), "fallback": cached["fallback"], "changed": False} if cached else {"fits": {}, "fallback": False, "changed": False}
+        for s in seg_range:
+            fit = blocks[(hid, s // CHEB_BLOCK_SEGMENTS)]["fits"].get(s)
+            if fit is None:
+                # (body, segment, segment it is part of at the body's own length)
+                missing.setdefault(hours, []).append((hid, s, s))
             else:
-                # Return fallback data instead of crashing
-                return {
-                    "count": 0,
-                    "data": [],
-                    "error": f"SBDB API returned {r.status_code}: {r.text[:200]}"
-                }
-    except Exception as e:
+                fits[(hid, s)] = fit
+
+    # Bodies sharing a segment length are sampled on one grid per run of adjacent segments (from the
+    # chunk segment cache). A fit that misses the tolerance is redone on the halves of its segment,
+    # sampled again; longest segments go first so the halves join the next round.
+    n = chebyshev.SEGMENT_SAMPLES
+    pieces: Dict[tuple, List[Dict[str, Any]]] = {}
+    fallback: Dict[tuple, bool] = {}
+    wanted_segments = [(hid, s) for wanted in missing.values() for hid, s, _ in wanted]
+    while missing:
+        hours = max(missing)
+        wanted = missing.pop(hours)
+        step = chebyshev.sample_step(hours)
+        for first, last in segments.split_runs(sorted({s for _, s, _ in wanted})):
+            run = [w for w in wanted if first <= w[1] <= last]
+            grid = segments.EphemGrid(hours * 3600.0 / n, 0.0, first * n, (last + 1) * n)
+            columns = await grid_columns(grid, list(dict.fromkeys(hid for hid, _, _ in run)), step, center)
+            by_id = {body["id"]: body for body in columns["bodies"]}
+            for hid, s, owner in run:
+                body = by_id[hid]
+                lo = (s - first) * n
+                t0, t1 = grid.time(s * n), grid.time((s + 1) * n)
+                result = chebyshev.fit_segment(columns["t"][lo:lo + n + 1], body["r"][lo:lo + n + 1], body["v"][lo:lo + n + 1], t0, t1, degree, tolerance_km)
+                if result is None:
+                    continue
+                coeffs, error = result
+                if not chebyshev.fits_within(error, tolerance_km) and hours // 2 >= chebyshev.MIN_SEGMENT_HOURS and plan[hid][0] // hours < 2 ** chebyshev.MAX_SPLITS:
+                    missing.setdefault(hours // 2, []).extend([(hid, 2 * s, owner), (hid, 2 * s + 1, owner)])
+                    continue
+                pieces.setdefault((hid, owner), []).append(chebyshev.segment_to_dict(coeffs, t0, t1, error))
+                fallback[(hid, owner)] = fallback.get((hid, owner), False) or body["fallback"]
+
+    for hid, s in wanted_segments:
+        if (hid, s) not in pieces:
+            fits[(hid, s)] = None
+            continue
+        fits[(hid, s)] = sorted(pieces[(hid, s)], key=lambda piece: piece["t0"])
+        block = blocks[(hid, s // CHEB_BLOCK_SEGMENTS)]
+        block["fits"][s] = fits[(hid, s)]
+        block["fallback"] = block["fallback"] or fallback[(hid, s)]
+        block["changed"] = True
+
+    # Blocks holding Kepler fallback fits expire quickly so Horizons is retried
+    for (hid, b), block in blocks.items():
+        if block["changed"]:
+            value = {"fits": block["fits"], "fallback": block["fallback"]}
+            _cache.set("ephem_cheb", block_key(hid, plan[hid][0], b), value, ttl=FALLBACK_SEGMENT_TTL if block["fallback"] else None)
+
+    bodies = []
+    for hid in ids:
+        hours, seg_range = plan[hid]
+        body_fits = [piece for s in seg_range for piece in fits[(hid, s)] or []]
+        bodies.append({"id": hid, "center": center, "segment_seconds": hours * 3600, "segments": body_fits})
+    return {"center": center, "degree": degree, "tolerance_km": tolerance_km, "time": "unix", "start": start_s, "stop": stop_s, "bodies": bodies}
+
+# ---- SBDB endpoints ----
+def catalog_path(kind: str) -> str:
+    return os.path.join(SBDB_CATALOG_DIR, f"sbdb_{kind}.npz")
+
+async def sync_catalog(kind: str) -> None:
+    """Full pull into an empty catalog, otherwise only objects with a newer orbit solution"""
+    cat = _catalogs[kind]
+    wanted = cat.fields + [catalog.SOLUTION_FIELD]
+    params = {"query": SBDB_QUERIES[kind], "fields": ",".join(wanted)}
+    incremental = cat.loaded and bool(cat.high_water)
+    if incremental:
+        params["sb-cdata"] = json.dumps({"AND": [f"{catalog.SOLUTION_FIELD}|GT|{cat.high_water}"]})
+    elif SBDB_CATALOG_LIMITS[kind]:
+        params["limit"] = str(SBDB_CATALOG_LIMITS[kind])
+    # Kept on disk only as an outage fallback; the catalog has its own file
+    # Bulk pulls take minutes; only their errors should count against the jpl breaker Horizons relies on
+    body = await upstream.get_json("jpl", SBDB_QUERY, params, ttl=0, slow_s=math.inf, timeout=300)
+    columns = await asyncio.to_thread(catalog.columns_from_rows, body.get("fields") or [], body.get("data") or [], wanted)
+    if incremental:
+        # A capped catalog keeps its first pull's rows; new objects would grow it past the cap
+        changed = await asyncio.to_thread(cat.merge, columns, bool(SBDB_CATALOG_LIMITS[kind]))
+    else:
+        await asyncio.to_thread(cat.replace, columns)
+        changed = len(cat)
+    await asyncio.to_thread(cat.save, catalog_path(kind))
+    print(f"SBDB {kind} catalog: {changed} rows {'updated' if incremental else 'loaded'}, {len(cat)} total")
+
+async def run_catalog_sync(interval: float) -> None:
+    """Load saved catalogs, then keep each one at most `interval` seconds old"""
+    scheduler.background.set(True)
+    for kind, cat in _catalogs.items():
+        await asyncio.to_thread(cat.load, catalog_path(kind))
+    while True:
+        for kind, cat in _catalogs.items():
+            if time.time() - cat.updated_at >= interval:
+                try:
+                    await sync_catalog(kind)
+                except Exception as e:
+                    print(f"SBDB {kind} catalog sync failed: {e}")
+        await asyncio.sleep(min(interval, 600))
+
+class SbdbFilters:
+    """Filtering, sorting and paging of the SBDB lists (answered from the local catalog)"""
+
+    def __init__(
+        self,
+        offset: int = Query(0, ge=0, le=MAX_OFFSET, description="Rows to skip"),
+        sort: str = Query("", description="Field to sort by, e.g. 'H' or 'moid_au'"),
+        order: str = Query("asc", pattern="^(asc|desc)$", description="Sort direction"),
+        orbit_class: str = Query("", description="Comma-separated orbit classes, e.g. 'APO,ATE'"),
+        pha: Optional[bool] = Query(None, description="Only potentially hazardous (true) or non-hazardous (false) objects"),
+        des: str = Query("", description="Comma-separated designations"),
+        h_min: Optional[float] = Query(None, description="Minimum absolute magnitude H"),
+        h_max: Optional[float] = Query(None, description="Maximum absolute magnitude H"),
+        moid_min: Optional[float] = Query(None, description="Minimum Earth MOID (au)"),
+        moid_max: Optional[float] = Query(None, description="Maximum Earth MOID (au)"),
+        diameter_min: Optional[float] = Query(None, description="Minimum diameter (km)"),
+        diameter_max: Optional[float] = Query(None, description="Maximum diameter (km)"),
+    ):
+        self.offset = offset
+        self.sort = sort
+        self.descending = order == "desc"
+        self.equals: Dict[str, List[str]] = {}
+        for field, value in (("orbit_class", orbit_class), ("des", des)):
+            values = [v.strip() for v in value.split(",") if v.strip()]
+            if values:
+                self.equals[field] = values
+        if pha is not None:
+            self.equals["pha"] = ["Y" if pha else "N"]
+        self.ranges = {
+            field: (low, high)
+            for field, low, high in (("H", h_min, h_max), ("moid_au", moid_min, moid_max), ("diameter", diameter_min, diameter_max))
+            if low is not None or high is not None
+        }
+
+    @property
+    def active(self) -> bool:
+        """Whether anything beyond the first rows in catalog order is asked for"""
+        return bool(self.equals or self.ranges or self.sort or self.offset)
+
+def check_filters(kind: str, filters: SbdbFilters) -> None:
+    for field in [*filters.equals, *filters.ranges, *([filters.sort] if filters.sort else [])]:
+        if field not in _catalogs[kind].fields:
+            raise HTTPException(status_code=400, detail=f"'{field}' is not available for {kind}")
+
+def require_catalog(kind: str) -> None:
+    """503 with Retry-After until the kind's local catalog is loaded (400 if catalogs are turned off)"""
+    if _catalogs[kind].loaded:
+        return
+    if not SBDB_CATALOG_ENABLED:
+        raise HTTPException(status_code=400, detail=f"Filters and sorting need the local {kind} catalog, which is turned off (SBDB_CATALOG=0)")
+    raise HTTPException(status_code=503, detail=f"The local {kind} catalog is still loading", headers={"Retry-After": str(CATALOG_RETRY_AFTER_S)})
+
+def sbdb_from_catalog(kind: str, limit: int, filters: SbdbFilters) -> Dict[str, Any]:
+    cat = _catalogs[kind]
+    check_filters(kind, filters)
+    total, rows = cat.query(filters.equals, filters.ranges, filters.sort or None, filters.descending, filters.offset, limit)
+    return {
+        "count": len(rows),
+        "total": total,
+        "offset": filters.offset,
+        "fields": cat.fields,
+        "data": rows,
+        "catalog": cat.stats(),
+    }
+
+async def sbdb_upstream(kind: str, limit: int) -> Dict[str, Any]:
+    params = {
+        "query": SBDB_QUERIES[kind],
+        "limit": str(limit),
+        "fields": SBDB_FIELDS[kind],
+    }
+    return await _cache.get_or_fetch("sbdb", params, lambda: upstream.get_json("jpl", SBDB_QUERY, params))
+
+async def sbdb_list(kind: str, limit: int, filters: SbdbFilters, label: str) -> Dict[str, Any]:
+    """Answer from the local catalog once loaded; until then pass the first `limit` rows through from SBDB"""
+    if filters.active:
+        require_catalog(kind)
+    if _catalogs[kind].loaded:
+        return sbdb_from_catalog(kind, limit, filters)
+    try:
+        return await sbdb_upstream(kind, limit)
+    except upstream.UpstreamStatusError as e:
         # Return fallback data instead of crashing
         return {
             "count": 0,
             "data": [],
-            "error": f"Failed to fetch NEO data: {str(e)}"
+            "error": f"SBDB API returned {e.status_code}: {e.text}"
         }
-
-@app.get("/api/sbdb/comets")
-async def sbdb_comets(limit: int = 50):
-    """Get comet data"""
-    try:
-        params = {
-            "query": "comet=Y",
-            "limit": str(limit),
-            "fields": "full_name,des,orbit_class,albedo,diameter,H,period_yr,semimajor_au,eccentricity,inclination,arg_perihelion,long_asc_node,mean_anomaly,epoch_mjd"
-        }
-        async with httpx.AsyncClient(timeout=60) as x:
-            r = await x.get(SBDB_QUERY, params=params)
-            if r.status_code == 200:
-                return r.json()
-            else:
-                # Return fallback data instead of crashing
-                return {
-                    "count": 0,
-                    "data": [],
-                    "error": f"SBDB API returned {r.status_code}: {r.text[:200]}"
-                }
     except Exception as e:
         # Return fallback data instead of crashing
         return {
             "count": 0,
             "data": [],
-            "error": f"Failed to fetch comet data: {str(e)}"
+            "error": f"Failed to fetch {label} data: {str(e)}"
         }
 
+@app.get("/api/sbdb/neo")
+async def sbdb_neo(limit: int = Query(100, ge=0, le=SBDB_MAX_LIMIT), filters: SbdbFilters = Depends()):
+    """Get Near-Earth Objects with enhanced data"""
+    return await sbdb_list("neo", limit, filters, "NEO")
+
+@app.get("/api/sbdb/comets")
+async def sbdb_comets(limit: int = Query(50, ge=0, le=SBDB_MAX_LIMIT), filters: SbdbFilters = Depends()):
+    """Get comet data"""
+    return await sbdb_list("comets", limit, filters, "comet")
+
 @app.get("/api/sbdb/asteroids")
-async def sbdb_asteroids(limit: int = 100):
+async def sbdb_asteroids(limit: int = Query(100, ge=0, le=SBDB_MAX_LIMIT), filters: SbdbFilters = Depends()):
     """Get main belt asteroid data"""
+    return await sbdb_list("asteroids", limit, filters, "asteroid")
+
+async def sbdb_elements(kind: str, limit: int, filters: Optional[SbdbFilters] = None) -> Tuple[int, Dict[str, np.ndarray]]:
+    """(total matches, element columns) from the local catalog, or straight from SBDB until it is loaded
+
+    SBDB is only asked for the first `limit` rows, so filtered requests wait for the catalog.
+    """
+    cat = _catalogs[kind]
+    if filters is not None and filters.active:
+        require_catalog(kind)
+    if cat.loaded and filters is None:
+        return cat.select(limit=limit)
+    if cat.loaded:
+        check_filters(kind, filters)
+        return cat.select(filters.equals, filters.ranges, filters.sort or None, filters.descending, filters.offset, limit)
+    body = await sbdb_upstream(kind, limit)
+    columns = catalog.columns_from_rows(body.get("fields") or [], body.get("data") or [], cat.fields)
+    return len(columns["des"]), columns
+
+@app.get("/api/sbdb/positions")
+async def sbdb_positions(
+    request: Request,
+    response: Response,
+    kind: str = Query("neo", pattern="^(neo|comets|asteroids)$", description="Which SBDB list to propagate"),
+    epochs: str = Query(..., description="Comma-separated ISO epochs, e.g., '2025-08-20,2025-09-20'"),
+    limit: int = Query(10000, ge=1, le=SBDB_MAX_LIMIT, description="Most bodies to propagate"),
+    filters: SbdbFilters = Depends(),
+    fmt: str = Query("", alias="format", description="'json' (default) or 'binary' (also chosen by Accept: application/x-solsys-positions)"),
+    dtype: str = Query("f32", description="Binary format only: 'f32' or 'f64' positions"),
+    time_format: str = Query("unix", description="Binary format only: epochs in 'unix' seconds or 'jd'"),
+):
+    """Heliocentric ecliptic positions (km) of many small bodies, propagated from their SBDB elements in one pass"""
     try:
-        params = {
-            "query": "asteroid=Y",
-            "limit": str(limit),
-            "fields": "full_name,des,orbit_class,albedo,diameter,H,period_yr,semimajor_au,eccentricity,inclination,arg_perihelion,long_asc_node,mean_anomaly,epoch_mjd"
-        }
-        async with httpx.AsyncClient(timeout=60) as x:
-            r = await x.get(SBDB_QUERY, params=params)
-            if r.status_code == 200:
-                return r.json()
-            else:
-                # Return fallback data instead of crashing
-                return {
-                    "count": 0,
-                    "data": [],
-                    "error": f"SBDB API returned {r.status_code}: {r.text[:200]}"
-                }
+        t = np.array([kepler.to_unix(e.strip()) for e in epochs.split(",") if e.strip()])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid epoch: {e}")
+    if not len(t) or len(t) > PROPAGATE_MAX_EPOCHS:
+        raise HTTPException(status_code=400, detail=f"Give between 1 and {PROPAGATE_MAX_EPOCHS} epochs")
+    if limit * len(t) > PROPAGATE_MAX_POSITIONS:
+        raise HTTPException(status_code=400, detail=f"limit x epochs may not exceed {PROPAGATE_MAX_POSITIONS}")
+    binary = columnar.wants_binary(fmt, request.headers.get("accept", ""), columnar.POSITIONS_MEDIA_TYPE)
+    if binary and (dtype not in columnar.DTYPES or time_format not in columnar.TIME_FORMATS):
+        raise HTTPException(status_code=400, detail="dtype must be f32 or f64 and time_format unix or jd")
+
+    try:
+        total, columns = await sbdb_elements(kind, limit, filters)
+    except HTTPException:
+        raise
     except Exception as e:
-        # Return fallback data instead of crashing
-        return {
-            "count": 0,
-            "data": [],
-            "error": f"Failed to fetch asteroid data: {str(e)}"
-        }
+        return {"count": 0, "data": [], "error": f"Failed to fetch {kind} elements: {str(e)}"}
+    r = await asyncio.to_thread(kepler.element_positions, *(columns[field] for field in ELEMENT_FIELDS), t)
+    ids = columns["des"].tolist()
+
+    if binary:
+        return Response(content=columnar.encode_positions(t, ids, r, dtype, time_format), media_type=columnar.POSITIONS_MEDIA_TYPE, headers={"Vary": "Accept"})
+    # Rounded to 1 km; null for bodies without a bound orbit
+    positions = [[None if p[0] != p[0] else p for p in np.round(r[k], 1).tolist()] for k in range(len(t))]
+    response.headers["Vary"] = "Accept"
+    return {
+        "count": len(ids),
+        "total": total,
+        "epochs": kepler.to_iso(t),
+        "ids": ids,
+        "positions": positions,
+    }
+
+async def spatial_index(kind: str, epoch: float) -> Dict[str, Any]:
+    """k-d tree of the kind's positions at an epoch, with the designations and positions it indexes
+
+    Trees are only built from the loaded local catalog, never from an inline SBDB pull.
+    """
+    require_catalog(kind)
+    epoch = round(epoch / SPATIAL_EPOCH_ROUNDING) * SPATIAL_EPOCH_ROUNDING
+
+    async def build() -> Dict[str, Any]:
+        _, columns = _catalogs[kind].select(limit=SPATIAL_MAX_BODIES)
+        r = await asyncio.to_thread(kepler.element_positions, *(columns[field] for field in ELEMENT_FIELDS), np.array([epoch]))
+        tree = await asyncio.to_thread(spatial.KDTree, r[0])
+        return {"epoch": epoch, "tree": tree, "des": columns["des"], "r": r[0]}
+
+    # A catalog refresh changes updated_at, so trees over old elements are not reused
+    key = (kind, epoch, _catalogs[kind].updated_at)
+    return await _cache.get_or_fetch("spatial", key, build)
+
+def parse_vector(text: str, size: int, name: str) -> np.ndarray:
+    try:
+        values = np.array([float(v) for v in text.split(",")])
+    except ValueError:
+        values = np.empty(0)
+    if len(values) != size:
+        raise HTTPException(status_code=400, detail=f"{name} needs {size} comma-separated numbers")
+    return values
+
+def parse_epoch(epoch: str) -> float:
+    try:
+        return kepler.to_unix(epoch.strip())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid epoch: {e}")
+
+async def reference_point(point: str, body: str, epoch: float) -> np.ndarray:
+    """Heliocentric position (km) from explicit coordinates, or of a Horizons body at the epoch"""
+    if point:
+        return parse_vector(point, 3, "point")
+    states = (await interpolate_group([body], [epoch], hermite_step(body), "500@10"))[body]
+    if not states:
+        raise HTTPException(status_code=404, detail=f"No position for body {body} at this epoch")
+    return np.array(states[0]["r"])
+
+def spatial_response(kind: str, index: Dict[str, Any], rows: np.ndarray, limit: int, distances: Optional[np.ndarray] = None) -> Dict[str, Any]:
+    page = rows[:limit]
+    out = {
+        "kind": kind,
+        "epoch": kepler.to_iso(np.array([index["epoch"]]))[0],
+        "indexed": len(index["tree"]),
+        "count": len(page),
+        "total": len(rows),
+        "ids": index["des"][page].tolist(),
+        "positions": np.round(index["r"][page], 1).tolist(),
+    }
+    if distances is not None:
+        out["distances_km"] = np.round(distances[:limit], 1).tolist()
+    return out
+
+@app.get("/api/sbdb/spatial/box")
+async def sbdb_spatial_box(
+    kind: str = Query("asteroids", pattern="^(neo|comets|asteroids)$", description="Which SBDB list to search"),
+    epoch: str = Query(..., description="ISO epoch, e.g., '2025-08-20T00:00:00'"),
+    box_min: str = Query("", alias="min", description="Box corner 'x,y,z' (km, heliocentric ecliptic)"),
+    box_max: str = Query("", alias="max", description="Opposite box corner 'x,y,z'"),
+    planes: str = Query("", description="Instead of a box: 'a,b,c,d' per plane, keeping a*x + b*y + c*z + d >= 0 (e.g. the 6 planes of a view frustum)"),
+    limit: int = Query(SPATIAL_MAX_RESULTS, ge=1, le=SPATIAL_MAX_RESULTS),
+):
+    """Small bodies inside a box or a convex region (view frustum) at an epoch"""
+    t = parse_epoch(epoch)
+    if planes:
+        values = [v for v in planes.replace(";", ",").split(",") if v.strip()]
+        if not values or len(values) % 4:
+            raise HTTPException(status_code=400, detail="planes needs groups of 4 numbers (a,b,c,d)")
+        region = parse_vector(",".join(values), len(values), "planes").reshape(-1, 4)
+    else:
+        region = None
+        low, high = parse_vector(box_min, 3, "min"), parse_vector(box_max, 3, "max")
+    index = await spatial_index(kind, t)
+    rows = index["tree"].convex(region) if region is not None else index["tree"].box(np.minimum(low, high), np.maximum(low, high))
+    return spatial_response(kind, index, rows, limit)
+
+@app.get("/api/sbdb/spatial/nearest")
+async def sbdb_spatial_nearest(
+    kind: str = Query("neo", pattern="^(neo|comets|asteroids)$", description="Which SBDB list to search"),
+    epoch: str = Query(..., description="ISO epoch, e.g., '2025-08-20T00:00:00'"),
+    point: str = Query("", description="'x,y,z' (km, heliocentric ecliptic); default is the position of body"),
+    body: str = Query("399", description="Horizons id whose position is used when no point is given"),
+    k: int = Query(10, ge=1, le=SPATIAL_MAX_RESULTS, description="Number of neighbours"),
+    max_km: Optional[float] = Query(None, gt=0, description="Ignore objects further than this"),
+):
+    """The k small bodies nearest to a point or a body at an epoch"""
+    t = parse_epoch(epoch)
+    center = await reference_point(point, body, t)
+    index = await spatial_index(kind, t)
+    rows, distances = index["tree"].nearest(center, k, max_km)
+    return spatial_response(kind, index, rows, k, distances)
+
+@app.get("/api/sbdb/spatial/within")
+async def sbdb_spatial_within(
+    kind: str = Query("neo", pattern="^(neo|comets|asteroids)$", description="Which SBDB list to search"),
+    epoch: str = Query(..., description="ISO epoch, e.g., '2025-08-20T00:00:00'"),
+    radius_km: float = Query(..., gt=0, description="Search radius (km)"),
+    point: str = Query("", description="'x,y,z' (km, heliocentric ecliptic); default is the position of body"),
+    body: str = Query("399", description="Horizons id whose position is used when no point is given"),
+    limit: int = Query(SPATIAL_MAX_RESULTS, ge=1, le=SPATIAL_MAX_RESULTS),
+):
+    """Small bodies within a radius of a point or a body (Earth by default) at an epoch, nearest first"""
+    t = parse_epoch(epoch)
+    center = await reference_point(point, body, t)
+    index = await spatial_index(kind, t)
+    rows, distances = index["tree"].within(center, radius_km)
+    return spatial_response(kind, index, rows, limit, distances)
+
+@app.get("/api/sbdb/close-approaches")
+async def sbdb_close_approaches(
+    start: str = Query(..., description="Window start, e.g., '2025-01-01'"),
+    stop: str = Query(..., description="Window end, e.g., '2026-01-01'"),
+    step: str = Query("12 h", description="Coarse screening step"),
+    bodies: str = Query("399", description="Comma-separated planet Horizons ids to screen against"),
+    max_distance_au: float = Query(0.05, gt=0, description="Report approaches closer than this"),
+    limit: int = Query(5000, ge=1, le=SCREEN_MAX_BODIES, description="Most NEOs to screen"),
+    filters: SbdbFilters = Depends(),
+):
+    """Closest approaches of SBDB NEOs to Earth (or other planets) within a time window, computed locally"""
+    started = time.perf_counter()
+    planet_ids = list(dict.fromkeys(b.strip() for b in bodies.split(",") if b.strip()))
+    unknown = [hid for hid in planet_ids if CELESTIAL_OBJECTS.get(hid, {}).get("type") != "planet"]
+    if not planet_ids or unknown:
+        raise HTTPException(status_code=400, detail=f"Not a planet id: {', '.join(unknown) or bodies}")
+    grid = request_grid(start, stop, step, SCREEN_MAX_SAMPLES)
+    if len(grid) < 2:
+        raise HTTPException(status_code=400, detail="The window must span at least two steps")
+
+    try:
+        _, columns = await sbdb_elements("neo", limit, filters)
+    except HTTPException:
+        raise
+    except Exception as e:
+        return {"count": 0, "approaches": [], "error": f"Failed to fetch NEO elements: {str(e)}"}
+    # Heliocentric planet states, to match the propagated elements
+    planets = await grid_columns(grid, planet_ids, step, "500@10")
+    # Kepler fallback tracks are not in the SBDB elements' ecliptic frame; screening them would give wrong approaches
+    fallback = [planet["id"] for planet in planets["bodies"] if planet["fallback"]]
+    if fallback:
+        raise HTTPException(status_code=503, detail=f"Horizons is unavailable for {', '.join(fallback)}; approaches cannot be screened against the fallback model")
+    elements = [columns[field] for field in ELEMENT_FIELDS]
+    threshold_km = max_distance_au * kepler.AU_KM
+
+    approaches = []
+    prefiltered = candidates = 0
+    for planet in planets["bodies"]:
+        have = np.isfinite(planet["r"]).all(axis=1)
+        if have.sum() < 2:
+            continue
+        # The Earth MOID bounds every Earth approach from below
+        rows = np.arange(len(columns["des"]))
+        if planet["id"] == "399" and "moid_au" in columns:
+            rows = np.flatnonzero(~(columns["moid_au"] > max_distance_au))
+            prefiltered += len(columns["des"]) - len(rows)
+        found = await asyncio.to_thread(
+            screening.screen, [e[rows] for e in elements], planets["t"][have], planet["r"][have], planet["v"][have], threshold_km
+        )
+        candidates += found["candidates"]
+        for b, t, d, speed in zip(rows[found["body"]], kepler.to_iso(found["t"]), found["distance"], found["speed"]):
+            approaches.append({
+                "des": columns["des"][b].item(),
+                "full_name": columns["full_name"][b].item() or None,
+                "body": planet["id"],
+                "body_name": CELESTIAL_OBJECTS[planet["id"]]["name"],
+                "time": t,
+                "distance_km": round(float(d), 1),
+                "distance_au": round(float(d) / kepler.AU_KM, 8),
+                "relative_speed_km_s": round(float(speed), 3),
+            })
+    approaches.sort(key=lambda a: a["distance_km"])
+    return {
+        "start": start,
+        "stop": stop,
+        "step": step,
+        "max_distance_au": max_distance_au,
+        "screened": len(columns["des"]),
+        "prefiltered": prefiltered,
+        "candidates": candidates,
+        "count": len(approaches),
+        "approaches": approaches,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+    }
 
 @app.get("/api/sbdb/object")
 async def sbdb_object(des: str):
     """Get detailed information about a specific object"""
     try:
         params = {"sstr": des}
-        async with httpx.AsyncClient(timeout=60) as x:
-            r = await x.get(SBDB_BULK, params=params)
-            r.raise_for_status()
-            return r.json()
+        return await _cache.get_or_fetch("sbdb", params, lambda: upstream.get_json("jpl", SBDB_BULK, params))
     except Exception as e:
         return {"error": str(e)}
 
@@ -851,37 +1526,130 @@ async def nasa_apod(date: str = None, count: int = 1):
         if count > 1:
             params["count"] = count
         
-        async with httpx.AsyncClient(timeout=30) as x:
-            r = await x.get(APOD_API, params=params)
-            if r.status_code == 200:
-                return r.json()
-            else:
-                return {"error": f"APOD API returned {r.status_code}: {r.text[:200]}"}
+        # count>1 asks for random pictures, so only fixed queries are cached
+        if count > 1:
+            return await upstream.get_json("nasa", APOD_API, params, ttl=0)
+        return await _cache.get_or_fetch("apod", params, lambda: upstream.get_json("nasa", APOD_API, params))
+    except upstream.UpstreamStatusError as e:
+        return {"error": f"APOD API returned {e.status_code}: {e.text}"}
     except Exception as e:
         return {"error": f"Failed to fetch APOD data: {str(e)}"}
 
 # ---- Exoplanet Data ----
+def exoplanet_path() -> str:
+    return os.path.join(SBDB_CATALOG_DIR, "exoplanets.npz")
+
+async def sync_exoplanets() -> None:
+    """Full pull of the mirrored ps columns (a few thousand rows) into the local catalog"""
+    query = f"SELECT {', '.join(EXOPLANET_FIELDS)} FROM ps WHERE default_flag = 1"
+    # Kept on disk only as an outage fallback; the catalog has its own file
+    body = await upstream.get_json("ipac", EXOPLANET_API, {"query": query, "format": "json"}, ttl=0, slow_s=math.inf, timeout=300)
+    if not isinstance(body, list):
+        raise ValueError("Unexpected Exoplanet Archive response")
+    rows = [[record.get(field) for field in EXOPLANET_FIELDS] for record in body]
+    columns = await asyncio.to_thread(catalog.columns_from_rows, EXOPLANET_FIELDS, rows, EXOPLANET_FIELDS)
+    await asyncio.to_thread(_exoplanets.replace, columns)
+    await asyncio.to_thread(_exoplanets.save, exoplanet_path())
+    print(f"Exoplanet catalog: {len(_exoplanets)} planets loaded")
+
+async def run_exoplanet_sync(interval: float) -> None:
+    """Load the saved mirror, then keep it at most `interval` seconds old"""
+    scheduler.background.set(True)
+    await asyncio.to_thread(_exoplanets.load, exoplanet_path())
+    while True:
+        if time.time() - _exoplanets.updated_at >= interval:
+            try:
+                await sync_exoplanets()
+            except Exception as e:
+                print(f"Exoplanet catalog sync failed: {e}")
+        await asyncio.sleep(min(interval, 600))
+
+class ExoplanetFilters:
+    """Filtering, sorting and paging of the exoplanet list (answered from the local mirror)"""
+
+    def __init__(
+        self,
+        offset: int = Query(0, ge=0, le=MAX_OFFSET, description="Rows to skip"),
+        sort: str = Query("pl_rade", description="Field to sort by, e.g. 'pl_rade', 'st_dist' or 'pl_eqt'"),
+        order: str = Query("desc", pattern="^(asc|desc)$", description="Sort direction"),
+        hostname: str = Query("", description="Comma-separated host star names"),
+        discoverymethod: str = Query("", description="Comma-separated discovery methods, e.g. 'Transit'"),
+        pl_rade_min: Optional[float] = Query(None, description="Minimum planet radius (Earth radii)"),
+        pl_rade_max: Optional[float] = Query(None, description="Maximum planet radius (Earth radii)"),
+        pl_masse_min: Optional[float] = Query(None, description="Minimum planet mass (Earth masses)"),
+        pl_masse_max: Optional[float] = Query(None, description="Maximum planet mass (Earth masses)"),
+        pl_eqt_min: Optional[float] = Query(None, description="Minimum equilibrium temperature (K)"),
+        pl_eqt_max: Optional[float] = Query(None, description="Maximum equilibrium temperature (K)"),
+        pl_orbper_min: Optional[float] = Query(None, description="Minimum orbital period (days)"),
+        pl_orbper_max: Optional[float] = Query(None, description="Maximum orbital period (days)"),
+        st_dist_min: Optional[float] = Query(None, description="Minimum distance to the system (pc)"),
+        st_dist_max: Optional[float] = Query(None, description="Maximum distance to the system (pc)"),
+        st_teff_min: Optional[float] = Query(None, description="Minimum stellar effective temperature (K)"),
+        st_teff_max: Optional[float] = Query(None, description="Maximum stellar effective temperature (K)"),
+        disc_year_min: Optional[float] = Query(None, description="Earliest discovery year"),
+        disc_year_max: Optional[float] = Query(None, description="Latest discovery year"),
+    ):
+        self.offset = offset
+        self.sort = sort
+        self.descending = order == "desc"
+        self.equals: Dict[str, List[str]] = {}
+        for field, value in (("hostname", hostname), ("discoverymethod", discoverymethod)):
+            values = [v.strip() for v in value.split(",") if v.strip()]
+            if values:
+                self.equals[field] = values
+        self.ranges = {
+            field: (low, high)
+            for field, low, high in (
+                ("pl_rade", pl_rade_min, pl_rade_max),
+                ("pl_masse", pl_masse_min, pl_masse_max),
+                ("pl_eqt", pl_eqt_min, pl_eqt_max),
+                ("pl_orbper", pl_orbper_min, pl_orbper_max),
+                ("st_dist", st_dist_min, st_dist_max),
+                ("st_teff", st_teff_min, st_teff_max),
+                ("disc_year", disc_year_min, disc_year_max),
+            )
+            if low is not None or high is not None
+        }
+
+def exoplanet_adql(filters: ExoplanetFilters, limit: int) -> str:
+    """The TAP query for the rows the mirror answers with (the first `offset` of them still to be skipped)"""
+    where = ["default_flag = 1"]
+    for field, values in filters.equals.items():
+        quoted = ", ".join("'" + v.replace("'", "''") + "'" for v in values)
+        where.append(f"{field} IN ({quoted})")
+    for field, (low, high) in filters.ranges.items():
+        if low is not None:
+            where.append(f"{field} >= {low!r}")
+        if high is not None:
+            where.append(f"{field} <= {high!r}")
+    order = ""
+    if filters.sort:
+        where.append(f"{filters.sort} IS NOT NULL")
+        order = f" ORDER BY {filters.sort} {'DESC' if filters.descending else 'ASC'}"
+    return f"SELECT TOP {filters.offset + limit} {', '.join(EXOPLANET_FIELDS)} FROM ps WHERE {' AND '.join(where)}{order}"
+
 @app.get("/api/nasa/exoplanets")
-async def nasa_exoplanets(limit: int = 100):
-    """Get exoplanet data from NASA Exoplanet Archive"""
+async def nasa_exoplanets(response: Response, limit: int = Query(100, ge=0, le=SBDB_MAX_LIMIT), filters: ExoplanetFilters = Depends()):
+    """Get exoplanet data from NASA Exoplanet Archive
+
+    Answered from the local mirror once it is loaded, with the number of
+    matches in X-Total-Count; until then the same query goes to the TAP service.
+    Planets with no value for the sort field are left out, as in the TAP query.
+    """
+    if filters.sort and filters.sort not in EXOPLANET_FIELDS:
+        raise HTTPException(status_code=400, detail=f"'{filters.sort}' is not available for exoplanets")
+    if _exoplanets.loaded:
+        total, rows = _exoplanets.query(
+            filters.equals, filters.ranges, filters.sort or None, filters.descending, filters.offset, limit, sorted_only=True
+        )
+        response.headers["X-Total-Count"] = str(total)
+        return [dict(zip(EXOPLANET_FIELDS, row)) for row in rows]
     try:
-        query = """
-        SELECT TOP {} 
-            pl_name, hostname, pl_orbper, pl_rade, pl_masse, pl_dens, 
-            pl_eqt, pl_orbincl, pl_orbeccen, pl_orbsmax, 
-            st_teff, st_rad, st_mass, st_dist, st_met, st_age
-        FROM ps 
-        WHERE pl_rade IS NOT NULL 
-        ORDER BY pl_rade DESC
-        """.format(limit)
-        
-        params = {"query": query, "format": "json"}
-        async with httpx.AsyncClient(timeout=60) as x:
-            r = await x.get(EXOPLANET_API, params=params)
-            if r.status_code == 200:
-                return r.json()
-            else:
-                return {"error": f"Exoplanet API returned {r.status_code}: {r.text[:200]}"}
+        params = {"query": exoplanet_adql(filters, limit), "format": "json"}
+        body = await _cache.get_or_fetch("exoplanets", params["query"], lambda: upstream.get_json("ipac", EXOPLANET_API, params))
+        return body[filters.offset:] if isinstance(body, list) else body
+    except upstream.UpstreamStatusError as e:
+        return {"error": f"Exoplanet API returned {e.status_code}: {e.text}"}
     except Exception as e:
         return {"error": f"Failed to fetch exoplanet data: {str(e)}"}
 
@@ -904,61 +1672,177 @@ async def nasa_mars_rover(rover: str = "curiosity", sol: int = None, earth_date:
         if camera:
             params["camera"] = camera
         
-        async with httpx.AsyncClient(timeout=60) as x:
-            r = await x.get(endpoint, params=params)
-            if r.status_code == 200:
-                return r.json()
-            else:
-                return {"error": f"Mars Rover API returned {r.status_code}: {r.text[:200]}"}
+        return await _cache.get_or_fetch("mars_rover", (rover, params), lambda: upstream.get_json("nasa", endpoint, params))
+    except upstream.UpstreamStatusError as e:
+        return {"error": f"Mars Rover API returned {e.status_code}: {e.text}"}
     except Exception as e:
         return {"error": f"Failed to fetch Mars rover data: {str(e)}"}
 
 # ---- Space Weather and Solar Activity ----
+def donki_path(feed: str) -> str:
+    return os.path.join(SBDB_CATALOG_DIR, f"donki_{feed}.json")
+
+async def sync_donki_feed(feed: str) -> None:
+    """Pull one feed from its high-water mark (less the overlap) through today and upsert by activity ID"""
+    store = _donki[feed]
+    start, end = store.window(date.today())
+    params = {"api_key": NASA_API_KEY, "startDate": start, "endDate": end}
+    try:
+        # Kept on disk only as an outage fallback; the events have their own file
+        body = await upstream.get_json("nasa", f"{SPACE_WEATHER_API}/{feed.upper()}", params, ttl=0)
+    except json.JSONDecodeError:
+        # DONKI answers an empty body for a range without events
+        body = []
+    if not isinstance(body, list):
+        raise ValueError(f"Unexpected DONKI {feed.upper()} response")
+    changed = await asyncio.to_thread(store.merge, body, end)
+    await asyncio.to_thread(store.save, donki_path(feed))
+    print(f"DONKI {feed.upper()}: {changed} events new or updated from {start}, {len(store)} total")
+
+async def sync_donki(feeds: List[str], background: bool) -> None:
+    """Sync the given feeds in parallel, recording failures for feeds that have nothing to serve"""
+    scheduler.background.set(background)
+    results = await asyncio.gather(*(sync_donki_feed(feed) for feed in feeds), return_exceptions=True)
+    for feed, result in zip(feeds, results):
+        if isinstance(result, upstream.UpstreamStatusError):
+            _donki_errors[feed] = f"Status {result.status_code}"
+        elif isinstance(result, Exception):
+            _donki_errors[feed] = str(result)
+        else:
+            _donki_errors.pop(feed, None)
+            continue
+        print(f"DONKI {feed.upper()} sync failed: {_donki_errors[feed]}")
+
 @app.get("/api/nasa/space-weather")
-async def nasa_space_weather():
-    """Get space weather data including solar flares"""
-    endpoints = {
-        "flr": f"{SPACE_WEATHER_API}/FLR",
-        "sep": f"{SPACE_WEATHER_API}/SEP", 
-        "cme": f"{SPACE_WEATHER_API}/CME",
-        "gst": f"{SPACE_WEATHER_API}/GST"
-    }
-    
+async def nasa_space_weather(start_date: str = None, end_date: str = None):
+    """Get space weather data including solar flares
+
+    Served from the local event stores, optionally limited to events between
+    start_date and end_date (YYYY-MM-DD). Stale stores are synced in the
+    background; a request only waits when a feed has never been pulled.
+    """
+    global _donki_sync
+    try:
+        start = date.fromisoformat(start_date).isoformat() if start_date else None
+        end = date.fromisoformat(end_date).isoformat() if end_date else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid date: {e}")
+
+    for feed, store in _donki.items():
+        if not store.loaded:
+            await asyncio.to_thread(store.load, donki_path(feed))
+    stale = [feed for feed, store in _donki.items() if time.time() - store.updated_at >= DONKI_REFRESH]
+    if stale and (_donki_sync is None or _donki_sync.done()):
+        _donki_sync = asyncio.ensure_future(sync_donki(stale, background=all(_donki[feed].loaded for feed in stale)))
+    if _donki_sync is not None and not _donki_sync.done() and not all(store.loaded for store in _donki.values()):
+        await asyncio.shield(_donki_sync)
+
     results = {}
-    async with httpx.AsyncClient(timeout=60) as x:
-        for event_type, url in endpoints.items():
-            try:
-                params = {"api_key": NASA_API_KEY, "startDate": "2024-01-01", "endDate": datetime.now().strftime("%Y-%m-%d")}
-                r = await x.get(url, params=params)
-                if r.status_code == 200:
-                    results[event_type] = r.json()
-                else:
-                    results[event_type] = {"error": f"Status {r.status_code}"}
-            except Exception as e:
-                results[event_type] = {"error": str(e)}
-    
+    for feed, store in _donki.items():
+        if store.loaded:
+            results[feed] = await asyncio.to_thread(store.query, start, end)
+        else:
+            results[feed] = {"error": _donki_errors.get(feed, "No data")}
     return results
 
 # ---- Enhanced Asteroid Watch ----
 @app.get("/api/nasa/asteroid-watch")
 async def nasa_asteroid_watch(start_date: str = None, end_date: str = None):
-    """Get asteroid watch data with enhanced information"""
-    if not start_date:
-        start_date = datetime.now().strftime("%Y-%m-%d")
-    if not end_date:
-        end_date = (datetime.now() + timedelta(days=7)).strftime("%Y-%m-%d")
-    
-    endpoint = f"{ASTEROID_WATCH_API}/feed"
-    params = {
-        "api_key": NASA_API_KEY,
-        "start_date": start_date,
-        "end_date": end_date
+    """Get asteroid watch data with enhanced information
+
+    Every day of the range is cached on its own; the days missing from the
+    cache are fetched in shards of at most NEOWS_SHARD_DAYS days, concurrently.
+    Expired days are served stale while they refresh in the background.
+    """
+    try:
+        first = date.fromisoformat(start_date) if start_date else date.today()
+        last = date.fromisoformat(end_date) if end_date else first + timedelta(days=7)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid date: {e}")
+    days = (last - first).days + 1
+    if days < 1 or days > NEOWS_MAX_DAYS:
+        raise HTTPException(status_code=400, detail=f"Date range must cover 1 to {NEOWS_MAX_DAYS} days")
+
+    # Past days no longer change; a day of slack covers the upstream's time zone
+    settled = (date.today() - timedelta(days=1)).toordinal()
+    errors = []
+
+    def day_ttl(n: int) -> Optional[float]:
+        return NEOWS_PAST_DAY_TTL if n < settled else None
+
+    def fetch_day(n: int) -> Callable[[], Awaitable[List[Any]]]:
+        """Reload of one cached day, for background refreshes"""
+        async def fetch() -> List[Any]:
+            day = date.fromordinal(n).isoformat()
+            params = {"api_key": NASA_API_KEY, "start_date": day, "end_date": day}
+            body = await upstream.get_json("nasa", f"{ASTEROID_WATCH_API}/feed", params, ttl=day_ttl(n))
+            by_day = body.get("near_earth_objects") if isinstance(body, dict) else None
+            if not isinstance(by_day, dict):
+                raise ValueError("Unexpected NeoWs feed response")
+            return by_day.get(day, [])
+
+        return fetch
+
+    # Cached days are served even when stale (refreshing in the background); absent ones are fetched below
+    found: Dict[int, List[Any]] = {}
+    missing: List[int] = []
+    for n in range(first.toordinal(), last.toordinal() + 1):
+        if _cache.has("neows_day", n):
+            found[n] = await _cache.get_or_fetch("neows_day", n, fetch_day(n), ttl=day_ttl(n))
+        else:
+            missing.append(n)
+
+    async def fetch_shard(lo: int, hi: int):
+        shard_start, shard_end = date.fromordinal(lo).isoformat(), date.fromordinal(hi).isoformat()
+        params = {"api_key": NASA_API_KEY, "start_date": shard_start, "end_date": shard_end}
+        try:
+            body = await upstream.get_json("nasa", f"{ASTEROID_WATCH_API}/feed", params, ttl=day_ttl(hi))
+        except upstream.UpstreamStatusError as e:
+            errors.append(f"{shard_start}..{shard_end}: Status {e.status_code}")
+            return
+        except Exception as e:
+            errors.append(f"{shard_start}..{shard_end}: {e}")
+            return
+        by_day = body.get("near_earth_objects") if isinstance(body, dict) else None
+        if not isinstance(by_day, dict):
+            errors.append(f"{shard_start}..{shard_end}: Unexpected NeoWs feed response")
+            return
+        for n in range(lo, hi + 1):
+            # Days without approaches may be left out of the feed
+            found[n] = by_day.get(date.fromordinal(n).isoformat(), [])
+            _cache.set("neows_day", n, found[n], ttl=day_ttl(n), fetch=fetch_day(n))
+
+    # Runs of consecutive missing days, cut to the feed's longest range
+    shards = [(lo, min(lo + NEOWS_SHARD_DAYS - 1, hi)) for run_lo, hi in segments.split_runs(missing) for lo in range(run_lo, hi + 1, NEOWS_SHARD_DAYS)]
+    if shards:
+        await gather_bounded([lambda shard=shard: fetch_shard(*shard) for shard in shards], NEOWS_CONCURRENCY)
+
+    near_earth_objects = {date.fromordinal(n).isoformat(): found[n] for n in sorted(found)}
+    result: Dict[str, Any] = {
+        "element_count": sum(len(objects) for objects in near_earth_objects.values()),
+        "near_earth_objects": near_earth_objects,
+    }
+    if errors:
+        if not near_earth_objects:
+            return {"error": "; ".join(errors)}
+        result["errors"] = errors
+    return result
+
+# ---- Cache statistics ----
+@app.get("/api/cache/stats")
+async def cache_stats():
+    """Hit/miss/eviction counters and size of the response cache"""
+    return {
+        **_cache.stats(),
+        "disk": diskstore.store.stats(),
+        "catalogs": {kind: cat.stats() for kind, cat in _catalogs.items()},
+        "exoplanets": _exoplanets.stats(),
+        "donki": {feed: store.stats() for feed, store in _donki.items()},
+        "live": _live.stats(),
+        "upstreams": {name: breaker.stats() for name, breaker in upstream.breakers.items()},
+        "schedulers": {name: sched.stats() for name, sched in upstream.schedulers.items()},
+        "backfills": len(_backfills),
     }
-    
-    async with httpx.AsyncClient(timeout=60) as x:
-        r = await x.get(endpoint, params=params)
-        r.raise_for_status()
-        return r.json()
 
 # ---- Satellite and Spacecraft Tracking ----
 @app.get("/api/satellites")
@@ -994,18 +1878,15 @@ async def health():
     }
 
 # ---- Additional endpoints ----
-@app.get("/api/planet-info/{planet_id}")
-async def get_planet_info(planet_id: str):
-    """Get detailed information about a specific planet"""
-    if planet_id not in ORBITAL_ELEMENTS:
-        raise HTTPException(status_code=404, detail="Planet not found")
-    
+# Their inputs are static, so payloads are built and serialized once (see static.py)
+def planet_info(planet_id: str) -> Dict[str, Any]:
+    """Detailed information about a planet in ORBITAL_ELEMENTS"""
     elem = ORBITAL_ELEMENTS[planet_id]
-    
+
     # Calculate additional derived information
     au_distance = elem["a"] / 149597870.7  # Convert km to AU
     escape_velocity = math.sqrt(2 * 6.674e-11 * elem["mass"] / (elem["radius"] * 1000)) / 1000  # km/s
-    
+
     return {
         "id": planet_id,
         "name": elem["name"],
@@ -1026,12 +1907,11 @@ async def get_planet_info(planet_id: str):
         "current_position": "Real-time position calculated from orbital mechanics"
     }
 
-@app.get("/api/solar-system-overview")
-async def get_solar_system_overview():
-    """Get comprehensive overview of the solar system including moons"""
+def solar_system_overview() -> Dict[str, Any]:
+    """Overview of the solar system including moons"""
     planets = []
     moons = []
-    
+
     for obj_id, obj in CELESTIAL_OBJECTS.items():
         if obj['type'] == 'planet':
             au_distance = obj["a"] / 149597870.7
@@ -1059,10 +1939,10 @@ async def get_solar_system_overview():
                 "atmosphere": obj["atmosphere"]
             }
             moons.append(moon_data)
-    
+
     # Sort by distance from Sun
     planets.sort(key=lambda p: p["distance_au"])
-    
+
     return {
         "solar_system": {
             "star": {
@@ -1079,32 +1959,19 @@ async def get_solar_system_overview():
         }
     }
 
-@app.get("/api/celestial-objects")
-async def get_celestial_objects():
-    """Get all celestial objects with their properties"""
-    return {
-        "objects": CELESTIAL_OBJECTS,
-        "textures": NASA_TEXTURES,
-        "total_count": len(CELESTIAL_OBJECTS)
-    }
-
-@app.get("/api/celestial-objects/{object_id}")
-async def get_celestial_object(object_id: str):
-    """Get detailed information about a specific celestial object"""
-    if object_id not in CELESTIAL_OBJECTS:
-        raise HTTPException(status_code=404, detail="Object not found")
-    
+def celestial_object(object_id: str) -> Dict[str, Any]:
+    """Detailed information about an object in CELESTIAL_OBJECTS"""
     obj = CELESTIAL_OBJECTS[object_id]
-    
+
     # Calculate additional derived information
     au_distance = obj["a"] / 149597870.7 if obj["a"] > 0 else 0
     escape_velocity = 0
     if obj["mass"] > 0 and obj["radius"] > 0:
         escape_velocity = math.sqrt(2 * 6.674e-11 * obj["mass"] / (obj["radius"] * 1000)) / 1000  # km/s
-    
+
     # Get texture URL
     texture_url = NASA_TEXTURES.get(object_id, "")
-    
+
     result = {
         "id": object_id,
         "name": obj["name"],
@@ -1129,13 +1996,46 @@ async def get_celestial_object(object_id: str):
             "rings": obj["rings"]
         }
     }
-    
+
     # Add moon information for planets
     if obj["type"] == "planet" and "moons" in obj:
         result["moons"] = obj["moons"]
-    
+
     # Add parent information for moons
     if obj["type"] == "moon" and "parent" in obj:
         result["parent"] = obj["parent"]
-    
-    return result
\ No newline at end of file
+
+    return result
+
+PLANET_INFO = {planet_id: static.Payload(planet_info(planet_id)) for planet_id in ORBITAL_ELEMENTS}
+SOLAR_SYSTEM_OVERVIEW = static.Payload(solar_system_overview())
+CELESTIAL_OBJECTS_ALL = static.Payload({
+    "objects": CELESTIAL_OBJECTS,
+    "textures": NASA_TEXTURES,
+    "total_count": len(CELESTIAL_OBJECTS)
+})
+CELESTIAL_OBJECT = {object_id: static.Payload(celestial_object(object_id)) for object_id in CELESTIAL_OBJECTS}
+
+@app.get("/api/planet-info/{planet_id}")
+async def get_planet_info(planet_id: str, request: Request):
+    """Get detailed information about a specific planet"""
+    if planet_id not in PLANET_INFO:
+        raise HTTPException(status_code=404, detail="Planet not found")
+    return static.respond(PLANET_INFO[planet_id], request)
+
+@app.get("/api/solar-system-overview")
+async def get_solar_system_overview(request: Request):
+    """Get comprehensive overview of the solar system including moons"""
+    return static.respond(SOLAR_SYSTEM_OVERVIEW, request)
+
+@app.get("/api/celestial-objects")
+async def get_celestial_objects(request: Request):
+    """Get all celestial objects with their properties"""
+    return static.respond(CELESTIAL_OBJECTS_ALL, request)
+
+@app.get("/api/celestial-objects/{object_id}")
+async def get_celestial_object(object_id: str, request: Request):
+    """Get detailed information about a specific celestial object"""
+    if object_id not in CELESTIAL_OBJECT:
+        raise HTTPException(status_code=404, detail="Object not found")
+    return static.respond(CELESTIAL_OBJECT[object_id], request)
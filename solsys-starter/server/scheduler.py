@@ -0,0 +1,164 @@
+"""Outbound request scheduling for rate-limited upstreams (api.nasa.gov).
+
+Every API key gets a token bucket sized to its hourly quota and refilled
+continuously. Calls wait for a token in priority order (interactive requests
+before background refreshes), and the bucket is pulled down to the quota the
+upstream reports in X-RateLimit-Remaining. A call that would wait too long is
+refused (RateLimited) so the caller can fall back to stored data instead of
+spending the quota on a 429. Throttled or unavailable answers (429, 503) are
+retried with jittered exponential backoff.
+"""
+import asyncio
+import heapq
+import itertools
+import os
+import random
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Tuple
+
+INTERACTIVE = 0
+BACKGROUND = 1
+# True inside background work (cache refreshes, catalog syncs); their calls yield to interactive ones
+background: ContextVar[bool] = ContextVar("background", default=False)
+
+# api.nasa.gov quotas per key: DEMO_KEY is limited per IP to 30 an hour, registered keys to 1000
+DEMO_KEY_PER_HOUR = 30
+KEY_PER_HOUR = int(os.getenv("NASA_RATE_LIMIT_PER_HOUR", "1000"))
+# Longest wait for a token before giving up, per priority
+MAX_WAIT_S = {INTERACTIVE: 10.0, BACKGROUND: 600.0}
+RETRY_STATUSES = (429, 503)
+MAX_RETRIES = 3
+BACKOFF_BASE_S = 1.0
+BACKOFF_CAP_S = 30.0
+
+
+class RateLimited(Exception):
+    """No token within the caller's maximum wait"""
+
+
+def priority() -> int:
+    return BACKGROUND if background.get() else INTERACTIVE
+
+
+def retry_delay(attempt: int, retry_after: Optional[str] = None) -> float:
+    """Seconds before retry number attempt + 1: Retry-After when given, else full-jitter exponential backoff"""
+    if retry_after:
+        try:
+            return min(float(retry_after), BACKOFF_CAP_S)
+        except ValueError:
+            pass
+    return random.uniform(0, min(BACKOFF_CAP_S, BACKOFF_BASE_S * 2 ** attempt))
+
+
+class TokenBucket:
+    """Hourly quota of one key, handed out in priority order"""
+
+    def __init__(self, per_hour: int):
+        self.capacity = float(per_hour)
+        self.rate = per_hour / 3600.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.remaining: Optional[int] = None
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._order = itertools.count()
+        self._pump: Optional[asyncio.Task] = None
+        self.granted = 0
+        self.refused = 0
+        self.waited = 0
+        self.wait_s = 0.0
+        self.max_depth = 0
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    @property
+    def depth(self) -> int:
+        return sum(1 for *_, fut in self._waiters if not fut.done())
+
+    async def acquire(self, prio: int) -> None:
+        self._refill()
+        if not self.depth and self.tokens >= 1:
+            self.tokens -= 1
+            self.granted += 1
+            return
+        fut = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (prio, next(self._order), fut))
+        self.max_depth = max(self.max_depth, self.depth)
+        if self._pump is None or self._pump.done():
+            self._pump = asyncio.ensure_future(self._run())
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(asyncio.shield(fut), MAX_WAIT_S[prio])
+        except asyncio.TimeoutError:
+            # Unless it was granted just as the wait ran out
+            if not fut.done():
+                fut.cancel()
+                self.refused += 1
+                raise RateLimited(f"No upstream quota within {MAX_WAIT_S[prio]:g} s")
+        except asyncio.CancelledError:
+            fut.cancel()
+            raise
+        self.waited += 1
+        self.wait_s += time.monotonic() - started
+
+    async def _run(self) -> None:
+        """Grant tokens to waiters, highest priority first, as they refill"""
+        while self._waiters:
+            self._refill()
+            if self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                continue
+            _, _, fut = heapq.heappop(self._waiters)
+            if fut.done():
+                continue
+            self.tokens -= 1
+            self.granted += 1
+            fut.set_result(None)
+
+    def observe(self, headers: Any) -> None:
+        """Pull the bucket down to the quota the upstream says is left"""
+        try:
+            remaining = int(headers.get("x-ratelimit-remaining"))
+        except (TypeError, ValueError):
+            return
+        self.remaining = remaining
+        self._refill()
+        self.tokens = min(self.tokens, float(remaining))
+
+    def stats(self) -> Dict[str, Any]:
+        self._refill()
+        return {
+            "tokens": round(self.tokens, 2),
+            "per_hour": int(self.capacity),
+            "upstream_remaining": self.remaining,
+            "queue_depth": self.depth,
+            "max_queue_depth": self.max_depth,
+            "granted": self.granted,
+            "refused": self.refused,
+            "mean_wait_s": round(self.wait_s / self.waited, 3) if self.waited else 0.0,
+        }
+
+
+class Scheduler:
+    """Token buckets per API key for one upstream host"""
+
+    def __init__(self) -> None:
+        self.buckets: Dict[str, TokenBucket] = {}
+        self.retries = 0
+        self.throttled = 0
+
+    def bucket(self, api_key: str) -> TokenBucket:
+        if api_key not in self.buckets:
+            self.buckets[api_key] = TokenBucket(DEMO_KEY_PER_HOUR if api_key in ("", "DEMO_KEY") else KEY_PER_HOUR)
+        return self.buckets[api_key]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "retries": self.retries,
+            "throttled": self.throttled,
+            # Keys are masked; only their last characters identify them
+            "keys": {(key if key == "DEMO_KEY" else f"...{key[-4:]}"): b.stats() for key, b in self.buckets.items()},
+        }
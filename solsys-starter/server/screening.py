@@ -0,0 +1,145 @@
+"""Close-approach screening of small bodies against a planet.
+
+Screening runs in two passes:
+- a coarse pass evaluates every body on the planet's sample grid (in batches)
+  and keeps the local minima of the distance that could dip below the
+  threshold between samples,
+- a refinement pass finds the instant where the range rate changes sign
+  (relative position . relative velocity = 0) inside each candidate's bracket
+  by bisection, for all candidates at once.
+
+Small bodies are two-body propagated from their elements; the planet is
+interpolated from its sampled states with cubic Hermite splines.
+"""
+import math
+from typing import Dict, Sequence, Tuple
+
+import numpy as np
+
+import kepler
+import segments
+
+# Bisection stops once brackets are narrower than this (seconds)
+REFINE_TOLERANCE_S = 1.0
+# Small-body velocities for the range rate are central differences over this step (seconds)
+VELOCITY_STEP_S = 60.0
+# Working memory of one coarse-pass batch (bytes)
+BATCH_BUDGET_BYTES = 64 * 2**20
+# (samples, bodies, 3) float64 arrays alive at once in the coarse pass
+BATCH_ARRAYS = 4
+
+
+def batch_size(samples: int) -> int:
+    """Bodies evaluated together in the coarse pass so a batch stays within BATCH_BUDGET_BYTES"""
+    return max(1, BATCH_BUDGET_BYTES // (max(samples, 1) * 3 * 8 * BATCH_ARRAYS))
+
+
+def planet_states(t_grid: np.ndarray, r: np.ndarray, v: np.ndarray, t: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Hermite-interpolated planet position and velocity at times t, each (len(t), 3)"""
+    k = np.clip(np.searchsorted(t_grid, t, side="right") - 1, 0, len(t_grid) - 2)
+    t0 = t_grid[k][:, None]
+    h = (t_grid[k + 1] - t_grid[k])[:, None]
+    return segments.hermite(t0, h, r[k], v[k], r[k + 1], v[k + 1], t[:, None])
+
+
+def _positions(elements: Sequence[np.ndarray], t: np.ndarray) -> np.ndarray:
+    """(len(t), 3) positions of body i at t[i]"""
+    return kepler.element_positions(*elements, t[None, :])[0]
+
+
+def _relative(elements: Sequence[np.ndarray], t_grid: np.ndarray, r: np.ndarray, v: np.ndarray, t: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Relative position and velocity (body minus planet) of body i at t[i]"""
+    p, pv = planet_states(t_grid, r, v, t)
+    ahead = _positions(elements, t + VELOCITY_STEP_S)
+    behind = _positions(elements, t - VELOCITY_STEP_S)
+    here = _positions(elements, t)
+    return here - p, (ahead - behind) / (2 * VELOCITY_STEP_S) - pv
+
+
+def coarse_candidates(elements: Sequence[np.ndarray], t_grid: np.ndarray, r: np.ndarray, threshold_km: float) -> Tuple[np.ndarray, np.ndarray]:
+    """(body, sample) index pairs of sampled distance minima that may fall within threshold_km"""
+    bodies, samples = [], []
+    n_bodies = len(elements[0])
+    # Neighbouring sample times (an edge sample is its own neighbour) and the longer gap
+    before = np.concatenate([t_grid[:1], t_grid[:-1]])
+    after = np.concatenate([t_grid[1:], t_grid[-1:]])
+    gap = np.maximum(t_grid - before, after - t_grid)[:, None]
+    size = batch_size(len(t_grid))
+    for start in range(0, n_bodies, size):
+        batch = [column[start:start + size] for column in elements]
+        rel = kepler.element_positions(*batch, t_grid) - r[:, None, :]
+        d = np.linalg.norm(rel, axis=2)
+        d = np.where(np.isfinite(d), d, np.inf)
+        padded = np.pad(d, ((1, 1), (0, 0)), constant_values=np.inf)
+        minimum = (d <= padded[:-2]) & (d <= padded[2:]) & np.isfinite(d)
+        # Between samples the distance can drop by about the relative speed times a step
+        moved = np.concatenate([rel[1:], rel[-1:]]) - np.concatenate([rel[:1], rel[:-1]])
+        speed = np.linalg.norm(moved, axis=2) / np.maximum(after - before, 1.0)[:, None]
+        minimum &= d - speed * gap <= threshold_km
+        k, b = np.nonzero(minimum)
+        samples.append(k)
+        bodies.append(b + start)
+    if not bodies:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    return np.concatenate(bodies), np.concatenate(samples)
+
+
+def refine(
+    elements: Sequence[np.ndarray],
+    t_grid: np.ndarray,
+    r: np.ndarray,
+    v: np.ndarray,
+    bodies: np.ndarray,
+    samples: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(time, distance km, relative speed km/s) of the closest approach within each candidate's bracket"""
+    elems = [column[bodies] for column in elements]
+    lo = t_grid[np.maximum(samples - 1, 0)]
+    hi = t_grid[np.minimum(samples + 1, len(t_grid) - 1)]
+    width = float(np.max(hi - lo)) if len(lo) else 0.0
+    iterations = max(1, math.ceil(math.log2(max(width, REFINE_TOLERANCE_S) / REFINE_TOLERANCE_S)))
+    for _ in range(iterations):
+        mid = (lo + hi) / 2
+        rel, rel_v = _relative(elems, t_grid, r, v, mid)
+        closing = (rel * rel_v).sum(axis=1) < 0
+        lo = np.where(closing, mid, lo)
+        hi = np.where(closing, hi, mid)
+
+    # Brackets whose range rate never changed sign end at an edge; keep whichever point is closest
+    best_t = (lo + hi) / 2
+    best_d = np.full(len(best_t), np.inf)
+    best_speed = np.zeros(len(best_t))
+    for t in (best_t, t_grid[np.maximum(samples - 1, 0)], t_grid[np.minimum(samples + 1, len(t_grid) - 1)]):
+        rel, rel_v = _relative(elems, t_grid, r, v, t)
+        d = np.linalg.norm(rel, axis=1)
+        better = d < best_d
+        best_t = np.where(better, t, best_t)
+        best_d = np.where(better, d, best_d)
+        best_speed = np.where(better, np.linalg.norm(rel_v, axis=1), best_speed)
+    return best_t, best_d, best_speed
+
+
+def screen(
+    elements: Sequence[np.ndarray],
+    t_grid: np.ndarray,
+    r: np.ndarray,
+    v: np.ndarray,
+    threshold_km: float,
+) -> Dict[str, np.ndarray]:
+    """Close approaches within threshold_km of a planet sampled as (t_grid, r, v)
+
+    elements are the kepler.element_positions columns of the bodies. Returns
+    arrays "body" (index into the elements), "t", "distance" (km) and
+    "speed" (km/s), sorted by distance, plus the number of "candidates" refined.
+    """
+    bodies, samples = coarse_candidates(elements, t_grid, r, threshold_km)
+    t, d, speed = refine(elements, t_grid, r, v, bodies, samples)
+    # Neighbouring minima of one pass can refine to the same instant
+    hit = d <= threshold_km
+    bodies, t, d, speed = bodies[hit], t[hit], d[hit], speed[hit]
+    order = np.lexsort((t, bodies))
+    keep = np.ones(len(order), dtype=bool)
+    keep[1:] = (bodies[order][1:] != bodies[order][:-1]) | (np.abs(np.diff(t[order])) > REFINE_TOLERANCE_S * 10)
+    order = order[keep]
+    order = order[np.argsort(d[order], kind="stable")]
+    return {"body": bodies[order], "t": t[order], "distance": d[order], "speed": speed[order], "candidates": len(samples)}
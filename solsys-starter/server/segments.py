@@ -0,0 +1,130 @@
+"""Per-body ephemeris segments on aligned time chunks.
+
+A request's samples lie on the absolute grid `phase + k * step` (Unix seconds),
+where `phase` is the start time modulo the step. The grid is cut into chunks of
+CHUNK_SAMPLES samples, and each (body, center, step, phase, chunk) segment is
+cached on its own. Requests with different windows, or different body lists,
+then reuse whatever chunks they overlap.
+
+A segment is a dict of columnar arrays: {"t": (n,), "r": (n, 3), "v": (n, 3),
+"source": "horizons" | "kepler"}.
+"""
+import math
+from datetime import datetime, timedelta
+from typing import Any, Dict, Hashable, List, Sequence, Tuple
+
+import numpy as np
+
+import kepler
+
+CHUNK_SAMPLES = 256
+
+
+def empty_segment(source: str) -> Dict[str, Any]:
+    return {"t": np.empty(0), "r": np.empty((0, 3)), "v": np.empty((0, 3)), "source": source}
+
+
+def horizons_time(t: float) -> str:
+    """Unix seconds as a Horizons START_TIME/STOP_TIME string"""
+    return (datetime(1970, 1, 1) + timedelta(seconds=t)).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def split_runs(chunks: Sequence[int]) -> List[Tuple[int, int]]:
+    """Group sorted chunk ids into inclusive runs of consecutive ids"""
+    runs: List[Tuple[int, int]] = []
+    for c in chunks:
+        if runs and runs[-1][1] == c - 1:
+            runs[-1] = (runs[-1][0], c)
+        else:
+            runs.append((c, c))
+    return runs
+
+
+def chunk_key(body_id: str, center: str, step_s: float, phase: float, c: int) -> Hashable:
+    """Cache key of one body's segment for chunk c of the grid phase + k * step_s"""
+    return (body_id, center, step_s, phase, c)
+
+
+class EphemGrid:
+    """The samples of one request, located on its absolute chunked grid"""
+
+    def __init__(self, step_s: float, phase: float, k0: int, k1: int):
+        self.step_s = step_s
+        self.phase = phase
+        self.k0 = k0
+        self.k1 = k1
+
+    @classmethod
+    def from_request(cls, start: str, stop: str, step: str) -> "EphemGrid":
+        """The grid from start to stop (inclusive) every step"""
+        step_s = kepler.parse_step_hours(step) * 3600.0
+        if step_s <= 0:
+            raise ValueError(f"Invalid step size: {step}")
+        start_s = kepler.to_unix(start)
+        stop_s = kepler.to_unix(stop)
+        phase = round(start_s % step_s, 3)
+        k0 = int(round((start_s - phase) / step_s))
+        k1 = int(math.floor((stop_s - phase) / step_s + 1e-9))
+        return cls(step_s, phase, k0, k1)
+
+    def __len__(self) -> int:
+        return max(0, self.k1 - self.k0 + 1)
+
+    def time(self, k: int) -> float:
+        return self.phase + k * self.step_s
+
+    def times(self, ka: int, kb: int) -> np.ndarray:
+        return self.phase + np.arange(ka, kb + 1) * self.step_s
+
+    def index(self, t: np.ndarray) -> np.ndarray:
+        return np.rint((t - self.phase) / self.step_s).astype(np.int64)
+
+    def chunks(self) -> List[int]:
+        if not len(self):
+            return []
+        return list(range(self.k0 // CHUNK_SAMPLES, self.k1 // CHUNK_SAMPLES + 1))
+
+    def chunk_bounds(self, c: int) -> Tuple[int, int]:
+        return c * CHUNK_SAMPLES, (c + 1) * CHUNK_SAMPLES - 1
+
+    def chunk_times(self, c: int) -> np.ndarray:
+        return self.times(*self.chunk_bounds(c))
+
+    def key(self, body_id: str, center: str, c: int) -> Hashable:
+        return chunk_key(body_id, center, self.step_s, self.phase, c)
+
+    def split(self, arrays: Dict[str, np.ndarray], first: int, last: int, source: str) -> Dict[int, Dict[str, Any]]:
+        """Cut arrays covering chunks first..last into per-chunk segments (only samples on the grid)"""
+        k = self.index(arrays["t"])
+        on_grid = np.abs(self.phase + k * self.step_s - arrays["t"]) < 1.0
+        chunk_of = np.floor_divide(k, CHUNK_SAMPLES)
+        out = {}
+        for c in range(first, last + 1):
+            mask = on_grid & (chunk_of == c)
+            out[c] = {"t": arrays["t"][mask], "r": arrays["r"][mask], "v": arrays["v"][mask], "source": source}
+        return out
+
+    def assemble(self, segments: Sequence[Dict[str, Any]]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Concatenate a body's chunk segments and keep the samples inside this request"""
+        t = np.concatenate([s["t"] for s in segments]) if segments else np.empty(0)
+        r = np.concatenate([s["r"] for s in segments]) if segments else np.empty((0, 3))
+        v = np.concatenate([s["v"] for s in segments]) if segments else np.empty((0, 3))
+        k = self.index(t)
+        keep = (k >= self.k0) & (k <= self.k1)
+        return t[keep], r[keep], v[keep]
+
+
+def is_complete(segment: Dict[str, Any]) -> bool:
+    return len(segment["t"]) == CHUNK_SAMPLES
+
+
+def hermite(t0: float, h: float, p0: np.ndarray, v0: np.ndarray, p1: np.ndarray, v1: np.ndarray, t: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Cubic Hermite position and velocity at t between states (p0, v0) at t0 and (p1, v1) at t0 + h
+
+    Velocities are per second; arrays may carry leading body dimensions.
+    """
+    s = (t - t0) / h
+    s2, s3 = s * s, s * s * s
+    p = (2 * s3 - 3 * s2 + 1) * p0 + (s3 - 2 * s2 + s) * h * v0 + (3 * s2 - 2 * s3) * p1 + (s3 - s2) * h * v1
+    v = ((6 * s2 - 6 * s) * p0 + (6 * s - 6 * s2) * p1) / h + (3 * s2 - 4 * s + 1) * v0 + (3 * s2 - 2 * s) * v1
+    return p, v
@@ -0,0 +1,184 @@
+"""k-d tree over small-body positions at one epoch.
+
+The tree is built once per (kind, epoch) and answers viewport (box or convex
+frustum), radius and k-nearest queries without touching most of the catalog.
+Points are reordered so every node covers a contiguous range of them; each node
+keeps the tight bounding box of its points, so a query can accept a whole node
+when its box lies inside the region and reject it when the box lies outside,
+and only partially covered leaves are tested point by point.
+"""
+import heapq
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+LEAF_SIZE = 64
+
+
+class KDTree:
+    """Bounding-box k-d tree over an (n, 3) array; rows with NaNs are left out"""
+
+    def __init__(self, points: np.ndarray, leaf_size: int = LEAF_SIZE):
+        points = np.asarray(points, dtype=float)
+        keep = np.flatnonzero(np.isfinite(points).all(axis=1))
+        self.ids = keep  # row in the original array of each reordered point
+        self.points = points[keep]
+        self.leaf_size = leaf_size
+        lo: List[np.ndarray] = []
+        hi: List[np.ndarray] = []
+        ranges: List[Tuple[int, int]] = []
+        children: List[Tuple[int, int]] = []
+
+        def add(start: int, end: int) -> int:
+            block = self.points[start:end]
+            lo.append(block.min(axis=0) if end > start else np.full(3, np.inf))
+            hi.append(block.max(axis=0) if end > start else np.full(3, -np.inf))
+            ranges.append((start, end))
+            children.append((-1, -1))
+            return len(ranges) - 1
+
+        # Split nodes on their widest axis at the median until leaves are small enough
+        stack = [add(0, len(self.points))]
+        while stack:
+            node = stack.pop()
+            start, end = ranges[node]
+            if end - start <= leaf_size:
+                continue
+            axis = int(np.argmax(hi[node] - lo[node]))
+            mid = (start + end) // 2
+            part = np.argpartition(self.points[start:end, axis], mid - start) + start
+            self.points[start:end] = self.points[part]
+            self.ids[start:end] = self.ids[part]
+            left, right = add(start, mid), add(mid, end)
+            children[node] = (left, right)
+            stack.extend((left, right))
+
+        self.lo = np.array(lo).reshape(-1, 3)
+        self.hi = np.array(hi).reshape(-1, 3)
+        self.ranges = np.array(ranges, dtype=np.int64).reshape(-1, 2)
+        self.children = np.array(children, dtype=np.int64).reshape(-1, 2)
+
+    def __len__(self) -> int:
+        return len(self.points)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in (self.points, self.ids, self.lo, self.hi, self.ranges, self.children))
+
+    # ---- region queries ----
+    def _collect(self, classify, contains) -> np.ndarray:
+        """Reordered indices of points in a region
+
+        classify(lo, hi) is -1 when a box is outside the region, 1 when it is
+        inside and 0 otherwise; contains(points) is the per-point mask.
+        """
+        if not len(self.points):
+            return np.empty(0, dtype=np.int64)
+        found: List[np.ndarray] = []
+        stack = [0]
+        while stack:
+            node = stack.pop()
+            side = classify(self.lo[node], self.hi[node])
+            if side < 0:
+                continue
+            start, end = self.ranges[node]
+            if side > 0:
+                found.append(np.arange(start, end))
+                continue
+            left, right = self.children[node]
+            if left < 0:
+                found.append(start + np.flatnonzero(contains(self.points[start:end])))
+            else:
+                stack.extend((right, left))
+        return np.concatenate(found) if found else np.empty(0, dtype=np.int64)
+
+    def box(self, low: Sequence[float], high: Sequence[float]) -> np.ndarray:
+        """Original rows inside the axis-aligned box [low, high]"""
+        low = np.asarray(low, dtype=float)
+        high = np.asarray(high, dtype=float)
+
+        def classify(lo: np.ndarray, hi: np.ndarray) -> int:
+            if (hi < low).any() or (lo > high).any():
+                return -1
+            return 1 if (lo >= low).all() and (hi <= high).all() else 0
+
+        def contains(p: np.ndarray) -> np.ndarray:
+            return ((p >= low) & (p <= high)).all(axis=1)
+
+        return self.ids[self._collect(classify, contains)]
+
+    def convex(self, planes: np.ndarray) -> np.ndarray:
+        """Original rows inside every plane (a, b, c, d), i.e. a*x + b*y + c*z + d >= 0, e.g. a view frustum"""
+        planes = np.asarray(planes, dtype=float).reshape(-1, 4)
+        normals, offsets = planes[:, :3], planes[:, 3]
+        positive = normals >= 0
+
+        def classify(lo: np.ndarray, hi: np.ndarray) -> int:
+            # Box corners furthest along and against each plane normal
+            far = np.where(positive, hi, lo)
+            near = np.where(positive, lo, hi)
+            if ((normals * far).sum(axis=1) + offsets < 0).any():
+                return -1
+            return 1 if ((normals * near).sum(axis=1) + offsets >= 0).all() else 0
+
+        def contains(p: np.ndarray) -> np.ndarray:
+            return (p @ normals.T + offsets >= 0).all(axis=1)
+
+        return self.ids[self._collect(classify, contains)]
+
+    def within(self, center: Sequence[float], radius: float) -> Tuple[np.ndarray, np.ndarray]:
+        """(original rows, distances) of points within radius of center, nearest first"""
+        center = np.asarray(center, dtype=float)
+        r2 = radius * radius
+
+        def classify(lo: np.ndarray, hi: np.ndarray) -> int:
+            nearest = np.clip(center, lo, hi)
+            if ((nearest - center) ** 2).sum() > r2:
+                return -1
+            furthest = np.maximum(np.abs(lo - center), np.abs(hi - center))
+            return 1 if (furthest ** 2).sum() <= r2 else 0
+
+        def contains(p: np.ndarray) -> np.ndarray:
+            return ((p - center) ** 2).sum(axis=1) <= r2
+
+        idx = self._collect(classify, contains)
+        dist = np.linalg.norm(self.points[idx] - center, axis=1)
+        order = np.argsort(dist, kind="stable")
+        return self.ids[idx[order]], dist[order]
+
+    # ---- nearest neighbours ----
+    def nearest(self, point: Sequence[float], k: int = 10, max_distance: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """(original rows, distances) of the k points nearest to point, nearest first"""
+        point = np.asarray(point, dtype=float)
+        if not len(self.points) or k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        bound = np.inf if max_distance is None else float(max_distance)
+        # Best k so far as a max-heap of (-distance, index); nodes visited closest box first
+        best: List[Tuple[float, int]] = []
+        queue = [(0.0, 0)]
+        while queue:
+            box_distance, node = heapq.heappop(queue)
+            worst = -best[0][0] if len(best) == k else bound
+            if box_distance > worst:
+                break
+            left, right = self.children[node]
+            if left < 0:
+                start, end = self.ranges[node]
+                dist = np.linalg.norm(self.points[start:end] - point, axis=1)
+                for i in np.argsort(dist)[:k]:
+                    d = float(dist[i])
+                    if d > bound:
+                        break
+                    if len(best) < k:
+                        heapq.heappush(best, (-d, start + int(i)))
+                    elif d < -best[0][0]:
+                        heapq.heapreplace(best, (-d, start + int(i)))
+                    else:
+                        break
+                continue
+            for child in (left, right):
+                gap = np.maximum(self.lo[child] - point, 0) + np.maximum(point - self.hi[child], 0)
+                heapq.heappush(queue, (float(np.sqrt((gap ** 2).sum())), int(child)))
+        best.sort(reverse=True)
+        idx = np.array([i for _, i in best], dtype=np.int64)
+        return self.ids[idx], np.array([-d for d, _ in best])
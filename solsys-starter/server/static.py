@@ -0,0 +1,39 @@
+"""Pre-serialized responses for endpoints whose payloads never change while the server runs.
+
+Payloads are encoded to JSON bytes once, with a strong ETag (a hash of the
+bytes). Serving one is a byte copy; a request whose If-None-Match matches gets
+an empty 304 instead.
+"""
+import hashlib
+import json
+import os
+from typing import Any, Optional
+
+from fastapi import Request, Response
+
+# Clients and proxies may reuse a payload this long before revalidating with the ETag
+CACHE_CONTROL = f"public, max-age={int(os.getenv('STATIC_MAX_AGE', '86400'))}"
+
+
+class Payload:
+    """JSON bytes and their ETag"""
+
+    def __init__(self, value: Any):
+        # Same encoding as FastAPI's JSONResponse
+        self.body = json.dumps(value, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+        self.etag = '"' + hashlib.sha256(self.body).hexdigest()[:32] + '"'
+
+
+def _matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    # Weak comparison, as RFC 9110 asks for If-None-Match
+    return "*" in tags or etag in (tag[2:] if tag.startswith("W/") else tag for tag in tags)
+
+
+def respond(payload: Payload, request: Request) -> Response:
+    headers = {"ETag": payload.etag, "Cache-Control": CACHE_CONTROL}
+    if _matches(request.headers.get("if-none-match"), payload.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=payload.body, media_type="application/json", headers=headers)
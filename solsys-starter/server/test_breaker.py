@@ -0,0 +1,137 @@
+import breaker
+from breaker import CircuitBreaker
+
+
+def make_breaker(monkeypatch, clock, slow_s: float = 2.0):
+    monkeypatch.setattr(breaker.time, "monotonic", clock)
+    return CircuitBreaker("test", slow_s)
+
+
+def trip(b: CircuitBreaker) -> None:
+    for _ in range(breaker.MIN_CALLS):
+        assert b.allow()
+        b.record(False, 0.1)
+    assert b.state == "open"
+
+
+def test_opens_when_too_many_calls_fail(monkeypatch, clock):
+    b = make_breaker(monkeypatch, clock)
+    for _ in range(breaker.MIN_CALLS - 1):
+        b.record(False, 0.1)
+    assert b.state == "closed"
+    b.record(False, 0.1)
+    assert b.state == "open"
+    assert not b.allow()
+    assert (b.stats()["trips"], b.stats()["rejected"]) == (1, 1)
+
+
+def test_stays_closed_below_the_failure_ratio(monkeypatch, clock):
+    b = make_breaker(monkeypatch, clock)
+    for i in range(breaker.WINDOW):
+        b.record(i % 3 == 0 or i % 3 == 1, 0.1)
+    assert b.state == "closed"
+
+
+def test_slow_calls_count_as_failures(monkeypatch, clock):
+    b = make_breaker(monkeypatch, clock, slow_s=2.0)
+    for _ in range(breaker.MIN_CALLS):
+        b.record(True, 5.0)
+    assert b.state == "open"
+
+
+def test_slow_s_override_keeps_long_calls_good(monkeypatch, clock):
+    b = make_breaker(monkeypatch, clock, slow_s=2.0)
+    for _ in range(breaker.WINDOW):
+        b.record(True, 60.0, slow_s=float("inf"))
+    assert b.state == "closed"
+    assert b.stats()["recent_failures"] == 0
+
+
+def test_probe_success_closes(monkeypatch, clock):
+    b = make_breaker(monkeypatch, clock)
+    trip(b)
+    clock.now += breaker.COOLDOWN_S
+    assert b.allow()
+    assert b.state == "half_open"
+    assert not b.allow()
+    b.record(True, 0.1, probe=b.probe)
+    assert b.state == "closed"
+    assert b.allow()
+
+
+def test_probe_failure_reopens_with_doubled_cooldown(monkeypatch, clock):
+    b = make_breaker(monkeypatch, clock)
+    trip(b)
+    clock.now += breaker.COOLDOWN_S
+    assert b.allow()
+    b.record(False, 0.1, probe=b.probe)
+    assert b.state == "open"
+    assert b.cooldown == 2 * breaker.COOLDOWN_S
+    clock.now += breaker.COOLDOWN_S
+    assert not b.allow()
+    clock.now += breaker.COOLDOWN_S
+    assert b.allow()
+
+
+def test_cooldown_is_capped(monkeypatch, clock):
+    b = make_breaker(monkeypatch, clock)
+    trip(b)
+    for _ in range(10):
+        clock.now += b.cooldown
+        assert b.allow()
+        b.record(False, 0.1, probe=b.probe)
+    assert b.cooldown == breaker.MAX_COOLDOWN_S
+
+
+def test_only_the_probe_settles_half_open(monkeypatch, clock):
+    b = make_breaker(monkeypatch, clock)
+    trip(b)
+    clock.now += breaker.COOLDOWN_S
+    assert b.allow()
+    # A call admitted while closed reports back late
+    b.record(True, 0.1)
+    b.record(False, 0.1)
+    assert b.state == "half_open"
+    b.record(True, 0.1, probe=b.probe)
+    assert b.state == "closed"
+    # ... and a late probe result after the breaker closed is ignored too
+    b.record(False, 0.1, probe=b.probe)
+    assert b.stats()["recent_calls"] == 0
+
+
+def test_calls_reported_while_open_are_ignored(monkeypatch, clock):
+    b = make_breaker(monkeypatch, clock)
+    trip(b)
+    b.record(True, 0.1)
+    assert b.state == "open"
+    assert b.stats()["recent_calls"] == 0
+
+
+def test_abandon_frees_the_probe_slot(monkeypatch, clock):
+    b = make_breaker(monkeypatch, clock)
+    trip(b)
+    clock.now += breaker.COOLDOWN_S
+    assert b.allow()
+    first = b.probe
+    b.abandon(0)
+    assert not b.allow()
+    b.abandon(first)
+    assert b.allow()
+    second = b.probe
+    assert second != first
+    # The abandoned probe can no longer settle the breaker
+    b.record(True, 0.1, probe=first)
+    assert b.state == "half_open"
+    b.record(True, 0.1, probe=second)
+    assert b.state == "closed"
+
+
+def test_stuck_probe_slot_is_reclaimed_after_slow_s(monkeypatch, clock):
+    b = make_breaker(monkeypatch, clock, slow_s=2.0)
+    trip(b)
+    clock.now += breaker.COOLDOWN_S
+    assert b.allow()
+    clock.now += 1.0
+    assert not b.allow()
+    clock.now += 1.5
+    assert b.allow()
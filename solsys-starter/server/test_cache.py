@@ -0,0 +1,222 @@
+import asyncio
+
+import pytest
+
+import cache
+from cache import TTLCache, make_key
+
+
+def make_cache(monkeypatch, clock, **kwargs):
+    monkeypatch.setattr(cache.time, "time", clock)
+    options = {"ttls": {"short": 10, "long": 100}, "default_ttl": 50}
+    options.update(kwargs)
+    return TTLCache(**options)
+
+
+# ---- LRU and TTL ----
+def test_make_key_normalizes_containers():
+    assert make_key({"b": [1, 2], "a": {"x": 1}}) == make_key({"a": {"x": 1}, "b": (1, 2)})
+    assert make_key({1, 2, 3}) == make_key({3, 2, 1})
+
+
+def test_get_and_set_use_namespace_ttls(monkeypatch, clock):
+    c = make_cache(monkeypatch, clock)
+    c.set("short", "k", 1)
+    c.set("long", "k", 2)
+    c.set("other", "k", 3)
+    assert (c.get("short", "k"), c.get("long", "k"), c.get("other", "k")) == (1, 2, 3)
+    clock.now += 20
+    assert c.get("short", "k") is None
+    assert c.get("long", "k") == 2
+    assert c.get("other", "k") == 3
+    clock.now += 40
+    assert c.get("other", "k") is None
+
+
+def test_set_ttl_overrides_namespace(monkeypatch, clock):
+    c = make_cache(monkeypatch, clock)
+    c.set("long", "k", 1, ttl=5)
+    clock.now += 6
+    assert c.get("long", "k") is None
+
+
+def test_evicts_least_recently_used_entry(monkeypatch, clock):
+    c = make_cache(monkeypatch, clock, max_entries=2)
+    c.set("long", "a", 1)
+    c.set("long", "b", 2)
+    assert c.get("long", "a") == 1
+    c.set("long", "c", 3)
+    assert c.get("long", "b") is None
+    assert c.get("long", "a") == 1
+    assert c.get("long", "c") == 3
+    assert c.stats()["evictions"] == 1
+
+
+def test_evicts_to_byte_budget(monkeypatch, clock):
+    c = make_cache(monkeypatch, clock, max_bytes=3000)
+    for i in range(10):
+        c.set("long", i, "x" * 1000)
+    stats = c.stats()
+    assert stats["approx_bytes"] <= 3000
+    assert stats["entries"] < 10
+    assert c.get("long", 9) is not None
+
+
+def test_oversized_value_is_not_cached(monkeypatch, clock):
+    c = make_cache(monkeypatch, clock, max_bytes=100)
+    c.set("long", "big", "x" * 1000)
+    assert c.get("long", "big") is None
+    assert c.stats()["entries"] == 0
+
+
+def test_counters(monkeypatch, clock):
+    c = make_cache(monkeypatch, clock)
+    c.set("long", "k", 1)
+    c.get("long", "k")
+    c.get("long", "missing")
+    stats = c.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+    assert stats["approx_bytes"] > 0
+    assert stats["namespaces"]["long"]["hits"] == 1
+
+
+
+def test_has_counts_stale_entries_until_their_grace_ends(monkeypatch, clock):
+    c = make_cache(monkeypatch, clock, graces={"short": 100})
+    c.set("short", "k", 1)
+    assert c.has("short", "k") and not c.has("short", "missing")
+    clock.now += 20
+    assert c.has("short", "k") and c.get("short", "k") is None
+    clock.now += 100
+    assert not c.has("short", "k")
+
+# ---- single-flight ----
+def test_concurrent_misses_share_one_fetch(monkeypatch, clock):
+    c = make_cache(monkeypatch, clock)
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "value"
+
+    async def run():
+        return await asyncio.gather(*(c.get_or_fetch("long", "k", fetch) for _ in range(5)))
+
+    assert asyncio.run(run()) == ["value"] * 5
+    assert len(calls) == 1
+    assert c.stats()["coalesced"] == 4
+    assert c.get("long", "k") == "value"
+
+
+def test_fetch_error_reaches_every_caller_and_is_not_cached(monkeypatch, clock):
+    c = make_cache(monkeypatch, clock)
+
+    async def fetch():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream down")
+
+    async def run():
+        return await asyncio.gather(*(c.get_or_fetch("long", "k", fetch) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert c.get("long", "k") is None
+    assert len(c._flights) == 0
+
+
+def test_cancelled_caller_does_not_cancel_shared_fetch(monkeypatch, clock):
+    c = make_cache(monkeypatch, clock)
+
+    async def fetch():
+        await asyncio.sleep(0.02)
+        return "value"
+
+    async def run():
+        first = asyncio.ensure_future(c.get_or_fetch("long", "k", fetch))
+        second = asyncio.ensure_future(c.get_or_fetch("long", "k", fetch))
+        await asyncio.sleep(0.005)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(run()) == "value"
+    assert c.get("long", "k") == "value"
+
+
+# ---- stale-while-revalidate ----
+def test_stale_value_is_served_while_it_refreshes(monkeypatch, clock):
+    c = make_cache(monkeypatch, clock, graces={"short": 100})
+    values = iter(["old", "new"])
+
+    async def fetch():
+        await asyncio.sleep(0.01)
+        return next(values)
+
+    async def run():
+        assert await c.get_or_fetch("short", "k", fetch) == "old"
+        clock.now += 20
+        assert await c.get_or_fetch("short", "k", fetch) == "old"
+        await asyncio.gather(*c._background)
+        return await c.get_or_fetch("short", "k", fetch)
+
+    assert asyncio.run(run()) == "new"
+    stats = c.stats()
+    assert (stats["stale_hits"], stats["refreshes"]) == (1, 1)
+
+
+def test_failed_refresh_keeps_stale_value(monkeypatch, clock):
+    c = make_cache(monkeypatch, clock, graces={"short": 100})
+
+    async def fail():
+        raise RuntimeError("upstream down")
+
+    async def run():
+        c.set("short", "k", "old")
+        clock.now += 20
+        assert await c.get_or_fetch("short", "k", fail) == "old"
+        await asyncio.gather(*c._background)
+        value = await c.get_or_fetch("short", "k", fail)
+        await asyncio.gather(*c._background)
+        return value
+
+    assert asyncio.run(run()) == "old"
+    assert c.stats()["refresh_errors"] == 2
+
+
+def test_entry_past_grace_is_a_miss(monkeypatch, clock):
+    c = make_cache(monkeypatch, clock, graces={"short": 100})
+
+    async def fetch():
+        return "new"
+
+    async def run():
+        c.set("short", "k", "old")
+        clock.now += 200
+        return await c.get_or_fetch("short", "k", fetch)
+
+    assert asyncio.run(run()) == "new"
+    assert c.stats()["expirations"] == 1
+
+
+def test_refresh_due_reloads_hot_entries_before_expiry(monkeypatch, clock):
+    c = make_cache(monkeypatch, clock)
+
+    async def fetch():
+        return "new"
+
+    async def run():
+        c.set("long", "hot", "old", fetch=fetch)
+        c.set("long", "cold", "old", fetch=fetch)
+        c.set("long", "manual", "old")
+        clock.now += 50
+        c.get("long", "hot")
+        clock.now += 40
+        started = c.refresh_due(ahead=0.2, hot_window=60)
+        await asyncio.gather(*c._background)
+        return started
+
+    assert asyncio.run(run()) == 1
+    assert c.get("long", "hot") == "new"
+    assert c.get("long", "cold") == "old"
@@ -0,0 +1,92 @@
+import math
+
+import numpy as np
+
+import catalog
+
+FIELDS = ["des", "orbit_class", "pha", "H", "moid_au"]
+ROWS = [
+    ["a", "APO", "Y", 18.0, 0.01],
+    ["b", "ATE", "N", 22.5, 0.2],
+    ["c", "APO", "N", None, 0.04],
+    ["d", "AMO", "Y", 15.0, None],
+    ["e", "APO", "N", 20.0, 0.3],
+]
+
+
+def make_catalog() -> catalog.Catalog:
+    cat = catalog.Catalog("neo", FIELDS)
+    cat.replace(catalog.columns_from_rows(FIELDS, ROWS, FIELDS))
+    return cat
+
+
+def test_columns_from_rows_types_and_blanks():
+    columns = catalog.columns_from_rows(FIELDS[:2], [["a", "APO"], ["b", None]], ["des", "orbit_class", "H"])
+    assert columns["des"].tolist() == ["a", "b"]
+    assert columns["orbit_class"].tolist() == ["APO", ""]
+    assert np.isnan(columns["H"]).all()
+
+
+def test_select_equals_and_ranges():
+    cat = make_catalog()
+    total, rows = cat.query(equals={"orbit_class": ["APO"], "pha": ["N"]})
+    assert total == 2
+    assert sorted(row[0] for row in rows) == ["c", "e"]
+    total, rows = cat.query(ranges={"H": (16.0, 21.0)})
+    assert sorted(row[0] for row in rows) == ["a", "e"]
+    total, rows = cat.query(equals={"des": ["b", "zz"]})
+    assert (total, rows[0][0]) == (1, "b")
+
+
+def test_sort_puts_missing_values_last_and_pages():
+    cat = make_catalog()
+    total, rows = cat.query(sort="H", descending=True)
+    assert [row[0] for row in rows] == ["b", "e", "a", "d", "c"]
+    assert rows[-1][3] is None
+    total, rows = cat.query(sort="moid_au", offset=1, limit=2)
+    assert total == 5
+    assert [row[0] for row in rows] == ["c", "b"]
+
+
+def test_merge_upserts_by_key():
+    cat = make_catalog()
+    update = catalog.columns_from_rows(FIELDS, [["b", "ATE", "Y", 21.0, 0.02], ["f", "ATE", "N", 25.0, 0.5]], FIELDS)
+    assert cat.merge(update) == 2
+    assert len(cat) == 6
+    _, rows = cat.query(equals={"des": ["b"]})
+    assert rows[0][2:4] == ["Y", 21.0]
+    assert cat.query(equals={"pha": ["Y"]})[0] == 3
+
+
+def test_merge_existing_only_keeps_the_rows_it_has():
+    cat = make_catalog()
+    update = catalog.columns_from_rows(FIELDS, [["b", "ATE", "Y", 21.0, 0.02], ["f", "ATE", "N", 25.0, 0.5]], FIELDS)
+    assert cat.merge(update, existing_only=True) == 1
+    assert len(cat) == 5
+    assert cat.query(equals={"des": ["f"]})[0] == 0
+
+
+def test_catalog_keyed_by_another_field():
+    fields = ["pl_name", "hostname", "pl_rade"]
+    cat = catalog.Catalog("exoplanets", fields, key="pl_name")
+    cat.replace(catalog.columns_from_rows(fields, [["X b", "X", 1.0], ["X c", "X", 2.0]], fields))
+    cat.merge(catalog.columns_from_rows(fields, [["X c", "X", 3.0]], fields))
+    assert len(cat) == 2
+    assert cat.query(equals={"pl_name": ["X c"]})[1] == [["X c", "X", 3.0]]
+
+
+def test_save_and_load_round_trip(tmp_path):
+    cat = make_catalog()
+    path = str(tmp_path / "neo.npz")
+    cat.save(path)
+    loaded = catalog.Catalog("neo", FIELDS)
+    assert loaded.load(path)
+    assert loaded.query(sort="H") == cat.query(sort="H")
+    assert not catalog.Catalog("neo", FIELDS[:3]).load(path)
+    assert not catalog.Catalog("neo", FIELDS).load(str(tmp_path / "missing.npz"))
+
+
+def test_rows_turn_nan_into_none():
+    _, rows = make_catalog().query(equals={"des": ["d"]})
+    assert rows[0][4] is None
+    assert not any(isinstance(v, float) and math.isnan(v) for v in rows[0])
@@ -0,0 +1,70 @@
+import numpy as np
+
+import chebyshev
+import kepler
+
+# Mercury, whose eccentric orbit is the hardest planet to fit
+MERCURY = ([57909050.0], [0.2056], [7.005], [87.97])
+HOURS = chebyshev.segment_hours(87.97)
+
+
+def states(t: np.ndarray):
+    r, v = kepler.orbital_states(*MERCURY, t)
+    return r[0], v[0]
+
+
+def fit(s: int, hours: int, tolerance: float):
+    length = hours * 3600.0
+    t = s * length + np.arange(chebyshev.SEGMENT_SAMPLES + 1) * length / chebyshev.SEGMENT_SAMPLES
+    return chebyshev.fit_segment(t, *states(t), t[0], t[-1], tolerance=tolerance), t[0], t[-1]
+
+
+def true_error(coeffs, t0: float, t1: float) -> float:
+    t = np.linspace(t0, t1, 400)
+    r, _ = chebyshev.evaluate(coeffs, t0, t1, t)
+    return float(np.max(np.linalg.norm(r - states(t)[0], axis=1)))
+
+
+def test_segment_hours_are_powers_of_two_within_bounds():
+    assert chebyshev.segment_hours(0.0) == chebyshev.MAX_SEGMENT_HOURS
+    assert chebyshev.segment_hours(0.3189) == chebyshev.MIN_SEGMENT_HOURS
+    assert chebyshev.segment_hours(-5.8769) == 32
+    assert chebyshev.sample_step(chebyshev.MIN_SEGMENT_HOURS) == "15 m"
+
+
+def test_fits_within_tolerance_between_samples():
+    first = int(kepler.to_unix("2025-01-01") // (HOURS * 3600))
+    for s in range(first, first + 8):
+        (coeffs, error), t0, t1 = fit(s, HOURS, 0.1)
+        assert chebyshev.fits_within(error, 0.1)
+        assert true_error(coeffs, t0, t1) <= 0.1
+
+
+def test_error_is_measured_at_held_out_samples():
+    # Degree 17 on the nine fitted samples of a long segment would match them almost exactly
+    first = int(kepler.to_unix("2025-01-01") // (HOURS * 3600))
+    errors = [fit(s, HOURS, chebyshev.MIN_TOLERANCE_KM)[0][1] for s in range(first, first + 8)]
+    assert not all(chebyshev.fits_within(e, chebyshev.MIN_TOLERANCE_KM) for e in errors)
+
+
+def test_halves_of_a_segment_that_misses_fit_within_tolerance():
+    tolerance = chebyshev.MIN_TOLERANCE_KM
+    first = int(kepler.to_unix("2025-01-01") // (HOURS * 3600))
+    s = next(s for s in range(first, first + 8) if not chebyshev.fits_within(fit(s, HOURS, tolerance)[0][1], tolerance))
+    for half in (2 * s, 2 * s + 1):
+        (coeffs, error), t0, t1 = fit(half, HOURS // 2, tolerance)
+        assert chebyshev.fits_within(error, tolerance)
+        assert true_error(coeffs, t0, t1) <= tolerance
+
+
+def test_round_trip_of_velocities():
+    (coeffs, _), t0, t1 = fit(int(kepler.to_unix("2025-03-01") // (HOURS * 3600)), HOURS, 0.1)
+    t = np.linspace(t0, t1, 50)
+    _, v = chebyshev.evaluate(coeffs, t0, t1, t)
+    assert np.abs(v - states(t)[1]).max() < 1e-5
+
+
+def test_too_few_samples():
+    t = np.arange(5.0)
+    r = np.full((5, 3), np.nan)
+    assert chebyshev.fit_segment(t, r, r, 0.0, 4.0) is None
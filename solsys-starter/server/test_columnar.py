@@ -0,0 +1,77 @@
+import json
+import struct
+
+import numpy as np
+import pytest
+
+import columnar
+import horizons
+import kepler
+
+
+def decode(buf: bytes, magic: bytes = columnar.MAGIC):
+    """The layout in columnar.py read back: (header, times, float array after the times)"""
+    assert buf[:4] == magic
+    version, header_len = struct.unpack_from("<II", buf, 4)
+    assert version == columnar.VERSION
+    assert (12 + header_len) % 8 == 0
+    header = json.loads(buf[12:12 + header_len])
+    n = header["n"] if magic == columnar.MAGIC else header["epochs"]
+    t = np.frombuffer(buf, "<f8", n, 12 + header_len)
+    rest = np.frombuffer(buf, columnar.DTYPES[header["dtype"]], offset=12 + header_len + 8 * n)
+    return header, t, rest
+
+
+def make_bodies(n: int = 5):
+    rng = np.random.default_rng(3)
+    bodies = []
+    for hid in ("10", "399"):
+        r, v = rng.normal(0, 1.5e8, (n, 3)), rng.normal(0, 30, (n, 3))
+        bodies.append({"id": hid, "center": "500@0", "r": r, "v": v})
+    bodies[1]["r"][2] = bodies[1]["v"][2] = np.nan
+    return bodies
+
+
+@pytest.mark.parametrize("dtype", ["f32", "f64"])
+@pytest.mark.parametrize("time", ["unix", "jd"])
+def test_ephem_round_trip(dtype, time):
+    t = kepler.to_unix("2025-01-01") + np.arange(5) * 21600.0
+    bodies = make_bodies()
+    header, times, rest = decode(columnar.encode(t, bodies, dtype, time))
+    assert header == {"n": 5, "dtype": dtype, "time": time, "bodies": [{"id": "10", "center": "500@0"}, {"id": "399", "center": "500@0"}]}
+    expected_t = t if time == "unix" else t / 86400.0 + horizons.JD_UNIX_EPOCH
+    assert np.array_equal(times, expected_t)
+    assert rest.size == 2 * 2 * 5 * 3
+    blocks = rest.reshape(2, 2, 5, 3)
+    for i, body in enumerate(bodies):
+        for j, part in enumerate(("r", "v")):
+            expected = body[part].astype(columnar.DTYPES[dtype])
+            assert np.array_equal(blocks[i, j], expected, equal_nan=True)
+    assert np.isnan(blocks[1, 0, 2]).all()
+
+
+@pytest.mark.parametrize("dtype", ["f32", "f64"])
+def test_positions_round_trip(dtype):
+    t = np.array([0.0, 86400.0, 172800.0])
+    r = np.random.default_rng(5).normal(0, 3e8, (3, 4, 3))
+    r[1, 2] = np.nan
+    header, times, rest = decode(columnar.encode_positions(t, ["a", "b", "c", "d"], r, dtype, "jd"), columnar.POSITIONS_MAGIC)
+    assert (header["epochs"], header["bodies"], header["ids"]) == (3, 4, ["a", "b", "c", "d"])
+    assert np.allclose(times, [horizons.JD_UNIX_EPOCH, horizons.JD_UNIX_EPOCH + 1, horizons.JD_UNIX_EPOCH + 2])
+    assert np.array_equal(rest.reshape(3, 4, 3), r.astype(columnar.DTYPES[dtype]), equal_nan=True)
+
+
+def test_empty_response_and_bad_options():
+    header, times, rest = decode(columnar.encode(np.empty(0), []))
+    assert (header["n"], len(times), len(rest)) == (0, 0, 0)
+    with pytest.raises(ValueError):
+        columnar.encode(np.empty(0), [], dtype="f16")
+    with pytest.raises(ValueError):
+        columnar.encode_positions(np.empty(0), [], np.empty((0, 0, 3)), time="mjd")
+
+
+def test_wants_binary():
+    assert columnar.wants_binary("binary", "")
+    assert not columnar.wants_binary("json", columnar.MEDIA_TYPE)
+    assert columnar.wants_binary("", f"{columnar.MEDIA_TYPE}, */*")
+    assert not columnar.wants_binary("", columnar.MEDIA_TYPE, columnar.POSITIONS_MEDIA_TYPE)
@@ -0,0 +1,123 @@
+import asyncio
+import os
+
+import httpx
+import pytest
+
+import diskstore
+import upstream
+from diskstore import DiskStore
+
+URL = "https://api.example/feed"
+
+
+def response(status: int, body=None) -> httpx.Response:
+    return httpx.Response(status, json=body if body is not None else {}, request=httpx.Request("GET", URL))
+
+
+@pytest.fixture
+def fetches(monkeypatch):
+    """Answers the stubbed network gives get_json, in order; a list of the calls it saw"""
+    answers = []
+    calls = []
+
+    async def fake_get(name, url, params, slow_s=None, **kwargs):
+        calls.append(dict(params))
+        answer = answers.pop(0)
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+    monkeypatch.setattr(upstream, "_get", fake_get)
+    return answers, calls
+
+
+def use_store(monkeypatch, tmp_path, mode: str) -> DiskStore:
+    store = DiskStore(str(tmp_path), mode)
+    monkeypatch.setattr(upstream, "store", store)
+    return store
+
+
+def records(tmp_path) -> list:
+    return [name for _, _, names in os.walk(tmp_path) for name in names if name.endswith(".json.gz")]
+
+
+# ---- DiskStore ----
+def test_api_key_is_not_part_of_the_digest(tmp_path):
+    store = DiskStore(str(tmp_path))
+    digest, request = store.request_key("nasa", URL, {"date": "2025-01-01", "api_key": "secret"})
+    assert digest == store.request_key("nasa", URL, {"date": "2025-01-01", "api_key": "other"})[0]
+    assert digest == store.request_key("nasa", URL, {"date": "2025-01-01"})[0]
+    assert "api_key" not in request["params"]
+    assert digest != store.request_key("nasa", URL, {"date": "2025-01-02"})[0]
+
+
+def test_warm_prunes_records_older_than_max_age(monkeypatch, tmp_path, clock):
+    monkeypatch.setattr(diskstore.time, "time", clock)
+    store = DiskStore(str(tmp_path), max_age=100)
+    old, _ = store.request_key("jpl", URL, {"q": "old"})
+    new, _ = store.request_key("jpl", URL, {"q": "new"})
+    store.put(old, {}, {"v": 1}, ttl=10)
+    clock.now += 60
+    store.put(new, {}, {"v": 2}, ttl=10)
+    clock.now += 60
+
+    fresh = DiskStore(str(tmp_path), max_age=100)
+    assert fresh.warm() == 1
+    assert fresh.has(new) and not fresh.has(old)
+    assert records(tmp_path) == [new + ".json.gz"]
+
+
+# ---- get_json through the store ----
+def test_record_then_replay_returns_the_stored_body(monkeypatch, tmp_path, fetches):
+    answers, calls = fetches
+    answers.append(response(200, {"answer": 42}))
+    use_store(monkeypatch, tmp_path, "record")
+    assert asyncio.run(upstream.get_json("jpl", URL, {"q": "x"})) == {"answer": 42}
+
+    store = use_store(monkeypatch, tmp_path, "replay")
+    store.warm()
+    assert asyncio.run(upstream.get_json("jpl", URL, {"q": "x"})) == {"answer": 42}
+    assert len(calls) == 1
+
+
+def test_replay_without_a_record_is_unavailable(monkeypatch, tmp_path, fetches):
+    use_store(monkeypatch, tmp_path, "replay")
+    with pytest.raises(upstream.UpstreamUnavailable):
+        asyncio.run(upstream.get_json("jpl", URL, {"q": "x"}))
+    assert fetches[1] == []
+
+
+@pytest.mark.parametrize("failure", [
+    httpx.ConnectError("unreachable"),
+    response(503, {"error": "down"}),
+    upstream.CircuitOpen("jpl circuit open"),
+])
+def test_failures_fall_back_to_the_stale_record(monkeypatch, tmp_path, fetches, failure):
+    answers, calls = fetches
+    use_store(monkeypatch, tmp_path, "cache")
+    # ttl=0: the record is stale at once, so the next call goes to the network
+    answers.append(response(200, {"answer": "stored"}))
+    asyncio.run(upstream.get_json("jpl", URL, {"q": "x"}, ttl=0))
+
+    answers.append(failure)
+    assert asyncio.run(upstream.get_json("jpl", URL, {"q": "x"}, ttl=0)) == {"answer": "stored"}
+    assert len(calls) == 2
+
+
+def test_failures_without_a_record_still_raise(monkeypatch, tmp_path, fetches):
+    answers, _ = fetches
+    use_store(monkeypatch, tmp_path, "cache")
+    answers.append(response(503, {"error": "down"}))
+    with pytest.raises(upstream.UpstreamStatusError):
+        asyncio.run(upstream.get_json("jpl", URL, {"q": "x"}))
+
+
+def test_off_bypasses_the_store(monkeypatch, tmp_path, fetches):
+    answers, calls = fetches
+    use_store(monkeypatch, tmp_path, "off")
+    answers.extend([response(200, {"n": 1}), response(200, {"n": 2})])
+    assert asyncio.run(upstream.get_json("jpl", URL, {"q": "x"})) == {"n": 1}
+    assert asyncio.run(upstream.get_json("jpl", URL, {"q": "x"})) == {"n": 2}
+    assert len(calls) == 2
+    assert records(tmp_path) == []
@@ -0,0 +1,54 @@
+from datetime import date
+
+import donki
+from donki import EventStore
+
+
+def flare(flr_id: str, begin: str, cls: str = "M1.0") -> dict:
+    return {"flrID": flr_id, "beginTime": begin, "classType": cls}
+
+
+def test_first_window_starts_at_first_date():
+    store = EventStore("flr", "2024-01-01")
+    assert store.window(date(2025, 3, 1)) == ("2024-01-01", "2025-03-01")
+
+
+def test_later_windows_overlap_the_high_water_mark():
+    store = EventStore("flr", "2024-01-01")
+    store.merge([], "2025-03-01")
+    start, end = store.window(date(2025, 3, 5))
+    assert (date(2025, 3, 1) - date.fromisoformat(start)).days == donki.OVERLAP_DAYS
+    assert end == "2025-03-05"
+    # ... but never before the first date
+    store = EventStore("flr", "2025-02-27")
+    store.merge([], "2025-03-01")
+    assert store.window(date(2025, 3, 5))[0] == "2025-02-27"
+
+
+def test_merge_upserts_by_activity_id():
+    store = EventStore("flr", "2024-01-01")
+    assert store.merge([flare("a", "2025-03-01T10:00Z"), flare("b", "2025-03-02T10:00Z"), {"beginTime": "x"}], "2025-03-02") == 2
+    assert store.merge([flare("a", "2025-03-01T10:00Z"), flare("b", "2025-03-02T10:00Z", "X2.0")], "2025-03-01") == 1
+    assert len(store) == 2
+    assert store.high_water == "2025-03-02"
+    assert store.query()[1]["classType"] == "X2.0"
+
+
+def test_query_filters_by_day_oldest_first():
+    store = EventStore("flr", "2024-01-01")
+    store.merge([flare("c", "2025-03-03T01:00Z"), flare("a", "2025-03-01T23:00Z"), flare("b", "2025-03-02T00:00Z")], "2025-03-03")
+    assert [e["flrID"] for e in store.query()] == ["a", "b", "c"]
+    assert [e["flrID"] for e in store.query("2025-03-02", "2025-03-02")] == ["b"]
+    assert [e["flrID"] for e in store.query(start="2025-03-02")] == ["b", "c"]
+
+
+def test_save_and_load_round_trip(tmp_path):
+    store = EventStore("flr", "2024-01-01")
+    store.merge([flare("a", "2025-03-01T10:00Z")], "2025-03-01")
+    path = str(tmp_path / "donki" / "flr.json")
+    store.save(path)
+    loaded = EventStore("flr", "2024-01-01")
+    assert loaded.load(path)
+    assert loaded.loaded
+    assert (loaded.high_water, loaded.query()) == (store.high_water, store.query())
+    assert not EventStore("flr", "2024-01-01").load(str(tmp_path / "missing.json"))
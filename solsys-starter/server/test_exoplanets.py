@@ -0,0 +1,114 @@
+import asyncio
+import re
+
+import pytest
+
+import catalog
+import main
+import upstream
+
+METHODS = ["Transit", "Radial Velocity", "Imaging", "Microlensing"]
+
+
+def planet(i: int) -> dict:
+    record = {field: None for field in main.EXOPLANET_FIELDS}
+    record.update(
+        pl_name=f"Star {i // 3} {'bcd'[i % 3]}",
+        hostname=f"Star {i // 3}" if i != 7 else "O'Brien",
+        discoverymethod=METHODS[i % 4],
+        disc_year=1995 + i % 29,
+        pl_orbper=0.5 + i * 3.7,
+        # Some planets have no radius, mass or distance
+        pl_rade=None if i % 5 == 0 else 0.4 + ((i * 37) % 61) * 0.3,
+        pl_masse=None if i % 4 == 0 else 1.0 + ((i * 13) % 61) * 2.5,
+        pl_eqt=200.0 + ((i * 29) % 61) * 30,
+        st_dist=None if i % 6 == 0 else 4.0 + ((i * 17) % 61) * 9.5,
+        st_teff=3000.0 + ((i * 11) % 61) * 100,
+    )
+    return record
+
+
+# The ps table: one default parameter set per planet, plus a non-default one for some
+PS = [{**planet(i), "default_flag": 1} for i in range(60)] + [{**planet(i), "default_flag": 0, "pl_rade": 99.0} for i in range(0, 60, 7)]
+
+
+def tap(query: str) -> list:
+    """Answer the ADQL the server sends: TOP, an AND of simple conditions, ORDER BY (sort values are all distinct)"""
+    m = re.fullmatch(r"SELECT (?:TOP (\d+) )?(.+?) FROM ps WHERE (.+?)(?: ORDER BY (\w+) (ASC|DESC))?", query)
+    top, columns, where, sort, direction = m.groups()
+    rows = PS
+    for cond in where.split(" AND "):
+        field, op, value = re.fullmatch(r"(\w+) (IN|>=|<=|=|IS NOT NULL)\s*(.*)", cond).groups()
+        if op == "IN":
+            wanted = [v.replace("''", "'") for v in re.findall(r"'((?:[^']|'')*)'", value)]
+            rows = [r for r in rows if r[field] in wanted]
+        elif op == "IS NOT NULL":
+            rows = [r for r in rows if r[field] is not None]
+        else:
+            bound = float(value)
+            check = {">=": lambda x: x >= bound, "<=": lambda x: x <= bound, "=": lambda x: x == bound}[op]
+            rows = [r for r in rows if r[field] is not None and check(r[field])]
+    if sort:
+        rows = sorted(rows, key=lambda r: r[sort], reverse=direction == "DESC")
+    if top is not None:
+        rows = rows[:int(top)]
+    fields = columns.split(", ")
+    return [{field: r[field] for field in fields} for r in rows]
+
+
+@pytest.fixture
+def exoplanets(api, monkeypatch, tmp_path):
+    queries = []
+
+    async def get_json(service, url, params, **kwargs):
+        queries.append(params["query"])
+        return tap(params["query"])
+
+    monkeypatch.setattr(upstream, "get_json", get_json)
+    monkeypatch.setattr(main, "SBDB_CATALOG_DIR", str(tmp_path))
+    monkeypatch.setattr(main, "_exoplanets", catalog.Catalog("exoplanets", main.EXOPLANET_FIELDS, key="pl_name"))
+    return queries
+
+
+CASES = [
+    {},
+    {"limit": 7, "offset": 5},
+    {"sort": "st_dist", "order": "asc", "limit": 200},
+    {"sort": "pl_eqt", "pl_rade_min": 3, "pl_rade_max": 12.1, "limit": 200},
+    {"discoverymethod": "Transit, Imaging", "pl_masse_max": 60, "sort": "pl_masse", "order": "asc"},
+    {"hostname": "O'Brien,Star 4", "sort": "pl_orbper"},
+    {"sort": "pl_name", "order": "asc", "st_teff_min": 3500, "disc_year_max": 2010},
+    {"sort": "", "pl_eqt_min": 800, "limit": 200},
+]
+
+
+@pytest.mark.parametrize("params", CASES)
+def test_mirror_gives_the_same_rows_as_tap(api, exoplanets, params):
+    before = api.get("/api/nasa/exoplanets", params=params)
+    assert before.status_code == 200
+    assert "x-total-count" not in before.headers
+    asyncio.run(main.sync_exoplanets())
+    after = api.get("/api/nasa/exoplanets", params=params)
+    assert after.status_code == 200
+    assert after.json() == before.json()
+    assert len(after.json()) <= params.get("limit", 100)
+    # The total counts every match, not just the page
+    everything = api.get("/api/nasa/exoplanets", params={**params, "limit": 1000, "offset": 0}).json()
+    assert int(after.headers["x-total-count"]) == len(everything)
+
+
+def test_default_is_the_largest_planets_first(api, exoplanets):
+    asyncio.run(main.sync_exoplanets())
+    rows = api.get("/api/nasa/exoplanets", params={"limit": 1000}).json()
+    radii = [r["pl_rade"] for r in rows]
+    # One row per planet, none without a radius, and no non-default parameter sets
+    assert len({r["pl_name"] for r in rows}) == len(rows) == sum(1 for r in PS if r["default_flag"] and r["pl_rade"] is not None)
+    assert radii == sorted(radii, reverse=True) and 99.0 not in radii
+    assert exoplanets[0] == f"SELECT {', '.join(main.EXOPLANET_FIELDS)} FROM ps WHERE default_flag = 1"
+
+
+def test_unknown_sort_field_is_400_on_both_paths(api, exoplanets):
+    assert api.get("/api/nasa/exoplanets", params={"sort": "pl_rade; DROP"}).status_code == 400
+    asyncio.run(main.sync_exoplanets())
+    assert api.get("/api/nasa/exoplanets", params={"sort": "default_flag"}).status_code == 400
+    assert len(exoplanets) == 1
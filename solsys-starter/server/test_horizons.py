@@ -0,0 +1,55 @@
+import numpy as np
+
+import horizons
+import kepler
+
+# Trimmed from a Horizons VECTORS answer (Earth, CSV_FORMAT=YES, OUT_UNITS=KM-S)
+RESULT = """\
+*******************************************************************************
+Ephemeris / API_USER Wed Jan  1 00:00:00 2025 Pasadena, USA      / Horizons
+*******************************************************************************
+Target body name: Earth (399)                     {source: DE441}
+Center body name: Solar System Barycenter (0)     {source: DE441}
+*******************************************************************************
+            JDTDB,            Calendar Date (TDB),                      X,                      Y,                      Z,                     VX,                     VY,                     VZ,                     LT,                     RG,                     RR,
+**************************************************************************************************************************************************************************************************************************
+$$SOE
+2460676.500000000, A.D. 2025-Jan-01 00:00:00.0000, -2.627892807572024E+07,  1.445103095021643E+08, -9.041106549952924E+03, -2.981907885632668E+01, -5.331569424005592E+00,  1.251108829549919E-03,  4.899406128373551E+02,  1.468806138891706E+08,  2.114563419741203E-01,
+2460677.500000000, A.D. 2025-Jan-02 00:00:00.0000, -2.885046413413553E+07,  1.440350802127611E+08, -8.934094005419314E+03, -2.970503648373281E+01, -5.668097155346427E+00,  1.225936722734826E-03,  4.899931043553213E+02,  1.468963558640434E+08,  1.538232046219880E-01,
+2460678.500000000, A.D. 2025-Jan-03 00:00:00.0000, -3.141175325233196E+07,  1.435308418391263E+08, -8.829428116063958E+03, -2.958134924612385E+01, -6.003153497102537E+00,  1.197058116720311E-03,  4.900277217418063E+02,  1.469067338718262E+08,  9.615813215826049E-02,
+$$EOE
+**************************************************************************************************************************************************************************************************************************
+"""
+
+
+def test_parses_the_soe_block():
+    arrays = horizons.parse_vectors({"result": RESULT})
+    assert arrays["r"].shape == arrays["v"].shape == (3, 3)
+    assert arrays["t"][0] == kepler.to_unix("2025-01-01")
+    assert np.allclose(np.diff(arrays["t"]), 86400.0)
+    assert arrays["r"][1].tolist() == [-2.885046413413553e07, 1.440350802127611e08, -8.934094005419314e03]
+    assert arrays["v"][2].tolist() == [-2.958134924612385e01, -6.003153497102537e00, 1.197058116720311e-03]
+
+
+def test_malformed_rows_fall_back_and_are_skipped():
+    lines = RESULT.splitlines()
+    soe = lines.index("$$SOE")
+    broken = lines[:soe + 1] + [lines[soe + 1].replace("-2.627892807572024E+07", "n.a."), lines[soe + 2][:60]] + lines[soe + 3:]
+    arrays = horizons.parse_vectors({"result": "\n".join(broken)})
+    assert len(arrays["t"]) == 1
+    assert arrays["t"][0] == kepler.to_unix("2025-01-03")
+
+
+def test_data_rows():
+    rows = [[2460676.5, "A.D. 2025-Jan-01", 1.0, 2.0, 3.0, 4.0, 5.0, 6.0], [2460677.5, "A.D. 2025-Jan-02", "x", 2, 3, 4, 5, 6]]
+    arrays = horizons.parse_vectors({"data": rows})
+    assert arrays["r"].tolist() == [[1.0, 2.0, 3.0]]
+    assert arrays["v"].tolist() == [[4.0, 5.0, 6.0]]
+
+
+def test_no_table():
+    assert horizons.parse_vectors({"result": "No ephemeris for target \"Foo\""}) is None
+    assert horizons.parse_vectors({"result": "$$SOE\n$$EOE"}) is None
+    assert horizons.parse_vectors(None) is None
+    # A table cut off before $$EOE is still read
+    assert len(horizons.parse_vectors(RESULT.split("$$EOE")[0])["t"]) == 3
@@ -0,0 +1,129 @@
+import math
+
+import numpy as np
+import pytest
+
+import kepler
+
+T0 = 1.7356896e9  # 2025-01-01
+
+
+def reference_E(M: float, e: float) -> float:
+    """Scalar bisection on E - e sin E = M with M wrapped to [-pi, pi)"""
+    M = math.remainder(M, 2 * math.pi)
+    lo, hi = -math.pi, math.pi
+    for _ in range(200):
+        mid = (lo + hi) / 2
+        if mid - e * math.sin(mid) < M:
+            lo = mid
+        else:
+            hi = mid
+    return (lo + hi) / 2
+
+
+# ---- Kepler's equation ----
+@pytest.mark.parametrize("e", [0.0, 0.1, 0.5, 0.9, 0.99, 0.999, 0.9999])
+def test_solve_kepler_matches_scalar_reference(e):
+    M = np.concatenate([np.linspace(-10, 10, 401), [0.0, 1e-6, -1e-6, math.pi - 1e-9, 2 * math.pi]])
+    E = kepler.solve_kepler(M, e)
+    expected = np.array([reference_E(m, e) for m in M])
+    assert np.abs(E - expected).max() < 1e-9
+    assert np.abs(E - e * np.sin(E) - np.remainder(M + math.pi, 2 * math.pi) + math.pi).max() < 1e-12
+
+
+def test_solve_kepler_broadcasts_per_body_eccentricity():
+    M = np.linspace(0, 6, 7)[None, :].repeat(3, axis=0)
+    e = np.array([[0.0], [0.5], [0.95]])
+    E = kepler.solve_kepler(M, e)
+    assert E.shape == (3, 7)
+    assert np.allclose(E[0], np.remainder(M[0] + math.pi, 2 * math.pi) - math.pi)
+    assert kepler.solve_kepler(np.empty(0), 0.5).shape == (0,)
+
+
+# ---- orbital states ----
+def test_velocities_are_the_derivative_of_positions():
+    a, e, i, period = [1.5e8, 4.0e5], [0.2, 0.05], [7.0, 30.0], [88.0, -5.9]
+    t = T0 + np.linspace(0, 40 * 86400, 9)
+    h = 1.0
+    r, v = kepler.orbital_states(a, e, i, period, t)
+    ahead, _ = kepler.orbital_states(a, e, i, period, t + h)
+    behind, _ = kepler.orbital_states(a, e, i, period, t - h)
+    assert r.shape == v.shape == (2, 9, 3)
+    assert np.allclose(v, (ahead - behind) / (2 * h), rtol=1e-6, atol=1e-9)
+
+
+def test_orbit_geometry():
+    a, e = 1.0e8, 0.3
+    t = T0 + np.linspace(0, 100 * 86400, 500)
+    r, _ = kepler.orbital_states([a], [e], [0.0], [100.0], t)
+    distance = np.linalg.norm(r[0], axis=1)
+    assert distance.min() >= a * (1 - e) - 1e-3
+    assert distance.max() <= a * (1 + e) + 1e-3
+    assert np.allclose(r[0, :, 2], 0.0)
+
+
+def test_sun_stays_at_origin():
+    r, v = kepler.orbital_states([0.0], [0.0], [0.0], [0.0], np.array([T0, T0 + 3600]))
+    assert not r.any() and not v.any()
+
+
+def test_propagate_system_offsets_moons_by_parent():
+    objects = {
+        "p": {"a": 1.5e8, "e": 0.0, "i": 0.0, "period": 365.25},
+        "m": {"a": 4.0e5, "e": 0.0, "i": 5.0, "period": 27.3, "parent": "p"},
+        "orphan": {"a": 1.0, "e": 0.0, "i": 0.0, "period": 1.0, "parent": "missing"},
+    }
+    t = T0 + np.arange(3) * 86400.0
+    out = kepler.propagate_system(objects, ["m", "orphan", "unknown"], t)
+    assert set(out) == {"p", "m"}
+    r, v = kepler.orbital_states([4.0e5], [0.0], [5.0], [27.3], t)
+    assert np.allclose(out["m"][0] - out["p"][0], r[0])
+    assert np.allclose(out["m"][1] - out["p"][1], v[0])
+
+
+# ---- osculating elements ----
+def test_element_positions_at_epoch_and_after_one_period():
+    a_au, e = np.array([1.2, 2.5]), np.array([0.1, 0.6])
+    zeros = np.zeros(2)
+    epoch = np.full(2, T0 / 86400 + kepler.MJD_UNIX_EPOCH)
+    r = kepler.element_positions(a_au, e, zeros, zeros, zeros, zeros, epoch, np.array([T0]))
+    # Mean anomaly 0 with all angles 0: perihelion on the x axis
+    assert np.allclose(r[0, :, 0], a_au * kepler.AU_KM * (1 - e))
+    assert np.allclose(r[0, :, 1:], 0.0, atol=1e-6)
+    period = 2 * math.pi * np.sqrt((a_au * kepler.AU_KM) ** 3 / kepler.GM_SUN)
+    times = T0 + np.stack([np.full(2, 1e6), 1e6 + period])
+    later = kepler.element_positions(a_au, e, zeros + 10, zeros + 20, zeros + 30, zeros + 40, epoch, times)
+    assert np.allclose(later[0], later[1], atol=1e-2)
+
+
+def test_element_positions_leave_unbound_and_missing_orbits_nan():
+    n = 4
+    r = kepler.element_positions(
+        np.array([1.0, 1.0, -1.0, np.nan]), np.array([0.5, 1.0, 0.2, 0.1]), np.zeros(n), np.zeros(n),
+        np.zeros(n), np.zeros(n), np.full(n, 60000.0), np.array([T0]),
+    )
+    assert np.isfinite(r[0, 0]).all()
+    assert np.isnan(r[0, 1:]).all()
+
+
+# ---- steps and grids ----
+@pytest.mark.parametrize("step,hours", [("6 h", 6.0), ("1d", 24.0), ("15 m", 0.25), ("30 min", 0.5), ("1 mo", 730.5), ("2 Y", 17532.0), (".5 h", 0.5)])
+def test_parse_step_hours(step, hours):
+    assert kepler.parse_step_hours(step) == pytest.approx(hours)
+
+
+@pytest.mark.parametrize("step", ["garbage", "6", "1 week", "h", "-1 h", "0 d", ""])
+def test_parse_step_hours_rejects(step):
+    with pytest.raises(ValueError):
+        kepler.parse_step_hours(step)
+
+
+def test_horizons_step_sends_calendar_units_as_minutes():
+    assert kepler.horizons_step("1 mo") == "43830 m"
+    assert kepler.horizons_step("1 y") == "525960 m"
+    assert kepler.horizons_step(" 6 h ") == "6 h"
+
+
+def test_to_iso_matches_isoformat():
+    t = np.array([kepler.to_unix("2025-01-01"), kepler.to_unix("2025-06-30T23:59:59")])
+    assert kepler.to_iso(t) == ["2025-01-01T00:00:00", "2025-06-30T23:59:59"]
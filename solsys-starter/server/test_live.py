@@ -0,0 +1,109 @@
+import asyncio
+import json
+
+import numpy as np
+
+import live
+from live import Hub
+
+IDS = ["399", "301", "499"]
+# Per-tick motion in km: fractional, plus one body that moves less than a kilometre a tick
+VELOCITY = np.array([[1234.56, -987.65, 3.21], [0.4, 0.3, -0.2], [-5.5, 7.25, 100.125]])
+BASE = np.array([[1.5e8, 2.5e3, -7.7], [3.8e5, -0.49, 12.6], [-2.2e8, 1.1e8, 4.44]])
+
+
+def counting_compute():
+    """Compute whose n-th call returns the states of tick n, whatever the simulation time"""
+    calls = []
+
+    async def compute(t: float):
+        n = len(calls)
+        calls.append(t)
+        return IDS, BASE + n * VELOCITY, VELOCITY.copy()
+
+    return compute, calls
+
+
+def make_for(compute):
+    made = []
+
+    def make():
+        made.append(1)
+        return compute, 1.0, 0.0
+
+    return make, made
+
+
+async def read(sub) -> dict:
+    return json.loads(await asyncio.wait_for(sub.queue.get(), 1.0))
+
+
+def test_subscribers_to_the_same_bodies_share_one_stream():
+    async def run():
+        hub = Hub(0.001)
+        compute, _ = counting_compute()
+        make, made = make_for(compute)
+        first, a = hub.subscribe(("399",), make)
+        second, b = hub.subscribe(("399",), make)
+        assert first is second and len(made) == 1
+        assert hub.stats()["streams"] == 1 and hub.stats()["subscribers"] == 2
+        task = first._task
+
+        hub.unsubscribe(("399",), a)
+        assert ("399",) in hub.streams and not task.done()
+        hub.unsubscribe(("399",), b)
+        assert hub.streams == {}
+        await asyncio.sleep(0)
+        assert task.cancelled()
+
+    asyncio.run(run())
+
+
+def test_deltas_reproduce_the_rounded_keyframe_positions():
+    async def run():
+        hub = Hub(0.005)
+        compute, _ = counting_compute()
+        make, _ = make_for(compute)
+        _, sub = hub.subscribe("k", make)
+        messages = [await read(sub) for _ in range(2 * live.KEYFRAME_TICKS + 5)]
+        hub.close()
+        return messages
+
+    messages = asyncio.run(run())
+    assert messages[0]["type"] == "key" and messages[0]["ids"] == IDS
+    keys = 0
+    state = None
+    for msg in messages:
+        expected = np.round(BASE + msg["seq"] * VELOCITY)
+        if msg["type"] == "key":
+            keys += 1
+            state = np.array(msg["r"], dtype=float)
+        else:
+            for i, change in msg["d"].items():
+                state[int(i)] += change
+        # Keyframes and the deltas applied since agree with the rounded states of every tick
+        assert np.array_equal(state, expected)
+    assert keys >= 3
+    assert [m["seq"] for m in messages] == list(range(len(messages)))
+
+
+def test_a_full_subscriber_is_skipped_then_resynced_with_a_keyframe():
+    async def run():
+        hub = Hub(0.005)
+        compute, _ = counting_compute()
+        make, _ = make_for(compute)
+        _, fast = hub.subscribe("k", make)
+        _, slow = hub.subscribe("k", make)
+        # The fast reader is never held up by the one that stopped reading
+        seen = [(await read(fast))["seq"] for _ in range(3 * live.QUEUE_SIZE)]
+        hub.close()
+        backlog = [json.loads(slow.queue.get_nowait()) for _ in range(slow.queue.qsize())]
+        return seen, backlog
+
+    seen, backlog = asyncio.run(run())
+    assert seen == list(range(len(seen)))
+    assert 0 < len(backlog) <= live.QUEUE_SIZE
+    # What was queued before it fell behind was dropped for a fresh keyframe
+    assert backlog[0]["type"] == "key" and backlog[0]["seq"] > 0
+    assert all(m["type"] == "delta" or m["seq"] % live.KEYFRAME_TICKS == 0 for m in backlog[1:])
+    assert [m["seq"] for m in backlog] == list(range(backlog[0]["seq"], backlog[0]["seq"] + len(backlog)))
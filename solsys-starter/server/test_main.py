@@ -0,0 +1,123 @@
+import asyncio
+import time
+
+import numpy as np
+import pytest
+
+import columnar
+import kepler
+import live
+import main
+import segments
+import upstream
+from diskstore import DiskStore
+
+
+def truth(ids, t):
+    return kepler.propagate_system(main.CELESTIAL_OBJECTS, ids, np.asarray(t, dtype=float))
+
+
+# ---- gather_bounded ----
+def test_gather_bounded_keeps_order_and_limit():
+    running = []
+    peak = []
+
+    def factory(i: int):
+        async def call():
+            running.append(i)
+            peak.append(len(running))
+            # Later inputs finish first
+            await asyncio.sleep(0.001 * (10 - i))
+            running.remove(i)
+            return i * i
+
+        return call
+
+    results = asyncio.run(main.gather_bounded([factory(i) for i in range(10)], 3))
+    assert results == [i * i for i in range(10)]
+    assert max(peak) == 3
+
+
+def test_gather_bounded_failure_does_not_cancel_the_rest():
+    finished = []
+
+    def factory(i: int):
+        async def call():
+            await asyncio.sleep(0.001 * i)
+            if i == 1:
+                raise ValueError("boom")
+            finished.append(i)
+            return i
+
+        return call
+
+    async def run():
+        with pytest.raises(ValueError):
+            await main.gather_bounded([factory(i) for i in range(6)], 2)
+        await asyncio.sleep(0.05)
+
+    asyncio.run(run())
+    assert sorted(finished) == [0, 2, 3, 4, 5]
+
+
+# ---- /api/ephem ----
+def test_ephem_responses_vary_on_accept(api):
+    params = {"horizons_ids": "399", "start": "2025-01-01", "stop": "2025-01-02"}
+    as_json = api.get("/api/ephem", params=params)
+    as_binary = api.get("/api/ephem", params=params, headers={"Accept": columnar.MEDIA_TYPE})
+    assert as_json.headers["content-type"].startswith("application/json")
+    assert as_binary.headers["content-type"] == columnar.MEDIA_TYPE
+    for response in (as_json, as_binary):
+        assert "Accept" in [v.strip() for v in response.headers["vary"].split(",")]
+
+
+# ---- Horizons deadline ----
+def test_slow_horizons_falls_back_then_backfills(api, monkeypatch, tmp_path):
+    async def slow_horizons(command, start, stop, step, center="500@0"):
+        await asyncio.sleep(0.3)
+        run = segments.EphemGrid.from_request(start, stop, step)
+        t = run.times(run.k0, run.k1)
+        r, v = truth([command], t)[command]
+        # Offset so Horizons segments can be told from the Kepler fallback
+        return {"t": t, "r": r + 1000.0, "v": v}
+
+    monkeypatch.setattr(main, "query_horizons", slow_horizons)
+    monkeypatch.setattr(main, "EPHEM_DEADLINE", 0.05)
+    # Lifespan without the catalog syncs or the on-disk store
+    monkeypatch.setattr(main, "SBDB_CATALOG_ENABLED", False)
+    monkeypatch.setattr(main, "EXOPLANET_MIRROR_ENABLED", False)
+    monkeypatch.setattr(upstream, "store", DiskStore(str(tmp_path), "off"))
+    params = {"horizons_ids": "399", "start": "2025-01-01", "stop": "2025-01-10", "step": "6 h", "include_moons": False}
+    grid = segments.EphemGrid.from_request(params["start"], params["stop"], params["step"])
+
+    with api:
+        response = api.get("/api/ephem", params=params)
+        assert response.status_code == 200
+        # Answered from the Kepler fallback, without the Horizons offset
+        states = {body["id"]: body["states"] for body in response.json()}["399"]
+        r, _ = truth(["399"], grid.times(grid.k0, grid.k1))["399"]
+        assert np.abs(np.array([s["r"] for s in states]) - r).max() < 0.005
+        assert len(main._backfills) == 1
+
+        deadline = time.monotonic() + 5
+        while main._backfills and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert not main._backfills
+
+    for c in grid.chunks():
+        seg = main._cache.get("ephem_segment", grid.key("399", "500@0", c))
+        assert seg["source"] == "horizons"
+        assert np.allclose(seg["r"], truth(["399"], seg["t"])["399"][0] + 1000.0)
+
+# ---- /ws/live ----
+def test_live_ws_unsubscribes_when_the_client_leaves_between_ticks(api, monkeypatch):
+    # Nothing is queued after the first keyframe for a long while, so only a read sees the close
+    monkeypatch.setattr(main, "_live", live.Hub(30))
+    with api.websocket_connect("/ws/live?horizons_ids=399&rate=60") as ws:
+        assert ws.receive_json()["type"] == "key"
+        assert main._live.stats()["subscribers"] == 1
+        ws.close()
+        deadline = time.monotonic() + 5
+        while main._live.streams and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert main._live.streams == {}
@@ -0,0 +1,95 @@
+from datetime import date, timedelta
+
+import pytest
+
+import cache
+import main
+import upstream
+
+
+@pytest.fixture
+def feed(api, monkeypatch):
+    """Stubbed NeoWs feed with one object a day; records the (start, end) of every request"""
+    calls = []
+    failing = set()
+
+    async def get_json(service, url, params, **kwargs):
+        start, end = date.fromisoformat(params["start_date"]), date.fromisoformat(params["end_date"])
+        calls.append((start, end))
+        if start in failing:
+            raise upstream.UpstreamUnavailable("NeoWs down")
+        days = (start + timedelta(days=i) for i in range((end - start).days + 1))
+        return {"near_earth_objects": {d.isoformat(): [{"id": d.isoformat()}] for d in days}}
+
+    monkeypatch.setattr(upstream, "get_json", get_json)
+    return calls, failing
+
+
+def watch(api, start: date, end: date) -> dict:
+    r = api.get("/api/nasa/asteroid-watch", params={"start_date": start.isoformat(), "end_date": end.isoformat()})
+    assert r.status_code == 200
+    return r.json()
+
+
+def test_long_ranges_are_fetched_in_shards(api, feed):
+    calls, _ = feed
+    first = date(2020, 3, 1)
+    body = watch(api, first, first + timedelta(days=19))
+    assert sorted(calls) == [
+        (first, first + timedelta(days=7)),
+        (first + timedelta(days=8), first + timedelta(days=15)),
+        (first + timedelta(days=16), first + timedelta(days=19)),
+    ]
+    assert all((end - start).days < main.NEOWS_SHARD_DAYS for start, end in calls)
+    assert body["element_count"] == 20
+    assert list(body["near_earth_objects"]) == [(first + timedelta(days=i)).isoformat() for i in range(20)]
+
+
+def test_cached_days_are_not_fetched_again(api, feed):
+    calls, _ = feed
+    first = date(2020, 3, 1)
+    watch(api, first, first + timedelta(days=9))
+    calls.clear()
+    again = watch(api, first, first + timedelta(days=9))
+    assert calls == [] and again["element_count"] == 10
+    # An overlapping range only asks for the days it has not seen
+    overlap = watch(api, first + timedelta(days=5), first + timedelta(days=14))
+    assert calls == [(first + timedelta(days=10), first + timedelta(days=14))]
+    assert overlap["element_count"] == 10
+
+
+def test_past_days_are_cached_longer(api, feed):
+    today = date.today()
+    watch(api, today - timedelta(days=5), today + timedelta(days=1))
+    ttls = {n: entry.ttl for (namespace, n), entry in main._cache._entries.items() if namespace == "neows_day"}
+    assert len(ttls) == 7
+    for n, ttl in ttls.items():
+        settled = n < (today - timedelta(days=1)).toordinal()
+        assert ttl == (main.NEOWS_PAST_DAY_TTL if settled else main.CACHE_TTLS["neows_day"])
+    assert main.NEOWS_PAST_DAY_TTL == 30 * 24 * 3600
+
+
+def test_a_failed_shard_is_reported_with_the_other_days(api, feed):
+    _, failing = feed
+    first = date(2020, 3, 1)
+    failing.add(first + timedelta(days=8))
+    body = watch(api, first, first + timedelta(days=19))
+    assert len(body["errors"]) == 1 and body["errors"][0].startswith("2020-03-09..2020-03-16")
+    assert body["element_count"] == 12
+    assert "2020-03-09" not in body["near_earth_objects"] and "2020-03-20" in body["near_earth_objects"]
+
+
+def test_expired_days_are_served_stale_while_they_refresh(api, feed, monkeypatch, clock):
+    calls, _ = feed
+    monkeypatch.setattr(cache.time, "time", clock)
+    today = date.today()
+    first = watch(api, today, today + timedelta(days=2))
+    # Every day keeps a fetch so the refresher can reload it
+    assert all(entry.fetch is not None for (namespace, _), entry in main._cache._entries.items() if namespace == "neows_day")
+    calls.clear()
+    clock.now += main.CACHE_TTLS["neows_day"] + 1
+    again = watch(api, today, today + timedelta(days=2))
+    assert again == first
+    assert main._cache.stats()["namespaces"]["neows_day"]["stale_hits"] == 3
+    # No shard request; only single-day refreshes
+    assert all(start == end for start, end in calls)
@@ -0,0 +1,103 @@
+import asyncio
+
+import pytest
+
+import scheduler
+from scheduler import BACKGROUND, INTERACTIVE, RateLimited, Scheduler, TokenBucket
+
+
+# ---- backoff ----
+def test_retry_delay_honours_retry_after():
+    assert scheduler.retry_delay(0, "4") == 4.0
+    assert scheduler.retry_delay(0, "3600") == scheduler.BACKOFF_CAP_S
+
+
+def test_retry_delay_jitters_within_the_cap():
+    for attempt in range(8):
+        bound = min(scheduler.BACKOFF_CAP_S, scheduler.BACKOFF_BASE_S * 2 ** attempt)
+        delays = [scheduler.retry_delay(attempt, "not a number") for _ in range(50)]
+        assert all(0 <= d <= bound for d in delays)
+
+
+def test_priority_follows_the_background_flag():
+    assert scheduler.priority() == INTERACTIVE
+    token = scheduler.background.set(True)
+    try:
+        assert scheduler.priority() == BACKGROUND
+    finally:
+        scheduler.background.reset(token)
+
+
+# ---- token bucket ----
+def test_grants_at_once_while_tokens_last():
+    bucket = TokenBucket(5)
+
+    async def run():
+        for _ in range(5):
+            await asyncio.wait_for(bucket.acquire(INTERACTIVE), 0.1)
+
+    asyncio.run(run())
+    assert bucket.granted == 5
+    assert bucket.tokens < 1
+
+
+def test_interactive_waiters_go_before_background():
+    # Refills one token every 10 ms
+    bucket = TokenBucket(360_000)
+    bucket.tokens = 0.0
+    order = []
+
+    async def call(prio: int, name: str):
+        await bucket.acquire(prio)
+        order.append(name)
+
+    async def run():
+        await asyncio.gather(
+            call(BACKGROUND, "b1"), call(BACKGROUND, "b2"), call(INTERACTIVE, "i1"), call(INTERACTIVE, "i2")
+        )
+
+    asyncio.run(run())
+    assert order == ["i1", "i2", "b1", "b2"]
+    assert bucket.stats()["max_queue_depth"] == 4
+
+
+def test_refuses_a_call_that_would_wait_too_long(monkeypatch):
+    monkeypatch.setitem(scheduler.MAX_WAIT_S, INTERACTIVE, 0.05)
+    bucket = TokenBucket(1)
+    bucket.tokens = 0.0
+
+    async def run():
+        await bucket.acquire(INTERACTIVE)
+
+    with pytest.raises(RateLimited):
+        asyncio.run(run())
+    assert bucket.refused == 1
+    assert bucket.depth == 0
+
+
+def test_observe_pulls_the_bucket_down():
+    bucket = TokenBucket(1000)
+    bucket.observe({"x-ratelimit-remaining": "3"})
+    assert bucket.remaining == 3
+    assert bucket.tokens <= 3
+    bucket.observe({"x-ratelimit-remaining": "500"})
+    assert bucket.tokens < 4
+    bucket.observe({})
+    assert bucket.remaining == 500
+
+
+# ---- scheduler ----
+def test_demo_key_gets_the_demo_quota():
+    s = Scheduler()
+    assert s.bucket("DEMO_KEY").capacity == scheduler.DEMO_KEY_PER_HOUR
+    assert s.bucket("").capacity == scheduler.DEMO_KEY_PER_HOUR
+    assert s.bucket("abcdefgh1234").capacity == scheduler.KEY_PER_HOUR
+    assert s.bucket("DEMO_KEY") is s.bucket("DEMO_KEY")
+
+
+def test_stats_mask_api_keys():
+    s = Scheduler()
+    s.bucket("DEMO_KEY")
+    s.bucket("secretkey9876")
+    keys = s.stats()["keys"]
+    assert set(keys) == {"DEMO_KEY", "...9876"}
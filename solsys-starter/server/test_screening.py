@@ -0,0 +1,103 @@
+import numpy as np
+
+import kepler
+import screening
+
+AU = kepler.AU_KM
+T0 = 1.7356896e9  # 2025-01-01
+MEAN_MOTION = 2 * np.pi / (365.25 * 86400)
+
+
+def earth(t: np.ndarray) -> np.ndarray:
+    """A circular 1 au planet in the ecliptic"""
+    angle = MEAN_MOTION * (t - T0)
+    return np.stack([AU * np.cos(angle), AU * np.sin(angle), 0 * angle], axis=-1)
+
+
+def earth_track(step_s: float = 12 * 3600):
+    t = T0 + np.arange(0, 366 * 86400 + 1, step_s)
+    angle = MEAN_MOTION * (t - T0)
+    v = np.stack([-AU * MEAN_MOTION * np.sin(angle), AU * MEAN_MOTION * np.cos(angle), 0 * angle], axis=-1)
+    return t, earth(t), v
+
+
+def random_elements(n: int, seed: int = 1):
+    rng = np.random.default_rng(seed)
+    return (
+        rng.uniform(0.9, 1.2, n),
+        rng.uniform(0, 0.3, n),
+        rng.uniform(0, 5, n),
+        rng.uniform(0, 360, n),
+        rng.uniform(0, 360, n),
+        rng.uniform(0, 360, n),
+        np.full(n, T0 / 86400 + kepler.MJD_UNIX_EPOCH),
+    )
+
+
+def brute_minimum(elements, step_s: float = 1800.0) -> np.ndarray:
+    t = T0 + np.arange(0, 366 * 86400, step_s)
+    d = np.linalg.norm(kepler.element_positions(*elements, t) - earth(t)[:, None, :], axis=2)
+    return d.min(axis=0)
+
+
+def test_planet_states_interpolate_the_track():
+    t, r, v = earth_track()
+    at = T0 + np.array([1000.0, 5 * 86400 + 123.0, 200 * 86400 + 4321.0])
+    p, _ = screening.planet_states(t, r, v, at)
+    assert np.abs(p - earth(at)).max() < 1.0
+
+
+def test_screen_finds_the_brute_force_approaches():
+    t, r, v = earth_track()
+    elements = random_elements(400)
+    threshold = 0.05 * AU
+    found = screening.screen(elements, t, r, v, threshold)
+    truth = brute_minimum(elements)
+    assert np.sum(truth <= threshold) >= 5
+    # Every body whose sampled minimum is inside the threshold is found
+    assert set(np.flatnonzero(truth <= threshold * 0.999)) <= set(found["body"].tolist())
+    # ... no body that stays outside is reported, and refined distances beat the 30-minute grid
+    assert np.all(truth[found["body"]] <= threshold * 1.001)
+    assert np.all(found["distance"] <= truth[found["body"]] + 1.0)
+    assert np.all(found["distance"] <= threshold)
+    assert np.all(np.diff(found["distance"]) >= 0)
+    assert np.all((found["t"] >= t[0]) & (found["t"] <= t[-1]))
+
+
+def test_screen_reports_each_encounter_once():
+    t, r, v = earth_track()
+    found = screening.screen(random_elements(400), t, r, v, 0.05 * AU)
+    order = np.lexsort((found["t"], found["body"]))
+    bodies, times = found["body"][order], found["t"][order]
+    same_body = bodies[1:] == bodies[:-1]
+    assert np.all(np.diff(times)[same_body] > screening.REFINE_TOLERANCE_S * 10)
+
+
+def test_screen_without_candidates():
+    t, r, v = earth_track()
+    # Far outside Earth's orbit
+    elements = (np.array([5.0]), np.array([0.0]), np.array([0.0]), np.array([0.0]), np.array([0.0]), np.array([0.0]),
+                np.array([T0 / 86400 + kepler.MJD_UNIX_EPOCH]))
+    found = screening.screen(elements, t, r, v, 0.05 * AU)
+    assert found["candidates"] == 0
+    assert len(found["body"]) == 0
+
+
+def test_long_grids_screen_in_smaller_batches(monkeypatch):
+    t = T0 + np.arange(5000) * 3600.0
+    r = earth(t)
+    sizes = []
+    positions = kepler.element_positions
+
+    def recording(*args):
+        out = positions(*args)
+        sizes.append(out.shape[1])
+        return out
+
+    monkeypatch.setattr(kepler, "element_positions", recording)
+    screening.coarse_candidates(random_elements(1000), t, r, 0.05 * AU)
+    size = screening.batch_size(len(t))
+    assert size < 1000
+    assert sum(sizes) == 1000
+    assert max(sizes) <= size
+    assert len(t) * size * 3 * 8 * screening.BATCH_ARRAYS <= screening.BATCH_BUDGET_BYTES
@@ -0,0 +1,77 @@
+import numpy as np
+
+import kepler
+import main
+import segments
+
+T0 = kepler.to_unix("2025-01-01")
+
+
+def truth(ids, t):
+    states = kepler.propagate_system(main.CELESTIAL_OBJECTS, ids, np.asarray(t, dtype=float))
+    return {hid: states[hid] for hid in ids}
+
+
+# ---- Hermite interpolation ----
+def test_hermite_is_exact_at_the_ends_and_cubic_inside():
+    p0, v0, p1, v1 = np.array([1.0, 2, 3]), np.array([0.5, 0, -1]), np.array([4.0, 0, 2]), np.array([1.0, 1, 1])
+    assert np.allclose(segments.hermite(10.0, 2.0, p0, v0, p1, v1, 10.0), (p0, v0))
+    assert np.allclose(segments.hermite(10.0, 2.0, p0, v0, p1, v1, 12.0), (p1, v1))
+    # A cubic is reproduced exactly
+    f = lambda t: np.array([t ** 3, 2 * t ** 2 - t, 5.0])  # noqa: E731
+    df = lambda t: np.array([3 * t ** 2, 4 * t - 1, 0.0])  # noqa: E731
+    p, v = segments.hermite(1.0, 3.0, f(1.0), df(1.0), f(4.0), df(4.0), 2.3)
+    assert np.allclose(p, f(2.3)) and np.allclose(v, df(2.3))
+
+
+def test_default_step_keeps_hermite_error_within_tolerance():
+    for hid, obj in main.CELESTIAL_OBJECTS.items():
+        step_s = kepler.parse_step_hours(main.hermite_step(hid)) * 3600
+        # One full orbit (moons: of the moon itself), midway between samples where the error peaks
+        span = abs(obj.get("period") or 365.25) * 86400
+        t = T0 + np.arange(0, min(5000, int(span // step_s) + 2)) * step_s
+        r, v = truth([hid], t)[hid]
+        mid = t[:-1] + 0.5 * step_s
+        p, pv = segments.hermite(t[:-1, None], step_s, r[:-1], v[:-1], r[1:], v[1:], mid[:, None])
+        r_mid, v_mid = truth([hid], mid)[hid]
+        assert np.linalg.norm(p - r_mid, axis=1).max() < main.HERMITE_TOLERANCE_KM, hid
+        assert np.linalg.norm(pv - v_mid, axis=1).max() < 1e-4, hid
+
+
+def test_default_step_follows_the_orbit():
+    minutes = {hid: kepler.parse_step_hours(main.hermite_step(hid)) * 60 for hid in ("10", "199", "399", "401", "899")}
+    assert minutes["10"] == minutes["899"] == main.HERMITE_MAX_STEP_MINUTES
+    assert minutes["401"] < minutes["199"] < minutes["399"]
+    assert main.hermite_step("unknown") == f"{main.HERMITE_MAX_STEP_MINUTES} m"
+
+
+# ---- /api/ephem/at ----
+def test_ephem_at_matches_kepler_truth(api):
+    instants = ["2025-01-01T03:17:41", "2025-02-14T12:00:00", "2025-06-30T23:59:59"]
+    response = api.get("/api/ephem/at", params={"horizons_ids": "399,499", "times": ",".join(instants), "include_moons": True})
+    assert response.status_code == 200
+    bodies = {body["id"]: body["states"] for body in response.json()}
+    assert set(bodies) == {"10", "399", "499", "301", "401", "402"}
+    t = [kepler.to_unix(s) for s in instants]
+    expected = truth(list(bodies), t)
+    for hid, states in bodies.items():
+        assert [s["t"] for s in states] == instants
+        assert np.abs(np.array([s["r"] for s in states]) - expected[hid][0]).max() < 0.005, hid
+        assert np.abs(np.array([s["v"] for s in states]) - expected[hid][1]).max() < 1e-4, hid
+
+
+def test_ephem_at_reuses_cached_brackets(api):
+    params = {"horizons_ids": "399", "times": "2025-03-01T01:02:03"}
+    first = api.get("/api/ephem/at", params=params).json()
+    hits = main._cache.stats()["hits"]
+    assert api.get("/api/ephem/at", params=params).json() == first
+    assert main._cache.stats()["hits"] > hits
+
+
+def test_ephem_at_rejects_bad_input(api):
+    base = {"horizons_ids": "399", "times": "2025-03-01"}
+    assert api.get("/api/ephem/at", params={**base, "step": "1 x"}).status_code == 400
+    assert api.get("/api/ephem/at", params={**base, "times": "yesterday"}).status_code == 400
+    too_many = ",".join(["2025-03-01"] * (main.AT_MAX_TIMES + 1))
+    assert api.get("/api/ephem/at", params={**base, "times": too_many}).status_code == 400
+
@@ -0,0 +1,71 @@
+import numpy as np
+
+from spatial import KDTree
+
+
+def make_points(n: int = 5000, seed: int = 7) -> np.ndarray:
+    points = np.random.default_rng(seed).uniform(-100, 100, size=(n, 3))
+    points[::97] = np.nan  # missing positions are left out of the tree
+    return points
+
+
+def brute_rows(mask: np.ndarray) -> list:
+    return sorted(np.flatnonzero(mask).tolist())
+
+
+def test_skips_rows_with_nans():
+    points = make_points()
+    tree = KDTree(points, leaf_size=16)
+    assert len(tree) == int(np.isfinite(points).all(axis=1).sum())
+
+
+def test_box_matches_brute_force():
+    points = make_points()
+    tree = KDTree(points, leaf_size=16)
+    low, high = np.array([-30, -10, -50]), np.array([40, 60, 5])
+    expected = brute_rows(np.all((points >= low) & (points <= high), axis=1))
+    assert sorted(tree.box(low, high).tolist()) == expected
+
+
+def test_convex_matches_brute_force():
+    points = make_points()
+    tree = KDTree(points, leaf_size=16)
+    # x >= -20, y <= 30, x + y + z >= 0
+    planes = np.array([[1, 0, 0, 20], [0, -1, 0, 30], [1, 1, 1, 0]], dtype=float)
+    with np.errstate(invalid="ignore"):
+        inside = (points @ planes[:, :3].T + planes[:, 3] >= 0).all(axis=1)
+    assert sorted(tree.convex(planes).tolist()) == brute_rows(inside)
+
+
+def test_within_matches_brute_force_nearest_first():
+    points = make_points()
+    tree = KDTree(points, leaf_size=16)
+    center = np.array([10.0, -5.0, 20.0])
+    rows, dist = tree.within(center, 25.0)
+    d = np.linalg.norm(points - center, axis=1)
+    with np.errstate(invalid="ignore"):
+        expected = brute_rows(d <= 25.0)
+    assert sorted(rows.tolist()) == expected
+    assert np.all(np.diff(dist) >= 0)
+    assert np.allclose(dist, d[rows])
+
+
+def test_nearest_matches_brute_force():
+    points = make_points()
+    tree = KDTree(points, leaf_size=16)
+    point = np.array([3.0, 70.0, -40.0])
+    rows, dist = tree.nearest(point, k=12)
+    d = np.linalg.norm(points - point, axis=1)
+    d[np.isnan(d)] = np.inf
+    assert rows.tolist() == np.argsort(d)[:12].tolist()
+    assert np.allclose(dist, np.sort(d)[:12])
+
+
+def test_nearest_respects_max_distance_and_empty_tree():
+    points = make_points()
+    tree = KDTree(points, leaf_size=16)
+    rows, dist = tree.nearest([0, 0, 0], k=50, max_distance=10.0)
+    assert len(rows) < 50
+    assert np.all(dist <= 10.0)
+    rows, dist = KDTree(np.full((3, 3), np.nan)).nearest([0, 0, 0])
+    assert len(rows) == len(dist) == 0
@@ -0,0 +1,50 @@
+import json
+
+import main
+import static
+
+
+def test_payload_matches_the_json_response_encoding():
+    payload = static.Payload({"name": "Île", "x": [1.5, 2]})
+    assert payload.body == '{"name":"Île","x":[1.5,2]}'.encode("utf-8")
+    assert payload.etag == static.Payload({"name": "Île", "x": [1.5, 2]}).etag
+    assert payload.etag != static.Payload({"name": "Ile", "x": [1.5, 2]}).etag
+    assert payload.etag.startswith('"') and payload.etag.endswith('"')
+
+
+def test_if_none_match_comparison():
+    etag = '"abc"'
+    assert static._matches('"abc"', etag)
+    assert static._matches('"x", W/"abc"', etag)
+    assert static._matches("*", etag)
+    assert not static._matches('"abcd"', etag)
+    assert not static._matches("", etag)
+    assert not static._matches(None, etag)
+
+
+def test_static_endpoints_revalidate_with_304(api):
+    for path, payload in [
+        ("/api/celestial-objects", main.CELESTIAL_OBJECTS_ALL),
+        ("/api/celestial-objects/399", main.CELESTIAL_OBJECT["399"]),
+        ("/api/planet-info/499", main.PLANET_INFO["499"]),
+        ("/api/solar-system-overview", main.SOLAR_SYSTEM_OVERVIEW),
+    ]:
+        first = api.get(path)
+        assert first.status_code == 200
+        assert first.content == payload.body
+        assert json.loads(first.content) == first.json()
+        etag = first.headers["etag"]
+        assert etag == payload.etag
+        assert first.headers["cache-control"] == static.CACHE_CONTROL
+
+        again = api.get(path, headers={"If-None-Match": etag})
+        assert again.status_code == 304
+        assert again.content == b""
+        assert (again.headers["etag"], again.headers["cache-control"]) == (etag, static.CACHE_CONTROL)
+        # A stale tag gets the full payload
+        assert api.get(path, headers={"If-None-Match": '"stale"'}).content == payload.body
+
+
+def test_unknown_static_ids_are_404(api):
+    assert api.get("/api/celestial-objects/nope").status_code == 404
+    assert api.get("/api/planet-info/vulcan").status_code == 404
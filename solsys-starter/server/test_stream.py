@@ -0,0 +1,58 @@
+import json
+import math
+
+import main
+import segments
+
+PARAMS = {"horizons_ids": "399", "start": "2025-01-01", "stop": "2025-05-01", "step": "1 h"}
+
+
+def stream(api, **params):
+    response = api.get("/api/ephem", params={**PARAMS, "format": "ndjson", **params})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_header_then_one_line_per_body_per_window(api):
+    lines = stream(api)
+    header, rest = lines[0], lines[1:]
+    assert header["type"] == "header"
+    assert header["bodies"] == ["10", "399", "301"]
+    assert header["samples"] == 120 * 24 + 1
+    assert header["step_seconds"] == 3600.0
+    grid = segments.EphemGrid.from_request(PARAMS["start"], PARAMS["stop"], PARAMS["step"])
+    windows = math.ceil(len(grid.chunks()) / main.STREAM_WINDOW_CHUNKS)
+    assert len(rest) == windows * len(header["bodies"])
+    assert [line["id"] for line in rest] == header["bodies"] * windows
+    assert all(len(line["states"]) <= main.STREAM_WINDOW_CHUNKS * segments.CHUNK_SAMPLES for line in rest)
+
+
+def test_stream_matches_the_json_response(api):
+    lines = stream(api)
+    streamed = {}
+    for line in lines[1:]:
+        streamed.setdefault(line["id"], []).extend(line["states"])
+    whole = api.get("/api/ephem", params=PARAMS).json()
+    assert {body["id"]: body["states"] for body in whole} == streamed
+    times = [state["t"] for state in streamed["399"]]
+    assert times == sorted(times) and len(set(times)) == len(times)
+
+
+def test_stream_sample_cap(api, monkeypatch):
+    monkeypatch.setattr(main, "STREAM_MAX_SAMPLES", 100)
+    response = api.get("/api/ephem", params={**PARAMS, "format": "ndjson"})
+    assert response.status_code == 400
+    assert "at most 100" in response.json()["detail"]
+
+
+def test_stream_reads_cached_chunks_but_does_not_add_any(api):
+    stream(api)
+    assert main._cache.stats()["entries"] == 0
+    # Chunks cached by a JSON request are reused
+    api.get("/api/ephem", params=PARAMS)
+    entries = main._cache.stats()["entries"]
+    hits = main._cache.stats()["namespaces"]["ephem_segment"]["hits"]
+    stream(api)
+    assert main._cache.stats()["entries"] == entries
+    assert main._cache.stats()["namespaces"]["ephem_segment"]["hits"] > hits
@@ -0,0 +1,39 @@
+import asyncio
+
+import upstream
+from diskstore import DiskStore
+
+
+def test_clients_are_pooled_per_upstream_and_recreated_after_close(monkeypatch, tmp_path):
+    monkeypatch.setattr(upstream, "_clients", {})
+    monkeypatch.setattr(upstream, "store", DiskStore(str(tmp_path), "off"))
+
+    async def run():
+        await upstream.open_clients()
+        pools = {name: upstream.get_client(name) for name in upstream.UPSTREAMS}
+        assert set(upstream._clients) == set(upstream.UPSTREAMS)
+        # Repeated lookups share one pool; each upstream has its own
+        assert all(upstream.get_client(name) is client for name, client in pools.items())
+        assert len({id(client) for client in pools.values()}) == len(pools)
+
+        await upstream.close_clients()
+        assert upstream._clients == {}
+        assert all(client.is_closed for client in pools.values())
+        fresh = upstream.get_client("jpl")
+        assert fresh is not pools["jpl"] and not fresh.is_closed
+        await upstream.close_clients()
+
+    asyncio.run(run())
+
+
+def test_a_closed_client_is_replaced(monkeypatch):
+    monkeypatch.setattr(upstream, "_clients", {})
+
+    async def run():
+        client = upstream.get_client("nasa")
+        await client.aclose()
+        replacement = upstream.get_client("nasa")
+        assert replacement is not client and not replacement.is_closed
+        await upstream.close_clients()
+
+    asyncio.run(run())
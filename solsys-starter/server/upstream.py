@@ -0,0 +1,202 @@
+"""Shared HTTP client pools for the upstream APIs.
+
+One httpx.AsyncClient per upstream host, created in the app lifespan and
+reused by every request so connections stay alive between calls. Each pool has
+its own connection limits and timeouts, and its own circuit breaker (breaker.py)
+that refuses calls while the upstream is failing or slow. Calls to upstreams
+with per-key quotas go through a scheduler (scheduler.py) first.
+"""
+import asyncio
+import importlib.util
+import os
+import time
+from typing import Any, Dict, Optional
+
+import httpx
+
+import scheduler
+from breaker import CircuitBreaker
+from diskstore import store
+
+# Opt-in HTTP/2; only used when the optional `h2` package is installed
+HTTP2_ENABLED = os.getenv("UPSTREAM_HTTP2", "0") == "1" and importlib.util.find_spec("h2") is not None
+
+UPSTREAMS: Dict[str, Dict[str, Any]] = {
+    # ssd-api.jpl.nasa.gov: Horizons and SBDB
+    "jpl": {
+        "limits": httpx.Limits(max_connections=16, max_keepalive_connections=8, keepalive_expiry=60),
+        "timeout": httpx.Timeout(60, connect=10),
+        "store_ttl": 24 * 3600,
+        "slow_s": 10,
+    },
+    # api.nasa.gov: APOD, DONKI, NeoWs, Mars rover photos
+    "nasa": {
+        "limits": httpx.Limits(max_connections=10, max_keepalive_connections=5, keepalive_expiry=60),
+        "timeout": httpx.Timeout(60, connect=10),
+        "store_ttl": 3600,
+        "slow_s": 10,
+        "rate_limited": True,
+    },
+    # exoplanetarchive.ipac.caltech.edu: TAP sync queries
+    "ipac": {
+        "limits": httpx.Limits(max_connections=4, max_keepalive_connections=2, keepalive_expiry=60),
+        "timeout": httpx.Timeout(60, connect=10),
+        "store_ttl": 24 * 3600,
+        "slow_s": 20,
+    },
+}
+
+_clients: Dict[str, httpx.AsyncClient] = {}
+# Calls slower than slow_s count against the upstream like failures
+breakers: Dict[str, CircuitBreaker] = {name: CircuitBreaker(name, config["slow_s"]) for name, config in UPSTREAMS.items()}
+schedulers: Dict[str, scheduler.Scheduler] = {name: scheduler.Scheduler() for name, config in UPSTREAMS.items() if config.get("rate_limited")}
+
+
+class UpstreamStatusError(Exception):
+    """An upstream API answered with a non-200 status"""
+
+    def __init__(self, response: httpx.Response):
+        self.status_code = response.status_code
+        self.text = response.text[:200]
+        super().__init__(f"{self.status_code}: {self.text}")
+
+
+class UpstreamUnavailable(Exception):
+    """No network answer and nothing recorded for the request (replay mode)"""
+
+
+class CircuitOpen(UpstreamUnavailable):
+    """The upstream's circuit breaker is open and nothing is recorded for the request"""
+
+
+class UpstreamRateLimited(UpstreamUnavailable):
+    """The key's quota would not allow the call soon enough and nothing is recorded for the request"""
+
+
+def _new_client(name: str) -> httpx.AsyncClient:
+    config = UPSTREAMS[name]
+    return httpx.AsyncClient(limits=config["limits"], timeout=config["timeout"], http2=HTTP2_ENABLED)
+
+
+def get_client(name: str) -> httpx.AsyncClient:
+    """Pooled client for an upstream; created on first use if the lifespan has not run"""
+    client = _clients.get(name)
+    if client is None or client.is_closed:
+        client = _clients[name] = _new_client(name)
+    return client
+
+
+async def _get(name: str, url: str, params: Dict[str, Any], slow_s: Optional[float] = None, **kwargs: Any) -> httpx.Response:
+    """GET through the upstream's scheduler, if any, retrying throttled answers with backoff"""
+    sched = schedulers.get(name)
+    if sched is None:
+        return await _send(name, url, params, slow_s, **kwargs)
+    bucket = sched.bucket(str(params.get("api_key", "")))
+    attempt = 0
+    while True:
+        try:
+            await bucket.acquire(scheduler.priority())
+        except scheduler.RateLimited as e:
+            raise UpstreamRateLimited(str(e)) from e
+        r = await _send(name, url, params, slow_s, **kwargs)
+        bucket.observe(r.headers)
+        if r.status_code not in scheduler.RETRY_STATUSES:
+            return r
+        if r.status_code == 429:
+            sched.throttled += 1
+            bucket.observe({"x-ratelimit-remaining": "0"})
+        if attempt >= scheduler.MAX_RETRIES:
+            return r
+        sched.retries += 1
+        await asyncio.sleep(scheduler.retry_delay(attempt, r.headers.get("retry-after")))
+        attempt += 1
+
+
+async def _send(name: str, url: str, params: Dict[str, Any], slow_s: Optional[float] = None, **kwargs: Any) -> httpx.Response:
+    """One GET through the pool, refused at once while the upstream's breaker is open
+
+    slow_s overrides the upstream's latency limit for this call.
+    """
+    breaker = breakers[name]
+    if not breaker.allow():
+        raise CircuitOpen(f"{name} circuit open")
+    # Only the probe call may settle a half-open breaker
+    probe = breaker.probe if breaker.state == "half_open" else 0
+    started = time.monotonic()
+    try:
+        r = await get_client(name).get(url, params=params, **kwargs)
+    except asyncio.CancelledError:
+        # Cancelled by the caller (client gone, deadline); says nothing about the upstream
+        breaker.abandon(probe)
+        raise
+    except BaseException:
+        breaker.record(False, time.monotonic() - started, probe, slow_s)
+        raise
+    # Client errors (4xx) still show a healthy upstream
+    breaker.record(r.status_code < 500 and r.status_code != 429, time.monotonic() - started, probe, slow_s)
+    return r
+
+
+async def _stored_body(digest: str) -> Optional[Any]:
+    record = await asyncio.to_thread(store.get, digest)
+    return None if record is None else record["body"]
+
+
+async def get_json(name: str, url: str, params: Dict[str, Any], ttl: Optional[float] = None, slow_s: Optional[float] = None, **kwargs: Any) -> Any:
+    """GET through an upstream pool and decode the JSON body; raises UpstreamStatusError on non-200
+
+    Responses go through the on-disk store: fresh records answer without a
+    request, and stale ones stand in when the upstream errors, is unreachable,
+    has its breaker open or is out of quota (CircuitOpen / UpstreamRateLimited
+    when there is no record). Bulk pulls that are slow by design pass
+    slow_s=math.inf so only their errors count against the breaker.
+    """
+    if not store.enabled:
+        r = await _get(name, url, params, slow_s, **kwargs)
+        if r.status_code != 200:
+            raise UpstreamStatusError(r)
+        return r.json()
+
+    digest, request = store.request_key(name, url, params)
+    if store.mode == "replay":
+        body = await _stored_body(digest)
+        if body is None:
+            raise UpstreamUnavailable(f"No recorded response for {url}")
+        return body
+    if store.mode == "cache" and store.is_fresh(digest):
+        body = await _stored_body(digest)
+        if body is not None:
+            return body
+
+    try:
+        r = await _get(name, url, params, slow_s, **kwargs)
+    except (httpx.TransportError, CircuitOpen, UpstreamRateLimited):
+        if store.has(digest) and (body := await _stored_body(digest)) is not None:
+            return body
+        raise
+    if r.status_code != 200:
+        if (r.status_code >= 500 or r.status_code == 429) and store.has(digest):
+            if (body := await _stored_body(digest)) is not None:
+                return body
+        raise UpstreamStatusError(r)
+
+    body = r.json()
+    await asyncio.to_thread(store.put, digest, request, body, ttl if ttl is not None else UPSTREAMS[name]["store_ttl"])
+    return body
+
+
+async def open_clients() -> None:
+    """Create every upstream pool and index the on-disk store (called at application startup)"""
+    for name in UPSTREAMS:
+        get_client(name)
+    records = await asyncio.to_thread(store.warm)
+    if records:
+        print(f"Upstream store: {records} recorded responses available ({store.mode} mode)")
+
+
+async def close_clients() -> None:
+    """Close every upstream pool (called at application shutdown)"""
+    clients = list(_clients.values())
+    _clients.clear()
+    for client in clients:
+        await client.aclose()